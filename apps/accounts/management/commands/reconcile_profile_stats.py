@@ -0,0 +1,33 @@
+# ========================================
+# apps/accounts/management/commands/reconcile_profile_stats.py
+# ========================================
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.accounts.services import ProfileStatisticsService
+
+
+class Command(BaseCommand):
+    help = 'UserProfileの統計情報（ノート数・エントリー数）を全件集計で再計算'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='対象ユーザー名（指定しない場合は全ユーザー）'
+        )
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        users = None
+
+        if username:
+            users = User.objects.filter(username=username)
+            if not users.exists():
+                raise CommandError(f'User "{username}" not found')
+
+        changed = ProfileStatisticsService.reconcile(users=users)
+
+        self.stdout.write(
+            self.style.SUCCESS(f'✅ 統計情報の再計算が完了しました（修正: {changed}件）')
+        )
@@ -83,6 +83,15 @@ class UserProfile(BaseModel):
         default=0, 
         verbose_name='作成エントリー数'
     )
+    # ETag用のデータ世代（ノート・エントリーの書き込みごとにコミット後に進める）
+    data_generation = models.PositiveBigIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='データ世代'
+    )
+    
+    # F() で差分更新されるカウンター・データ世代（読み込み済みの古い値で上書きしないよう通常の保存では書き込まない）
+    COUNTER_FIELDS = ('total_notebooks', 'total_entries', 'data_generation')
     
     class Meta:
         verbose_name = 'ユーザープロフィール'
@@ -91,14 +100,23 @@ class UserProfile(BaseModel):
     def __str__(self):
         return f"{self.user.username}のプロフィール"
     
+    def save(self, *args, **kwargs):
+        """保存（作成時以外は update_fields の指定がなければカウンター以外の列だけを更新）"""
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+    
     def get_display_name(self):
         """表示名を取得（設定されていない場合はユーザー名）"""
         return self.display_name or self.user.username
     
     def update_statistics(self):
-        """統計情報を更新"""        
+        """統計情報を全件集計で更新（通常は差分更新、整合性チェック時のみ使用）"""
         self.total_notebooks = Notebook.objects.filter(user=self.user).count()
-        self.total_entries = Entry.objects.filter(notebook__user=self.user).count()
+        self.total_entries = Entry.objects.filter(user=self.user).count()
         self.save(update_fields=['total_notebooks', 'total_entries'])
 
 
@@ -0,0 +1,116 @@
+# ========================================
+# apps/accounts/services.py
+# ========================================
+
+import logging
+from collections import defaultdict
+from django.contrib.auth.models import User
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+from apps.accounts.models import UserProfile
+from apps.common import outbox
+from apps.common.buffers import CommitBuffer
+from apps.notes.models import Notebook, Entry
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileStatisticsService:
+    """プロフィール統計（作成ノート数・エントリー数）の差分更新"""
+
+    @staticmethod
+    def record(user_id, notebooks=0, entries=0):
+        """統計の増減を記録（アウトボックス経由でまとめて反映）"""
+        if notebooks or entries:
+            outbox.publish('profile.statistics', user_id, {'notebooks': notebooks, 'entries': entries})
+
+    @staticmethod
+    def apply(deltas):
+        """記録された増減をユーザーごとに1回のUPDATEで反映"""
+        totals = defaultdict(lambda: [0, 0])
+        for user_id, notebooks, entries in deltas:
+            totals[user_id][0] += notebooks
+            totals[user_id][1] += entries
+
+        for user_id, (notebooks, entries) in totals.items():
+            if not notebooks and not entries:
+                continue
+
+            updated = UserProfile.objects.filter(user_id=user_id).update(
+                total_notebooks=Greatest(F('total_notebooks') + notebooks, Value(0)),
+                total_entries=Greatest(F('total_entries') + entries, Value(0)),
+            )
+
+            # プロフィール未作成の場合のみ作成して全件集計
+            if not updated and User.objects.filter(pk=user_id).exists():
+                profile, created = UserProfile.objects.get_or_create(user_id=user_id)
+                profile.update_statistics()
+                logger.info(f"UserProfile created during statistics update for user_id={user_id}")
+
+    @staticmethod
+    def reconcile(users=None):
+        """全件集計で統計を再計算（整合性チェック用）
+
+        Returns:
+            int: 値が変化したプロフィール数
+        """
+        profiles = UserProfile.objects.all()
+        if users is not None:
+            profiles = profiles.filter(user__in=users)
+
+        notebook_counts = dict(
+            Notebook.objects.filter(user__in=profiles.values('user'))
+            .values('user').annotate(count=Count('id')).values_list('user', 'count')
+        )
+        entry_counts = dict(
+            Entry.objects.filter(user__in=profiles.values('user'))
+            .values('user').annotate(count=Count('id')).values_list('user', 'count')
+        )
+
+        changed = []
+        for profile in profiles.only('id', 'user_id', 'total_notebooks', 'total_entries'):
+            total_notebooks = notebook_counts.get(profile.user_id, 0)
+            total_entries = entry_counts.get(profile.user_id, 0)
+            if profile.total_notebooks != total_notebooks or profile.total_entries != total_entries:
+                profile.total_notebooks = total_notebooks
+                profile.total_entries = total_entries
+                changed.append(profile)
+
+        UserProfile.objects.bulk_update(changed, ['total_notebooks', 'total_entries'], batch_size=500)
+        return len(changed)
+
+
+class DataGenerationService:
+    """ユーザーのデータ世代（ページのETag用）
+
+    全ワーカーで共有されるようDBのカウンターとして保持し、
+    書き込みのコミット後にユーザーごとに1回のUPDATEで進める。
+    """
+
+    @staticmethod
+    def get(user_id):
+        """データ世代を取得（プロフィール未作成の場合は None）"""
+        return UserProfile.objects.filter(user_id=user_id).values_list('data_generation', flat=True).first()
+
+    @staticmethod
+    def mark_changed(user_id):
+        """書き込み後にデータ世代を進める（コミット後・リクエスト単位でまとめて実行）"""
+        if user_id is not None:
+            _generation_buffer.add(user_id)
+
+    @staticmethod
+    def bump(user_ids):
+        """指定ユーザーのデータ世代を1回のUPDATEで進める"""
+        return UserProfile.objects.filter(user_id__in=set(user_ids)).update(
+            data_generation=F('data_generation') + 1
+        )
+
+
+_generation_buffer = CommitBuffer(DataGenerationService.bump)
+
+
+@outbox.handler('profile.statistics')
+def apply_profile_statistics(events):
+    ProfileStatisticsService.apply(
+        (user_id, payload.get('notebooks', 0), payload.get('entries', 0)) for user_id, payload in events
+    )
@@ -1,11 +1,14 @@
 # apps/accounts/signals.py を修正
 
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
 from django.contrib.auth.models import User
 from django.db import IntegrityError
+from django.db.models import Count
 from apps.accounts.models import UserProfile, UserSettings
-from apps.notes.models import Notebook, Entry
+from apps.accounts.services import DataGenerationService, ProfileStatisticsService
+from apps.common.signals import pre_soft_delete
+from apps.notes.models import Notebook, SubNotebook, Entry
 import logging
 
 logger = logging.getLogger(__name__)
@@ -62,28 +65,19 @@ def create_user_profile(sender, instance, created, **kwargs):
 
 
 @receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """ユーザー保存時にプロフィールも保存（修正版）"""
+def save_user_profile(sender, instance, created, **kwargs):
+    """ユーザー保存時にプロフィール・設定が欠けていれば作成
+
+    ログイン時の last_login 更新などでも呼ばれるため、既存のプロフィールは保存し直さない
+    （差分更新されたカウンターを読み込み済みの値で上書きしないため）。
+    """
+    if created:
+        return
     try:
-        # プロフィールが存在する場合のみ保存
-        if hasattr(instance, 'userprofile'):
-            instance.userprofile.save()
-        else:
-            # プロフィールが存在しない場合は作成を試行
-            logger.warning(f"UserProfile not found for user {instance.username}, attempting to create")
-            create_user_profile(sender, instance, created=True)
-            
-        if hasattr(instance, 'usersettings'):
-            instance.usersettings.save()
-        else:
-            # セッティングが存在しない場合は作成を試行
-            logger.warning(f"UserSettings not found for user {instance.username}, attempting to create")
+        if not (UserProfile.objects.filter(user=instance).exists()
+                and UserSettings.objects.filter(user=instance).exists()):
+            logger.warning(f"Profile/settings not found for user {instance.username}, attempting to create")
             create_user_profile(sender, instance, created=True)
-            
-    except (UserProfile.DoesNotExist, UserSettings.DoesNotExist):
-        # プロフィールが存在しない場合は作成
-        logger.info(f"Creating missing profile/settings for user {instance.username}")
-        create_user_profile(sender, instance, created=True)
     except Exception as e:
         logger.error(f"Error in save_user_profile for user {instance.username}: {e}", exc_info=True)
 
@@ -121,44 +115,50 @@ def cleanup_user_data(sender, instance, **kwargs):
 
 @receiver(post_save, sender=Notebook)
 def update_notebook_statistics(sender, instance, created, **kwargs):
-    """ノートブック作成・更新時の統計情報更新"""
+    """ノートブック作成時の統計情報更新（差分反映）"""
     if created:
-        try:
-            profile, profile_created = UserProfile.objects.get_or_create(user=instance.user)
-            profile.update_statistics()
-        except Exception as e:
-            logger.error(f"Error updating notebook statistics for user {instance.user.username}: {e}")
+        ProfileStatisticsService.record(instance.user_id, notebooks=1)
 
 
 @receiver(post_save, sender=Entry)
 def update_entry_statistics(sender, instance, created, **kwargs):
-    """エントリー作成・更新時の統計情報更新"""
+    """エントリー作成時の統計情報更新（差分反映）"""
     if created:
-        try:
-            profile, profile_created = UserProfile.objects.get_or_create(user=instance.notebook.user)
-            profile.update_statistics()
-        except Exception as e:
-            logger.error(f"Error updating entry statistics for user {instance.notebook.user.username}: {e}")
+        ProfileStatisticsService.record(instance.user_id, entries=1)
 
 
 @receiver(post_delete, sender=Notebook)
 def update_notebook_statistics_on_delete(sender, instance, **kwargs):
-    """ノートブック削除時の統計情報更新"""
-    try:
-        profile, profile_created = UserProfile.objects.get_or_create(user=instance.user)
-        profile.update_statistics()
-    except Exception as e:
-        logger.error(f"Error updating notebook statistics on delete for user {instance.user.username}: {e}")
+    """ノートブック削除時の統計情報更新（差分反映）"""
+    if not instance.is_deleted:
+        ProfileStatisticsService.record(instance.user_id, notebooks=-1)
 
 
 @receiver(post_delete, sender=Entry)
 def update_entry_statistics_on_delete(sender, instance, **kwargs):
-    """エントリー削除時の統計情報更新"""
+    """エントリー削除時の統計情報更新（差分反映）"""
+    if instance.is_deleted:
+        # 論理削除時に反映済み
+        return
     try:
-        profile, profile_created = UserProfile.objects.get_or_create(user=instance.notebook.user)
-        profile.update_statistics()
-    except Exception as e:
-        logger.error(f"Error updating entry statistics on delete for user {instance.notebook.user.username}: {e}")
+        ProfileStatisticsService.record(instance.user_id, entries=-1)
+    except Notebook.DoesNotExist:
+        logger.warning(f"Notebook not found while updating entry statistics on delete: entry_id={instance.pk}")
+
+
+@receiver(pre_soft_delete, sender=Notebook)
+def update_notebook_statistics_on_soft_delete(sender, queryset, **kwargs):
+    """ノートブック論理削除時の統計情報更新（ユーザーごとに集計して差分反映）"""
+    for user_id, count in queryset.values('user').annotate(count=Count('pk')).values_list('user', 'count'):
+        ProfileStatisticsService.record(user_id, notebooks=-count)
+
+
+@receiver(pre_soft_delete, sender=Entry)
+def update_entry_statistics_on_soft_delete(sender, queryset, **kwargs):
+    """エントリー論理削除時の統計情報更新（ユーザーごとに集計して差分反映）"""
+    counts = queryset.values('user').annotate(count=Count('pk')).values_list('user', 'count')
+    for user_id, count in counts:
+        ProfileStatisticsService.record(user_id, entries=-count)
 
 
 # ========================================
@@ -167,15 +167,15 @@ def update_entry_statistics_on_delete(sender, instance, **kwargs):
 
 @receiver(post_save, sender=Notebook)
 def record_notebook_activity(sender, instance, created, **kwargs):
-    """ノートブック作成時のアクティビティ記録"""
+    """ノートブック作成時のアクティビティ記録（リクエスト単位でまとめて保存）"""
     if created:
         try:
-            from apps.dashboard.models import RecentActivity
-            RecentActivity.objects.create(
-                user=instance.user,
+            from apps.dashboard.services import ActivityService
+            ActivityService.record(
+                user_id=instance.user_id,
                 activity_type='NOTEBOOK_CREATED',
                 title=f'{instance.title} - 新規ノート作成',
-                description=f'銘柄: {instance.company_name or instance.stock_code or "未設定"}',
+                description=f'タイプ: {instance.get_notebook_type_display()}',
                 related_object_id=instance.id
             )
         except ImportError:
@@ -188,12 +188,12 @@ def record_notebook_activity(sender, instance, created, **kwargs):
 
 @receiver(post_save, sender=Entry)
 def record_entry_activity(sender, instance, created, **kwargs):
-    """エントリー作成時のアクティビティ記録"""
+    """エントリー作成時のアクティビティ記録（リクエスト単位でまとめて保存）"""
     if created:
         try:
-            from apps.dashboard.models import RecentActivity
-            RecentActivity.objects.create(
-                user=instance.notebook.user,
+            from apps.dashboard.services import ActivityService
+            ActivityService.record(
+                user_id=instance.user_id,
                 activity_type='ENTRY_ADDED',
                 title=f'{instance.notebook.title} - エントリー追加',
                 description=f'{instance.get_entry_type_display()}: {instance.title}',
@@ -204,4 +204,40 @@ def record_entry_activity(sender, instance, created, **kwargs):
             pass
         except Exception as e:
             # エラーが発生してもメイン処理に影響しないよう
-            logger.error(f"Error recording entry activity: {e}")
\ No newline at end of file
+            logger.error(f"Error recording entry activity: {e}")
+
+
+# ========================================
+# ETag用のデータ世代（apps/common/conditional.py）
+# ========================================
+
+@receiver(post_save, sender=Notebook)
+@receiver(post_delete, sender=Notebook)
+@receiver(post_save, sender=Entry)
+@receiver(post_delete, sender=Entry)
+def mark_data_changed_on_save(sender, instance, **kwargs):
+    """ノートブック・エントリーの作成・更新・物理削除時"""
+    DataGenerationService.mark_changed(instance.user_id)
+
+
+@receiver(pre_soft_delete, sender=Notebook)
+@receiver(pre_soft_delete, sender=Entry)
+def mark_data_changed_on_soft_delete(sender, queryset, **kwargs):
+    for user_id in queryset.values_list('user', flat=True).distinct():
+        DataGenerationService.mark_changed(user_id)
+
+
+@receiver(m2m_changed, sender=Notebook.tags.through)
+@receiver(m2m_changed, sender=Entry.tags.through)
+def mark_data_changed_on_tags_change(sender, instance, action, **kwargs):
+    """タグの付け外し時"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        DataGenerationService.mark_changed(instance.user_id)
+
+
+@receiver(post_save, sender=SubNotebook)
+@receiver(post_delete, sender=SubNotebook)
+def mark_data_changed_on_sub_notebook_change(sender, instance, **kwargs):
+    """サブノートの作成・変更・削除時（一覧のサブノート表示・エントリー詳細のサブノート名）"""
+    user_id = Notebook.all_objects.filter(pk=instance.notebook_id).values_list('user_id', flat=True).first()
+    DataGenerationService.mark_changed(user_id)
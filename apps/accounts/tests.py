@@ -1,3 +1,62 @@
+from django.contrib.auth.models import User
 from django.test import TestCase
+from apps.accounts.models import UserProfile
+from apps.accounts.services import ProfileStatisticsService
+from apps.notes.models import Notebook, Entry
 
-# Create your tests here.
+
+class ProfileStatisticsTests(TestCase):
+    """プロフィール統計（作成ノート数・エントリー数）の差分更新"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='counter', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='統計ノート')
+            for i in range(2):
+                Entry.objects.create(
+                    notebook=self.notebook, entry_type='MEMO', title=f'メモ{i}', content={'observation': '観察'}
+                )
+
+    def _profile(self):
+        return UserProfile.objects.get(user=self.user)
+
+    def test_creation_increments_counters(self):
+        profile = self._profile()
+        self.assertEqual((profile.total_notebooks, profile.total_entries), (1, 2))
+
+    def test_soft_delete_decrements_counters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Entry.objects.filter(notebook=self.notebook).first().delete()
+        self.assertEqual(self._profile().total_entries, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Notebook.objects.filter(pk=self.notebook.pk).delete()
+        self.assertEqual(self._profile().total_notebooks, 0)
+
+    def test_counters_survive_user_save(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = '更新'
+        user.save()
+
+        profile = self._profile()
+        self.assertEqual((profile.total_notebooks, profile.total_entries), (1, 2))
+
+    def test_counters_survive_stale_profile_save(self):
+        # 差分更新の前に読み込んだプロフィールを保存しても、カウンターは上書きされない
+        stale = self._profile()
+        with self.captureOnCommitCallbacks(execute=True):
+            Notebook.objects.create(user=self.user, title='追加ノート')
+
+        stale.bio = '自己紹介'
+        stale.save()
+
+        profile = self._profile()
+        self.assertEqual(profile.bio, '自己紹介')
+        self.assertEqual(profile.total_notebooks, 2)
+
+    def test_reconcile_repairs_drift(self):
+        UserProfile.objects.filter(user=self.user).update(total_notebooks=5, total_entries=0)
+
+        self.assertEqual(ProfileStatisticsService.reconcile(), 1)
+        profile = self._profile()
+        self.assertEqual((profile.total_notebooks, profile.total_entries), (1, 2))
@@ -163,10 +163,9 @@ class ProfileDetailView(LoginRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         """コンテキストデータを追加"""
         context = super().get_context_data(**kwargs)
-        
-        # 統計情報を更新
-        self.object.update_statistics()
-        
+
+        # 統計情報はシグナルで差分更新済み（全件集計は reconcile_profile_stats で実施）
+
         # 最近のログイン履歴
         context['recent_logins'] = LoginHistory.objects.filter(
             user=self.request.user,
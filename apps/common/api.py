@@ -0,0 +1,72 @@
+# ========================================
+# apps/common/api.py - 読み取り用REST APIの共通部品
+# ========================================
+
+from rest_framework import pagination, serializers
+
+
+class ApiCursorPagination(pagination.CursorPagination):
+    """カーソル方式のページネーション（件数のCOUNTやOFFSETを発行しない）
+
+    並び順はビューの ordering（OrderingFilter 指定時はその値）を使用する。
+    """
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class SparseFieldsetSerializerMixin:
+    """fields 引数に指定されたフィールドだけを出力するシリアライザーMixin"""
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """?fields= による疎なフィールドセットを扱うViewSet用Mixin
+
+    要求されたフィールドに必要な列だけを only() で取得し、
+    関連（タグ等）は要求された場合のみ prefetch_related する。
+    シリアライザーは SparseFieldsetSerializerMixin を継承し、Meta.fields を明示すること。
+    """
+    fields_param = 'fields'
+    # 出力フィールド → 必要な列（フィールド名がそのまま列名のものは指定不要）
+    field_columns = {}
+    # 出力フィールド → prefetch_related の引数（列を必要としない関連フィールド）
+    field_prefetches = {}
+
+    def get_sparse_fields(self):
+        """要求されたフィールド名のリスト（指定なしの場合は None）"""
+        if not hasattr(self, '_sparse_fields'):
+            value = self.request.query_params.get(self.fields_param, '')
+            requested = [name.strip() for name in value.split(',') if name.strip()]
+            unknown = set(requested) - set(self.get_serializer_class().Meta.fields)
+            if unknown:
+                raise serializers.ValidationError({
+                    self.fields_param: f'不明なフィールドです: {", ".join(sorted(unknown))}'
+                })
+            self._sparse_fields = requested or None
+        return self._sparse_fields
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_sparse_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def apply_sparse_fieldset(self, queryset):
+        """出力するフィールドに必要な列・関連だけを読み込むクエリセットに変換"""
+        fields = self.get_sparse_fields() or self.get_serializer_class().Meta.fields
+
+        # 主キーとカーソル・並び替えに使う列は常に取得する
+        columns = {queryset.model._meta.pk.name}
+        columns.update(name.lstrip('-') for name in getattr(self, 'ordering_fields', ()))
+        prefetches = []
+        for name in fields:
+            if name in self.field_prefetches:
+                prefetches.append(self.field_prefetches[name])
+            else:
+                columns.update(self.field_columns.get(name, (name,)))
+
+        return queryset.only(*columns).prefetch_related(*prefetches)
@@ -0,0 +1,117 @@
+# ========================================
+# apps/common/buffers.py
+# ========================================
+
+import threading
+import logging
+from contextlib import contextmanager
+from django.db import transaction, DEFAULT_DB_ALIAS
+
+logger = logging.getLogger(__name__)
+
+# リクエスト単位の遅延flushスコープ（スレッドごと）
+_scope = threading.local()
+
+
+@contextmanager
+def deferred_flush():
+    """スコープ終了までバッファのflushを遅延させる
+
+    CommitBufferMiddleware からリクエストごとに使用される。
+    ネストされた場合は最も外側のスコープでまとめてflushする。
+    """
+    if getattr(_scope, 'buffers', None) is not None:
+        yield
+        return
+
+    _scope.buffers = []
+    try:
+        yield
+    finally:
+        buffers = _scope.buffers
+        _scope.buffers = None
+        for buffer in buffers:
+            buffer.flush_deferred()
+
+
+class _Batch(list):
+    """on_commit に登録される項目のまとまり（登録時のセーブポイントに紐づく）"""
+
+    def __init__(self, buffer):
+        super().__init__()
+        self.buffer = buffer
+        self.committed = False
+
+    def __call__(self):
+        self.committed = True
+        self.buffer._commit(list(self))
+
+
+class CommitBuffer:
+    """トランザクション単位で書き込みをまとめるバッファ
+
+    add() された項目はトランザクションのコミット時にまとめて flush 関数へ
+    渡される。ロールバックされた場合は破棄される。
+    項目はセーブポイントごとのまとまりとして on_commit に登録するため、
+    ロールバックされたセーブポイント内で追加された項目も破棄される。
+    deferred_flush() スコープ内ではスコープ終了時まで flush を遅延し、
+    リクエスト全体で1回にまとめる。どちらでもない場合は即座に flush される。
+    """
+
+    def __init__(self, flush, using=DEFAULT_DB_ALIAS):
+        self.flush = flush
+        self.using = using
+        self._local = threading.local()
+
+    def add(self, item):
+        """項目をバッファに追加"""
+        connection = transaction.get_connection(self.using)
+        if not connection.in_atomic_block:
+            self._commit([item])
+            return
+
+        batch = self._current_batch(connection)
+        if batch is None:
+            batch = _Batch(self)
+            transaction.on_commit(batch, using=self.using)
+        batch.append(item)
+
+    def _current_batch(self, connection):
+        """現在のセーブポイントに登録済みのまとまり（なければ None）
+
+        on_commit の登録はその時点のセーブポイントに紐づき、セーブポイントの
+        ロールバック時に Django が取り除く。異なるセーブポイントのまとまりに
+        追加すると、ロールバックされた項目がコミットされてしまうため再利用しない。
+        """
+        savepoint_ids = set(connection.savepoint_ids)
+        for sids, func, *_ in reversed(connection.run_on_commit):
+            if (isinstance(func, _Batch) and func.buffer is self
+                    and not func.committed and sids == savepoint_ids):
+                return func
+        return None
+
+    def _commit(self, items):
+        """確定した項目をflush（遅延スコープ内ならスコープ終了まで保持）"""
+        buffers = getattr(_scope, 'buffers', None)
+        if buffers is None:
+            self._flush(items)
+            return
+
+        deferred = getattr(self._local, 'deferred', None)
+        if deferred is None:
+            deferred = self._local.deferred = []
+            buffers.append(self)
+        deferred.extend(items)
+
+    def flush_deferred(self):
+        """遅延されていた項目をflush"""
+        deferred = getattr(self._local, 'deferred', None)
+        self._local.deferred = None
+        if deferred:
+            self._flush(deferred)
+
+    def _flush(self, items):
+        try:
+            self.flush(items)
+        except Exception as e:
+            logger.error(f"バッファflushエラー ({self.flush.__qualname__}): {e}", exc_info=True)
@@ -0,0 +1,101 @@
+# ========================================
+# apps/common/cache.py - ユーザー・ノートブック・タグ単位のバージョン付きキャッシュ
+# ========================================
+# バージョンキーの更新は他のワーカーにも見えなければならないため、
+# CACHES には全ワーカーで共有されるバックエンド（DatabaseCache / Redis 等）を設定すること。
+# プロセスごとの LocMemCache では、書き込みを処理したワーカー以外で
+# 古いキャッシュが使われ続ける。
+
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _version_key(scope, object_id):
+    return f'{scope}_cache_version:{object_id}'
+
+
+def _get_version(scope, object_id):
+    """キャッシュバージョンを取得
+
+    バージョンキーが存在しない（退避された）場合は現在時刻で初期化し、
+    古いバージョンのキャッシュが再利用されないようにする。
+    """
+    version = cache.get(_version_key(scope, object_id))
+    if version is None:
+        version = time.time_ns()
+        cache.add(_version_key(scope, object_id), version, timeout=None)
+        version = cache.get(_version_key(scope, object_id), version)
+    return version
+
+
+def _bump_version(scope, object_id):
+    """キャッシュバージョンを更新（既存のキャッシュを一括で無効化）"""
+    try:
+        cache.incr(_version_key(scope, object_id))
+    except ValueError:
+        cache.add(_version_key(scope, object_id), time.time_ns(), timeout=None)
+
+
+def get_user_version(user_id):
+    """ユーザーのキャッシュバージョンを取得"""
+    return _get_version('user', user_id)
+
+
+def bump_user_version(user_id):
+    """ユーザーのキャッシュバージョンを更新（既存のキャッシュを一括で無効化）"""
+    _bump_version('user', user_id)
+
+
+def invalidate_user_cache(user_id):
+    """書き込み後にユーザーのキャッシュを無効化
+
+    コミット前に無効化すると、並行リクエストが変更前のデータを
+    新しいバージョンでキャッシュしてしまうため、コミット後に実行する。
+    """
+    if user_id is not None:
+        transaction.on_commit(lambda: bump_user_version(user_id))
+
+
+def user_cache_key(user_id, name, *parts):
+    """ユーザーのバージョンを含むキャッシュキーを生成"""
+    key = f'{name}:{user_id}:v{get_user_version(user_id)}'
+    if parts:
+        key += ':' + ':'.join(str(part) for part in parts)
+    return key
+
+
+def get_notebook_version(notebook_id):
+    """ノートブックのキャッシュバージョンを取得"""
+    return _get_version('notebook', notebook_id)
+
+
+def bump_notebook_version(notebook_id):
+    """ノートブックのキャッシュバージョンを更新"""
+    _bump_version('notebook', notebook_id)
+
+
+def invalidate_notebook_cache(notebook_id):
+    """書き込み後にノートブックのキャッシュを無効化（コミット後に実行）"""
+    if notebook_id is not None:
+        transaction.on_commit(lambda: bump_notebook_version(notebook_id))
+
+
+def notebook_cache_key(notebook_id, name, *parts):
+    """ノートブックのバージョンを含むキャッシュキーを生成"""
+    key = f'{name}:notebook:{notebook_id}:v{get_notebook_version(notebook_id)}'
+    if parts:
+        key += ':' + ':'.join(str(part) for part in parts)
+    return key
+
+
+def get_tag_version(user_id):
+    """ユーザーのタグ集合のキャッシュバージョンを取得（タグ表示を含むフラグメント用）"""
+    return _get_version('tags', user_id)
+
+
+def invalidate_tag_cache(user_id):
+    """タグの変更・付け外し後にタグ集合のバージョンを更新（コミット後に実行）"""
+    if user_id is not None:
+        transaction.on_commit(lambda: _bump_version('tags', user_id))
+
@@ -0,0 +1,72 @@
+# ========================================
+# apps/common/conditional.py - 条件付きGET（ETag / Last-Modified）
+# ========================================
+
+import hashlib
+from functools import wraps
+from django.conf import settings
+from django.contrib import messages
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+from apps.accounts.services import DataGenerationService
+from apps.common.cache import get_tag_version, get_user_version
+
+
+def user_etag(request, *parts):
+    """ユーザーのデータ世代（DB）・キャッシュバージョンからETagを生成
+
+    ページに埋め込まれるCSRFトークン、日付に依存する表示（直近N日の件数等）、
+    クエリ文字列もETagに含める。未表示のメッセージがある場合は
+    304で表示が抜け落ちないよう None（条件付き処理なし）を返す。
+    プロフィール未作成でデータ世代がない場合も同様。
+    """
+    user = request.user
+    if not user.is_authenticated or len(messages.get_messages(request)):
+        return None
+    generation = DataGenerationService.get(user.pk)
+    if generation is None:
+        return None
+
+    stamp = '|'.join(str(part) for part in (
+        user.pk,
+        generation,
+        get_user_version(user.pk),
+        get_tag_version(user.pk),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        timezone.localdate(),
+        request.get_full_path(),
+        *parts,
+    ))
+    return hashlib.md5(stamp.encode()).hexdigest()
+
+
+def user_condition(stamp=None, last_modified=None):
+    """ユーザー単位のETag（と任意のLast-Modified）で条件付きGETを行うデコレーター
+
+    一致するリクエストにはビュー本体（コンテキストの構築）を実行せずに304を返す。
+    応答はユーザー固有のため、共有キャッシュには保存させず毎回再検証させる。
+
+    Args:
+        stamp: (request, *args, **kwargs) → ETagに加えるオブジェクトのバージョン要素のタプル。
+            None を返した場合は条件付き処理を行わない（404等はビュー本体に任せる）。
+        last_modified: (request, *args, **kwargs) → 最終更新日時
+    """
+    def etag_func(request, *args, **kwargs):
+        parts = stamp(request, *args, **kwargs) if stamp else ()
+        if parts is None:
+            return None
+        return user_etag(request, *parts)
+
+    def decorator(view_func):
+        conditional_view = condition(etag_func=etag_func, last_modified_func=last_modified)(view_func)
+
+        @wraps(view_func)
+        def inner(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return inner
+
+    return decorator
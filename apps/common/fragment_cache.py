@@ -0,0 +1,76 @@
+# ========================================
+# apps/common/fragment_cache.py - フラグメントキャッシュのヒット率集計
+# ========================================
+
+import threading
+from collections import Counter
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.dispatch import receiver
+
+_STATS_PREFIX = 'fragment_cache_stats'
+_NAMES_KEY = f'{_STATS_PREFIX}:names'
+
+_local = threading.local()
+
+
+def _counts():
+    if not hasattr(_local, 'counts'):
+        _local.counts = Counter()
+    return _local.counts
+
+
+def record(name, hit):
+    """フラグメントの参照結果を記録（リクエスト終了時にまとめてキャッシュへ反映）"""
+    _counts()[(name, 'hits' if hit else 'misses')] += 1
+
+
+def _incr(key, delta):
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        if not cache.add(key, delta, timeout=None):
+            cache.incr(key, delta)
+
+
+def flush():
+    """記録した件数をキャッシュ上のカウンタに加算（フラグメント名・種別ごとに1回）"""
+    counts = _counts()
+    if not counts:
+        return
+    for (name, kind), count in counts.items():
+        _incr(f'{_STATS_PREFIX}:{name}:{kind}', count)
+
+    names = {name for name, kind in counts}
+    known = cache.get(_NAMES_KEY, set())
+    if not names <= known:
+        cache.set(_NAMES_KEY, known | names, timeout=None)
+    counts.clear()
+
+
+@receiver(request_finished)
+def flush_on_request_finished(sender, **kwargs):
+    flush()
+
+
+def get_stats():
+    """フラグメント名ごとのヒット数・ミス数・ヒット率を取得"""
+    stats = {}
+    for name in sorted(cache.get(_NAMES_KEY, set())):
+        hits = cache.get(f'{_STATS_PREFIX}:{name}:hits', 0)
+        misses = cache.get(f'{_STATS_PREFIX}:{name}:misses', 0)
+        total = hits + misses
+        stats[name] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits * 100.0 / total, 1) if total else 0.0,
+        }
+    return stats
+
+
+def reset_stats():
+    """集計をリセット"""
+    names = cache.get(_NAMES_KEY, set())
+    cache.delete_many(
+        [f'{_STATS_PREFIX}:{name}:{kind}' for name in names for kind in ('hits', 'misses')] + [_NAMES_KEY]
+    )
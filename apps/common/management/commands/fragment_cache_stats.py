@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from apps.common import fragment_cache
+
+
+class Command(BaseCommand):
+    help = 'テンプレートのフラグメントキャッシュのヒット率を表示'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='表示後に集計をリセット'
+        )
+
+    def handle(self, *args, **options):
+        stats = fragment_cache.get_stats()
+        if not stats:
+            self.stdout.write('集計データがありません')
+        for name, values in stats.items():
+            self.stdout.write(
+                f"{name}: ヒット率 {values['hit_rate']}% "
+                f"（ヒット {values['hits']}件 / ミス {values['misses']}件）"
+            )
+
+        if options['reset']:
+            fragment_cache.reset_stats()
+            self.stdout.write(self.style.SUCCESS('集計をリセットしました'))
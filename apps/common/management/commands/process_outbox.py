@@ -0,0 +1,132 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.common import outbox
+from apps.common.models import OutboxEvent
+
+# 複数のワーカーが同時に起動された場合にバッチを1つずつ処理させるためのアドバイザリーロックのキー
+OUTBOX_LOCK_KEY = 0x6f7574626f78
+
+
+class Command(BaseCommand):
+    help = 'アウトボックスのイベントをバッチ単位で適用（ユーザーごとに発行順）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='1トランザクションで処理する最大件数（デフォルト: 500）'
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=5,
+            help='この回数失敗したイベントは処理対象外にする（デフォルト: 5）'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='キューが空になっても終了せずにポーリングを続ける'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=2.0,
+            help='--loop 時のポーリング間隔（秒、デフォルト: 2.0）'
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=7,
+            help='処理済みイベントの保持日数（デフォルト: 7日）'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        max_attempts = options['max_attempts']
+
+        if batch_size <= 0 or max_attempts <= 0 or options['retention_days'] < 0:
+            raise CommandError('--batch-size/--max-attempts は1以上、--retention-days は0以上を指定してください')
+
+        total = 0
+        while True:
+            processed = self._process_batch(batch_size, max_attempts)
+            total += processed
+            if processed:
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        cutoff = timezone.now() - timedelta(days=options['retention_days'])
+        purged, _ = OutboxEvent.objects.filter(processed_at__lt=cutoff).delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'アウトボックスの処理が完了しました（{total}件適用、処理済み{purged}件削除）'
+        ))
+
+    def _process_batch(self, batch_size, max_attempts):
+        """未処理イベントを古い順に取得して適用
+
+        適用と処理済みの記録は同一トランザクションで行うため、
+        途中で失敗しても同じイベントが二重に適用されることはない。
+        ユーザーごとの発行順を守るため、複数のワーカーが起動されていても
+        バッチは同時に1つしか処理しない（ロック中の行を飛ばして後続の
+        イベントを先に適用することはない）。
+
+        Returns:
+            int: 適用したイベント数
+        """
+        with transaction.atomic():
+            self._acquire_consumer_lock()
+            events = list(
+                OutboxEvent.objects.select_for_update()
+                .filter(processed_at__isnull=True, attempts__lt=max_attempts)
+                .order_by('id')[:batch_size]
+            )
+            if not events:
+                return 0
+
+            try:
+                with transaction.atomic():
+                    outbox.dispatch([(e.event_type, e.user_id, e.payload) for e in events])
+                    self._mark_processed(events)
+                return len(events)
+            except Exception as e:
+                self.stderr.write(f'バッチ適用エラー、1件ずつ再試行します: {e}')
+
+            # 1件ずつ適用し、失敗したユーザーの後続イベントは順序を守るため次回に回す
+            applied = 0
+            failed_users = set()
+            for event in events:
+                if event.user_id in failed_users:
+                    continue
+                try:
+                    with transaction.atomic():
+                        outbox.dispatch([(event.event_type, event.user_id, event.payload)])
+                        self._mark_processed([event])
+                    applied += 1
+                except Exception as e:
+                    failed_users.add(event.user_id)
+                    OutboxEvent.objects.filter(pk=event.pk).update(
+                        attempts=event.attempts + 1,
+                        last_error=str(e)[:1000],
+                    )
+                    self.stderr.write(f'イベント適用エラー (id={event.pk}, {event.event_type}): {e}')
+            return applied
+
+    def _mark_processed(self, events):
+        OutboxEvent.objects.filter(pk__in=[e.pk for e in events]).update(processed_at=timezone.now())
+
+    def _acquire_consumer_lock(self):
+        """トランザクション終了まで有効な消費者ロックを取得（他のワーカーの処理完了を待つ）
+
+        PostgreSQL ではアドバイザリーロック、その他は先頭行の select_for_update による
+        待機で直列化する（SQLite は書き込みがデータベース単位で直列化される）。
+        """
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [OUTBOX_LOCK_KEY])
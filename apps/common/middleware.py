@@ -0,0 +1,16 @@
+# ========================================
+# apps/common/middleware.py
+# ========================================
+
+from apps.common.buffers import deferred_flush
+
+
+class CommitBufferMiddleware:
+    """リクエスト中にバッファされた書き込みをレスポンス生成後にまとめてflush"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with deferred_flush():
+            return self.get_response(request)
@@ -2,13 +2,196 @@
 # apps/common/models.py
 # ========================================
 
-from django.db import models
+import hashlib
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from django.utils import timezone
+from apps.common.signals import pre_soft_delete
 
 class BaseModel(models.Model):
     """全モデルの基底クラス"""
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='作成日時')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新日時')
-    
+
     class Meta:
         abstract = True
+
+
+class ChangeTrackingMixin:
+    """フィールド変更追跡Mixin
+
+    DBから読み込んだ時点の値を保持し、保存時に実際に変更されたフィールドを
+    changed_fields に設定する（post_save シグナル内でも参照可能）。
+    派生処理は依存フィールドが変わった場合のみ実行するために使用する。
+    JSONフィールドは値をコピーせずハッシュ値だけを保持して比較する。
+    """
+    tracked_fields = None  # None の場合は全ての具象フィールドを追跡
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _get_tracked_fields(self):
+        """追跡対象フィールドの一覧"""
+        if self.tracked_fields is None:
+            return self._meta.concrete_fields
+        return [self._meta.get_field(name) for name in self.tracked_fields]
+
+    def _get_tracked_attnames(self):
+        """追跡対象フィールドの (name, attname) 一覧"""
+        return [(field.name, field.attname) for field in self._get_tracked_fields()]
+
+    @staticmethod
+    def _snapshot_value(field, value):
+        """比較基準として保持する値（JSONはその場で変更されうるためハッシュ値）"""
+        if isinstance(field, models.JSONField):
+            return hashlib.md5(
+                json.dumps(value, sort_keys=True, cls=DjangoJSONEncoder).encode()
+            ).hexdigest()
+        return value
+
+    def _snapshot_tracked_fields(self, names=None):
+        """現在の値を比較基準として保存（遅延読み込みのフィールドは除外）
+
+        names を指定した場合はそのフィールドの基準だけを更新する。
+        """
+        if names is None or not hasattr(self, '_loaded_values'):
+            self._loaded_values = {}
+        for field in self._get_tracked_fields():
+            if names is not None and field.name not in names and field.attname not in names:
+                continue
+            if field.attname in self.__dict__:
+                self._loaded_values[field.attname] = self._snapshot_value(field, self.__dict__[field.attname])
+
+    def get_changed_fields(self):
+        """読み込み後に変更されたフィールド名のセットを取得"""
+        if self._state.adding:
+            return {name for name, attname in self._get_tracked_attnames()}
+
+        loaded = getattr(self, '_loaded_values', {})
+        return {
+            field.name for field in self._get_tracked_fields()
+            if field.attname in loaded
+            and self._snapshot_value(field, self.__dict__.get(field.attname)) != loaded[field.attname]
+        }
+
+    def has_changed(self, *fields):
+        """指定フィールドのいずれかが変更されたかどうか"""
+        return bool(self.get_changed_fields().intersection(fields))
+
+    def get_loaded_value(self, name):
+        """読み込み時点（post_save 内では保存前）の値を取得（JSONフィールドはハッシュ値）"""
+        attname = self._meta.get_field(name).attname
+        return getattr(self, '_loaded_values', {}).get(attname)
+
+    def save(self, *args, **kwargs):
+        """保存時に変更フィールドを記録し、保存したフィールドの比較基準を更新
+
+        update_fields 指定時は保存していないフィールドの変更を保留のまま残す。
+        """
+        adding = self._state.adding
+        changed = self.get_changed_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            changed &= set(update_fields)
+
+        self.changed_fields = changed
+        super().save(*args, **kwargs)
+        self._snapshot_tracked_fields(None if adding or update_fields is None else set(update_fields))
+
+
+class SoftDeleteQuerySet(models.QuerySet):
+    """論理削除対応クエリセット（delete() は削除日時の設定のみ）"""
+
+    def delete(self, deleted_at=None):
+        """論理削除（1回のUPDATE・行ごとのシグナルなし）"""
+        targets = self.filter(deleted_at__isnull=True).order_by()
+        with transaction.atomic(using=self.db):
+            pre_soft_delete.send(sender=self.model, queryset=targets)
+            count = targets.update(deleted_at=deleted_at or timezone.now())
+        return count, {self.model._meta.label: count}
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+    def hard_delete(self):
+        """物理削除（通常のカスケード・シグナルあり）"""
+        return super().delete()
+
+    hard_delete.alters_data = True
+
+    def alive(self):
+        return self.filter(deleted_at__isnull=True)
+
+    def dead(self):
+        return self.filter(deleted_at__isnull=False)
+
+
+class SoftDeleteManager(models.Manager.from_queryset(SoftDeleteQuerySet)):
+    """論理削除済みの行を除外するマネージャー"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class SoftDeleteModel(models.Model):
+    """論理削除Mixin
+
+    delete() は deleted_at を設定して既定のクエリセットから隠すだけで、
+    行の物理削除は purge_deleted コマンドがチャンク単位で行う。
+    削除済みを含めて参照する場合は all_objects を使用する。
+    """
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name='削除日時')
+
+    objects = SoftDeleteManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @property
+    def is_deleted(self):
+        return self.deleted_at is not None
+
+    def delete(self, using=None, keep_parents=False):
+        """論理削除"""
+        if self.is_deleted:
+            return 0, {}
+        deleted_at = timezone.now()
+        result = type(self).all_objects.using(using or self._state.db).filter(pk=self.pk).delete(deleted_at)
+        self.deleted_at = deleted_at
+        return result
+
+    def hard_delete(self, using=None, keep_parents=False):
+        """物理削除"""
+        return super().delete(using=using, keep_parents=keep_parents)
+
+
+class OutboxEvent(models.Model):
+    """トランザクショナルアウトボックス
+
+    書き込みと同じトランザクションで副作用（統計更新・アクティビティ記録等）を
+    イベントとして保存し、process_outbox コマンドがユーザーごとの順序で適用する。
+    """
+    event_type = models.CharField(max_length=50, verbose_name='イベント種別')
+    user_id = models.IntegerField(verbose_name='ユーザーID')
+    payload = models.JSONField(default=dict, verbose_name='ペイロード')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='作成日時')
+    processed_at = models.DateTimeField(null=True, blank=True, verbose_name='処理日時')
+    attempts = models.PositiveIntegerField(default=0, verbose_name='試行回数')
+    last_error = models.TextField(blank=True, verbose_name='最終エラー')
+
+    class Meta:
+        verbose_name = 'アウトボックスイベント'
+        verbose_name_plural = 'アウトボックスイベント'
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['processed_at', 'id']),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} (user_id={self.user_id})"
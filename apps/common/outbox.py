@@ -0,0 +1,68 @@
+# ========================================
+# apps/common/outbox.py - トランザクショナルアウトボックス
+# ========================================
+
+import logging
+from django.conf import settings
+from apps.common.buffers import CommitBuffer
+
+logger = logging.getLogger(__name__)
+
+# イベント種別 → ハンドラー（(user_id, payload) のリストを受け取る）
+_handlers = {}
+
+
+def handler(event_type):
+    """イベントハンドラーを登録するデコレータ
+
+    ハンドラーは同一種別のイベントをまとめて受け取り、集合単位で適用する。
+    ワーカーから再実行されても結果が変わらないよう、処理済みの記録と同じ
+    トランザクション内で呼び出される。
+    """
+    def decorator(func):
+        _handlers[event_type] = func
+        return func
+    return decorator
+
+
+def is_enabled():
+    return getattr(settings, 'OUTBOX_ENABLED', False)
+
+
+def publish(event_type, user_id, payload=None):
+    """副作用イベントを発行
+
+    OUTBOX_ENABLED（オプトイン）の場合は OutboxEvent として現在のトランザクションで保存し、
+    process_outbox ワーカーが適用する（ATOMIC_REQUESTS と併用すること）。
+    無効な場合（既定）はコミット後（リクエスト中はレスポンス生成後）にプロセス内で適用する。
+    """
+    payload = payload or {}
+    if is_enabled():
+        from apps.common.models import OutboxEvent
+        OutboxEvent.objects.create(event_type=event_type, user_id=user_id, payload=payload)
+    else:
+        _inline_buffer.add((event_type, user_id, payload))
+
+
+def dispatch(events):
+    """イベントを種別ごとにまとめて適用
+
+    Args:
+        events: (event_type, user_id, payload) のリスト（発行順）
+
+    同一種別のイベントは発行順のまま1回のハンドラー呼び出しで処理する
+    （リクエスト内で種別が交互に発行されても、例えばアクティビティは1回のINSERTになる）。
+    ハンドラーは種別ごとに別のデータを更新するため、種別間の順序には依存しない。
+    """
+    grouped = {}
+    for event_type, user_id, payload in events:
+        grouped.setdefault(event_type, []).append((user_id, payload))
+
+    for event_type, group in grouped.items():
+        func = _handlers.get(event_type)
+        if func is None:
+            raise LookupError(f'未登録のイベント種別です: {event_type}')
+        func(group)
+
+
+_inline_buffer = CommitBuffer(dispatch)
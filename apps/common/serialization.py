@@ -0,0 +1,54 @@
+# ========================================
+# apps/common/serialization.py - Ajax応答用の軽量シリアライズ補助
+# ========================================
+
+from functools import lru_cache
+from collections import defaultdict
+from django.http import HttpResponse
+from django.core.serializers.json import DjangoJSONEncoder
+from django.urls import reverse
+
+# reverse() に渡すプレースホルダー（URLパターンのUUIDコンバーターに一致する値）
+_PLACEHOLDER = '00000000-0000-0000-0000-000000000000'
+
+
+class UrlPattern:
+    """1回だけ reverse() したURLから主キーを差し替えてURLを組み立てる"""
+
+    def __init__(self, viewname, kwarg='pk', placeholder=_PLACEHOLDER):
+        url = reverse(viewname, kwargs={kwarg: placeholder})
+        self.prefix, self.suffix = url.split(placeholder, 1)
+
+    def __call__(self, pk):
+        return f'{self.prefix}{pk}{self.suffix}'
+
+
+@lru_cache(maxsize=None)
+def url_pattern(viewname, kwarg='pk', placeholder=_PLACEHOLDER):
+    """URLパターンを取得（ビュー名ごとにキャッシュ）"""
+    return UrlPattern(viewname, kwarg, placeholder)
+
+
+def tag_map(through, owner_field, owner_ids):
+    """中間テーブルを1回のクエリで読み、所有者ID → [{'id', 'name'}] の辞書を返す
+
+    並び順はタグの既定の並び（使用回数の多い順・名前順）に合わせる。
+    """
+    tags = defaultdict(list)
+    if not owner_ids:
+        return tags
+    rows = through.objects.filter(
+        **{f'{owner_field}_id__in': owner_ids, 'tag__deleted_at__isnull': True}
+    ).order_by('-tag__usage_count', 'tag__name').values_list(f'{owner_field}_id', 'tag_id', 'tag__name')
+    for owner_id, tag_id, name in rows:
+        tags[owner_id].append({'id': tag_id, 'name': name})
+    return tags
+
+
+def json_response(data, status=200):
+    """辞書をそのまま1回でJSONに変換して返す（日本語はエスケープしない）"""
+    return HttpResponse(
+        DjangoJSONEncoder(ensure_ascii=False, separators=(',', ':')).encode(data),
+        content_type='application/json',
+        status=status,
+    )
@@ -0,0 +1,9 @@
+# ========================================
+# apps/common/signals.py
+# ========================================
+
+from django.dispatch import Signal
+
+# 論理削除の直前に送信（queryset: これから論理削除される未削除行）
+# 受信側は queryset をサブクエリとして集合単位で派生カウンタを減算する
+pre_soft_delete = Signal()
@@ -0,0 +1,57 @@
+"""
+フラグメントキャッシュ用のテンプレートタグ
+apps/common/templatetags/fragment_cache.py
+"""
+
+import hashlib
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from apps.common import fragment_cache
+
+register = template.Library()
+
+
+class FragmentCacheNode(template.Node):
+    def __init__(self, nodelist, name, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        vary_on = ':'.join(str(var.resolve(context)) for var in self.vary_on)
+        key = f'fragment:{name}:{hashlib.md5(vary_on.encode()).hexdigest()}'
+
+        fragment = cache.get(key)
+        fragment_cache.record(name, fragment is not None)
+        if fragment is None:
+            fragment = self.nodelist.render(context)
+            cache.set(key, fragment, getattr(settings, 'FRAGMENT_CACHE_TIMEOUT', 3600))
+        return fragment
+
+
+@register.tag('fragment_cache')
+def do_fragment_cache(parser, token):
+    """
+    描画結果を指定した値ごとにキャッシュし、ヒット率を集計する
+
+    使用例:
+    {% fragment_cache "notebook_card" notebook.pk notebook.updated_at tag_version %}
+        ...
+    {% endfragment_cache %}
+
+    キーに含めた値のいずれかが変わると別のキャッシュとして描画し直す。
+    集計は fragment_cache_stats コマンドで確認できる。
+    """
+    bits = token.split_contents()
+    if len(bits) < 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' タグにはフラグメント名が必要です")
+
+    nodelist = parser.parse(('endfragment_cache',))
+    parser.delete_first_token()
+    return FragmentCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        [parser.compile_filter(bit) for bit in bits[2:]],
+    )
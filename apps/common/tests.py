@@ -1,3 +1,96 @@
-from django.test import TestCase
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from apps.accounts.models import UserProfile
+from apps.common import outbox
+from apps.common.buffers import CommitBuffer, deferred_flush
+from apps.common.models import OutboxEvent
+from apps.notes.models import Notebook
 
-# Create your tests here.
+
+class CommitBufferTests(TestCase):
+    """トランザクション単位のバッファ"""
+
+    def setUp(self):
+        self.flushed = []
+        self.buffer = CommitBuffer(self.flushed.append)
+
+    def test_items_are_flushed_once_on_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.buffer.add(1)
+            self.buffer.add(2)
+            self.assertEqual(self.flushed, [])
+        self.assertEqual(self.flushed, [[1, 2]])
+
+    def test_rolled_back_savepoint_items_are_discarded(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.buffer.add(1)
+            try:
+                with transaction.atomic():
+                    self.buffer.add(2)
+                    raise ValueError
+            except ValueError:
+                pass
+            with transaction.atomic():
+                self.buffer.add(3)
+            self.buffer.add(4)
+        self.assertEqual(sorted(item for items in self.flushed for item in items), [1, 3, 4])
+
+    def test_deferred_flush_combines_items(self):
+        with deferred_flush():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.buffer.add(1)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.buffer.add(2)
+            self.assertEqual(self.flushed, [])
+        self.assertEqual(self.flushed, [[1, 2]])
+
+
+@override_settings(OUTBOX_ENABLED=True)
+class OutboxTests(TestCase):
+    """OUTBOX_ENABLED 時のイベント保存と process_outbox による適用"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='outbox', password='password123')
+
+    def _process(self, *args):
+        call_command('process_outbox', *args, stdout=StringIO(), stderr=StringIO())
+
+    def test_events_are_applied_by_worker(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Notebook.objects.create(user=self.user, title='アウトボックス')
+
+        # 書き込みと同じトランザクションで保存され、ワーカーの実行まで適用されない
+        self.assertTrue(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(UserProfile.objects.get(user=self.user).total_notebooks, 0)
+
+        self._process()
+
+        self.assertFalse(OutboxEvent.objects.filter(processed_at__isnull=True).exists())
+        self.assertEqual(UserProfile.objects.get(user=self.user).total_notebooks, 1)
+
+        # 再実行しても二重に適用されない
+        self._process()
+        self.assertEqual(UserProfile.objects.get(user=self.user).total_notebooks, 1)
+
+    def test_failed_event_holds_back_later_events_of_same_user(self):
+        @outbox.handler('test.failure')
+        def fail(events):
+            raise ValueError('失敗')
+
+        try:
+            outbox.publish('test.failure', self.user.pk)
+            outbox.publish('profile.statistics', self.user.pk, {'notebooks': 1, 'entries': 0})
+            self._process('--max-attempts', '1')
+        finally:
+            outbox._handlers.pop('test.failure')
+
+        failed = OutboxEvent.objects.get(event_type='test.failure')
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn('失敗', failed.last_error)
+        # 順序を守るため同じユーザーの後続イベントは適用しない
+        self.assertIsNone(OutboxEvent.objects.get(event_type='profile.statistics').processed_at)
+        self.assertEqual(UserProfile.objects.get(user=self.user).total_notebooks, 0)
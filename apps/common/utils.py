@@ -379,7 +379,7 @@ def get_search_autocomplete_suggestions(query_string, user, limit=10):
         # タグから候補
         tag_names = Tag.objects.filter(
             name__icontains=query_string,
-            notebook__user=user
+            user=user
         ).distinct().values_list('name', flat=True)[:limit//3]
         
         for tag_name in tag_names:
@@ -392,7 +392,7 @@ def get_search_autocomplete_suggestions(query_string, user, limit=10):
         
         # 企業名から候補
         company_names = Entry.objects.filter(
-            notebook__user=user,
+            user=user,
             company_name__icontains=query_string
         ).values_list('company_name', flat=True).distinct()[:limit//3]
         
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DashboardConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.dashboard'
+    
+    def ready(self):
+        """アプリ起動時の初期化処理（シグナル・アウトボックスハンドラーの登録）"""
+        import apps.dashboard.signals
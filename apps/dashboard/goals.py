@@ -0,0 +1,170 @@
+# ========================================
+# apps/dashboard/goals.py - 目標達成率の一括計算
+# ========================================
+
+import re
+from collections import defaultdict
+from django.contrib.auth.models import User
+from apps.common.cache import invalidate_user_cache
+from apps.dashboard.models import DashboardStats
+from apps.dashboard.services import DashboardStatsService
+from apps.notes.models import Entry, PriceSnapshot
+
+# NumPy がない環境では純Pythonで同じ計算を行う
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# "3,200円" "¥15,000" "1200.5" などから数値部分を取り出す
+_PRICE_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+
+
+def parse_price(value):
+    """目標株価のテキストを数値に変換（解釈できない場合は None）"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if value > 0 else None
+    match = _PRICE_PATTERN.search(str(value).replace(',', '').replace('，', ''))
+    if not match:
+        return None
+    price = float(match.group())
+    return price if price > 0 else None
+
+
+class GoalAchievementEngine:
+    """投資目標（GOAL エントリー）の達成状況をまとめて計算
+
+    対象ユーザーの目標株価を一度に読み込み、PriceSnapshot の最新株価と
+    配列として突き合わせて、達成（現在値 >= 目標）・未達・進捗率
+    （現在値 / 目標、最大1）をユーザーごとに集計する。
+    達成率は株価が取得できた目標の進捗率の平均（%）とする。
+    """
+
+    @staticmethod
+    def load_goals(users):
+        """(user_id, stock_code, 目標株価) のリストを取得（解釈できない目標は除外）"""
+        rows = Entry.objects.filter(
+            user__in=users,
+            entry_type='GOAL',
+        ).exclude(stock_code='').values_list('user_id', 'stock_code', 'content__target_price')
+
+        goals = []
+        for user_id, stock_code, target in rows.iterator(chunk_size=2000):
+            target_price = parse_price(target)
+            if target_price is not None:
+                goals.append((user_id, stock_code, target_price))
+        return goals
+
+    @staticmethod
+    def compute(goals, prices):
+        """目標と株価から ユーザーごとの集計を計算
+
+        Args:
+            goals: (user_id, stock_code, 目標株価) のリスト
+            prices: {stock_code: 株価}
+
+        Returns:
+            dict: {user_id: {'goals', 'priced', 'hits', 'misses', 'rate'}}
+        """
+        if not goals:
+            return {}
+        if np is None:
+            return GoalAchievementEngine._compute_python(goals, prices)
+
+        user_ids = sorted({user_id for user_id, _, _ in goals})
+        user_index = {user_id: i for i, user_id in enumerate(user_ids)}
+
+        users = np.fromiter((user_index[g[0]] for g in goals), dtype=np.int64, count=len(goals))
+        targets = np.fromiter((g[2] for g in goals), dtype=np.float64, count=len(goals))
+        current = np.fromiter((prices.get(g[1], np.nan) for g in goals), dtype=np.float64, count=len(goals))
+
+        priced = ~np.isnan(current)
+        progress = np.where(priced, np.minimum(np.nan_to_num(current) / targets, 1.0), 0.0)
+        hits = priced & (current >= targets)
+
+        size = len(user_ids)
+        goal_counts = np.bincount(users, minlength=size)
+        priced_counts = np.bincount(users, weights=priced, minlength=size)
+        hit_counts = np.bincount(users, weights=hits, minlength=size)
+        progress_sums = np.bincount(users, weights=progress, minlength=size)
+
+        rates = np.divide(
+            progress_sums * 100.0, priced_counts,
+            out=np.zeros(size), where=priced_counts > 0,
+        )
+
+        return {
+            user_id: {
+                'goals': int(goal_counts[i]),
+                'priced': int(priced_counts[i]),
+                'hits': int(hit_counts[i]),
+                'misses': int(priced_counts[i] - hit_counts[i]),
+                'rate': round(float(rates[i]), 1),
+            }
+            for i, user_id in enumerate(user_ids)
+        }
+
+    @staticmethod
+    def _compute_python(goals, prices):
+        """NumPy がない場合の計算（結果は compute と同じ）"""
+        totals = defaultdict(lambda: {'goals': 0, 'priced': 0, 'hits': 0, 'progress': 0.0})
+        for user_id, stock_code, target_price in goals:
+            summary = totals[user_id]
+            summary['goals'] += 1
+            current = prices.get(stock_code)
+            if current is None:
+                continue
+            summary['priced'] += 1
+            summary['progress'] += min(current / target_price, 1.0)
+            if current >= target_price:
+                summary['hits'] += 1
+
+        return {
+            user_id: {
+                'goals': summary['goals'],
+                'priced': summary['priced'],
+                'hits': summary['hits'],
+                'misses': summary['priced'] - summary['hits'],
+                'rate': round(summary['progress'] * 100.0 / summary['priced'], 1) if summary['priced'] else 0.0,
+            }
+            for user_id, summary in totals.items()
+        }
+
+    @staticmethod
+    def run(users=None):
+        """目標達成率を計算して DashboardStats に保存
+
+        Returns:
+            dict: compute() の結果
+        """
+        if users is None:
+            users = User.objects.all()
+
+        goals = GoalAchievementEngine.load_goals(users)
+        stock_codes = {stock_code for _, stock_code, _ in goals}
+        prices = dict(
+            PriceSnapshot.objects.filter(stock_code__in=stock_codes).values_list('stock_code', 'price')
+        )
+        results = GoalAchievementEngine.compute(goals, prices)
+
+        # 統計行がまだないユーザーは先に作成しておく
+        missing = set(results) - set(
+            DashboardStats.objects.filter(user_id__in=results).values_list('user_id', flat=True)
+        )
+        if missing:
+            DashboardStatsService.rebuild(User.objects.filter(pk__in=missing))
+
+        # 目標のないユーザーは0%
+        changed = []
+        for stats in DashboardStats.objects.filter(user__in=users).only('id', 'user_id', 'goal_achievement_rate'):
+            rate = results.get(stats.user_id, {}).get('rate', 0.0)
+            if stats.goal_achievement_rate != rate:
+                stats.goal_achievement_rate = rate
+                changed.append(stats)
+        DashboardStats.objects.bulk_update(changed, ['goal_achievement_rate'], batch_size=500)
+        for stats in changed:
+            invalidate_user_cache(stats.user_id)
+
+        return results
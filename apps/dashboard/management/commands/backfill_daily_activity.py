@@ -0,0 +1,38 @@
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.utils import timezone
+from apps.dashboard.services import DailyActivityService
+
+
+class Command(BaseCommand):
+    help = '日次アクティビティ集計をエントリーから再作成（初回導入・整合性チェック用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='対象ユーザー名（指定しない場合は全ユーザー）'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            help='直近この日数分のみ再作成（指定しない場合は全期間）'
+        )
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        days = options.get('days')
+
+        if days is not None and days <= 0:
+            raise CommandError('--days は1以上を指定してください')
+
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+            if not users.exists():
+                raise CommandError(f'User "{username}" not found')
+
+        since = timezone.localdate() - timedelta(days=days - 1) if days else None
+        created = DailyActivityService.rebuild(users, since=since)
+        self.stdout.write(self.style.SUCCESS(f'日次アクティビティ集計を再作成しました（{created}件）'))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.dashboard.goals import GoalAchievementEngine
+
+
+class Command(BaseCommand):
+    help = '投資目標の達成率を株価スナップショットから一括計算してダッシュボード統計に保存'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='対象ユーザー名（指定しない場合は全ユーザー）'
+        )
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+            if not users.exists():
+                raise CommandError(f'User "{username}" not found')
+
+        results = GoalAchievementEngine.run(users)
+
+        goals = sum(summary['goals'] for summary in results.values())
+        hits = sum(summary['hits'] for summary in results.values())
+        unpriced = sum(summary['goals'] - summary['priced'] for summary in results.values())
+        self.stdout.write(f'目標: {goals}件（達成: {hits}件 / 株価なし: {unpriced}件）')
+        self.stdout.write(self.style.SUCCESS(f'目標達成率を計算しました（{len(results)}ユーザー）'))
@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.dashboard.models import RecentActivity
+from apps.dashboard.services import ActivityService
+
+
+class Command(BaseCommand):
+    help = '古いアクティビティを削除（ユーザーごとに最新N件と直近の日数分を保持）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=100,
+            help='ユーザーごとに保持する最新件数（デフォルト: 100）'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='この日数以内のアクティビティは常に保持（デフォルト: 90日）'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='1回のDELETEで削除する最大件数（デフォルト: 1000）'
+        )
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='対象ユーザー名（指定しない場合は全ユーザー）'
+        )
+
+    def handle(self, *args, **options):
+        keep = options['keep']
+        days = options['days']
+        chunk_size = options['chunk_size']
+        username = options.get('user')
+
+        if keep < 0 or days < 0 or chunk_size <= 0:
+            raise CommandError('--keep/--days は0以上、--chunk-size は1以上を指定してください')
+
+        if username:
+            user_ids = list(User.objects.filter(username=username).values_list('id', flat=True))
+            if not user_ids:
+                raise CommandError(f'User "{username}" not found')
+        else:
+            user_ids = list(RecentActivity.objects.order_by().values_list('user_id', flat=True).distinct())
+
+        total_deleted = 0
+        for user_id in user_ids:
+            deleted = ActivityService.prune(user_id, keep=keep, days=days, chunk_size=chunk_size)
+            if deleted:
+                self.stdout.write(f'ユーザーID {user_id}: {deleted}件削除')
+            total_deleted += deleted
+
+        self.stdout.write(self.style.SUCCESS(f'アクティビティの整理が完了しました（合計 {total_deleted}件削除）'))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.dashboard.services import DashboardStatsService
+
+
+class Command(BaseCommand):
+    help = 'ダッシュボード統計を全件集計で再構築（整合性チェック・月替わりの補正用）'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='対象ユーザー名（指定しない場合は全ユーザー）'
+        )
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+            if not users.exists():
+                raise CommandError(f'User "{username}" not found')
+
+        updated = DashboardStatsService.rebuild(users)
+        self.stdout.write(self.style.SUCCESS(f'ダッシュボード統計を再構築しました（{updated}件更新）'))
@@ -14,6 +14,7 @@ class DashboardStats(BaseModel):
     monthly_entries = models.PositiveIntegerField(default=0, verbose_name='今月のエントリー数')
     total_entries = models.PositiveIntegerField(default=0, verbose_name='総エントリー数')
     goal_achievement_rate = models.FloatField(default=0.0, verbose_name='目標達成率')
+    month = models.DateField(null=True, blank=True, verbose_name='集計月')  # monthly_entries の対象月（月初日）
     
     class Meta:
         verbose_name = 'ダッシュボード統計'
@@ -21,6 +22,10 @@ class DashboardStats(BaseModel):
     
     def __str__(self):
         return f"{self.user.username}の統計"
+    
+    def get_monthly_entries(self, month):
+        """指定月の今月エントリー数（集計月が古い場合は月替わり後なので0）"""
+        return self.monthly_entries if self.month == month else 0
 
 
 class RecentActivity(BaseModel):
@@ -47,6 +52,37 @@ class RecentActivity(BaseModel):
         verbose_name = '最近のアクティビティ'
         verbose_name_plural = '最近のアクティビティ'
         ordering = ['-created_at']
+        indexes = [
+            # ダッシュボードの「最新N件」取得用
+            models.Index(fields=['user', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.user.username} - {self.title}"
+
+class DailyActivity(models.Model):
+    """日次アクティビティ集計（ユーザー・日付・エントリータイプごとのエントリー作成数）
+
+    エントリーの作成・削除時に差分更新され、ヒートマップ等の時系列表示で
+    (user, date) の範囲スキャン1回で読み出す。
+    """
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='ユーザー')
+    date = models.DateField(verbose_name='日付')
+    entry_type = models.CharField(max_length=20, verbose_name='エントリータイプ')
+    count = models.PositiveIntegerField(default=0, verbose_name='エントリー数')
+    
+    class Meta:
+        verbose_name = '日次アクティビティ'
+        verbose_name_plural = '日次アクティビティ'
+        ordering = ['date', 'entry_type']
+        constraints = [
+            # (user, date) の範囲スキャンにも使用される
+            models.UniqueConstraint(
+                fields=['user', 'date', 'entry_type'],
+                name='unique_daily_activity',
+            ),
+        ]
     
     def __str__(self):
-        return f"{self.user.username} - {self.title}"
\ No newline at end of file
+        return f"{self.user.username} {self.date} {self.entry_type}: {self.count}"
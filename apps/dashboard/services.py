@@ -2,12 +2,20 @@
 # apps/dashboard/services.py
 # ========================================
 
-from django.db.models import Count, Q
+from collections import defaultdict
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, F, PositiveIntegerField, Q, Value, When
+from django.db.models.functions import Greatest, TruncDate
 from django.utils import timezone
-from datetime import datetime, timedelta
+from datetime import date, datetime, time, timedelta
 from apps.notes.models import Notebook, Entry
 from apps.tags.models import Tag
-from apps.dashboard.models import RecentActivity
+from apps.dashboard.models import DailyActivity, DashboardStats, RecentActivity
+from apps.common import outbox
+from apps.common.cache import invalidate_user_cache, user_cache_key
 
 class DashboardService:
     """ダッシュボード関連のビジネスロジック"""
@@ -16,48 +24,326 @@ class DashboardService:
         self.user = user
     
     def get_dashboard_context(self):
-        """ダッシュボード用のコンテキストを取得"""
-        current_month = timezone.now().replace(day=1)
-        last_30_days = timezone.now() - timedelta(days=30)
-        
-        # 統計情報
-        active_notebooks = Notebook.objects.filter(
-            user=self.user,
-            status='ACTIVE'
-        ).count()
-        
-        monthly_entries = Entry.objects.filter(
-            notebook__user=self.user,
-            created_at__gte=current_month
-        ).count()
-        
-        total_entries = Entry.objects.filter(
-            notebook__user=self.user
-        ).count()
+        """ダッシュボード用のコンテキストを取得（ユーザー単位でキャッシュ）
+
+        キャッシュキーにはユーザーのバージョンを含み、書き込み時に
+        バージョンが更新されることで無効化される。
+        """
+        key = user_cache_key(self.user.pk, 'dashboard_context', get_current_month())
+        context = cache.get(key)
+        if context is None:
+            context = self._build_dashboard_context()
+            cache.set(key, context, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 300))
+        return context
+    
+    def _build_dashboard_context(self):
+        """ダッシュボード用のコンテキストを構築（キャッシュ可能なように評価済みのリストで返す）"""
+        # 統計情報（書き込み時に差分更新されるロールアップを1行読むだけ）
+        stats = DashboardStatsService.get(self.user)
         
         # 最近のアクティビティ
-        recent_activities = RecentActivity.objects.filter(
+        recent_activities = list(RecentActivity.objects.filter(
             user=self.user
-        )[:5]
+        )[:5])
         
         # 最新のノート
-        recent_notebooks = Notebook.objects.filter(
+        recent_notebooks = list(Notebook.objects.filter(
             user=self.user
-        ).order_by('-updated_at')[:5]
+        ).order_by('-updated_at')[:5])
         
-        # トレンドタグ
-        trending_tags = Tag.objects.filter(
-            is_active=True
-        ).order_by('-usage_count')[:10]
+        # トレンドタグ（ユーザー自身のタグのみ・トレンドスコア順）
+        trending_tags = Tag.objects.get_trending_tags(self.user, limit=10)
         
         return {
             'stats': {
-                'active_notebooks': active_notebooks,
-                'monthly_entries': monthly_entries,
-                'total_entries': total_entries,
-                'goal_achievement_rate': 78.0,  # 仮の値
+                'active_notebooks': stats.active_notebooks,
+                'monthly_entries': stats.get_monthly_entries(get_current_month()),
+                'total_entries': stats.total_entries,
+                'goal_achievement_rate': stats.goal_achievement_rate,
             },
             'recent_activities': recent_activities,
             'recent_notebooks': recent_notebooks,
             'trending_tags': trending_tags,
-        }
\ No newline at end of file
+        }
+
+
+def get_current_month():
+    """今月の月初日（ローカルタイムゾーン）"""
+    return timezone.localdate().replace(day=1)
+
+
+def get_entry_month(created_at):
+    """エントリー作成日時の属する月の月初日"""
+    return timezone.localdate(created_at).replace(day=1)
+
+
+class DashboardStatsService:
+    """ダッシュボード統計（DashboardStats）の差分更新"""
+
+    @staticmethod
+    def get(user):
+        """ユーザーの統計行を取得（未作成の場合は全件集計して作成）"""
+        stats = DashboardStats.objects.filter(user=user).first()
+        if stats is None:
+            DashboardStatsService.rebuild(User.objects.filter(pk=user.pk))
+            stats = DashboardStats.objects.get(user=user)
+        return stats
+
+    @staticmethod
+    def record(user_id, active_notebooks=0, entries=0, month=None):
+        """統計の増減を記録（month はエントリーの作成月・今月のエントリー数に反映）"""
+        if active_notebooks or entries:
+            outbox.publish('dashboard.stats', user_id, {
+                'active_notebooks': active_notebooks,
+                'entries': entries,
+                'month': month.isoformat() if month else None,
+            })
+
+    @staticmethod
+    def apply(deltas):
+        """記録された増減をユーザー・月ごとに1回のUPDATEで反映
+
+        今月のエントリー数は集計月より新しい月の増減が来た時点で
+        その月の値にリセットする（月替わりのロールオーバー）。
+        """
+        totals = defaultdict(lambda: [0, 0])
+        for user_id, active_notebooks, entries, month in deltas:
+            totals[(user_id, month)][0] += active_notebooks
+            totals[(user_id, month)][1] += entries
+
+        rebuilt = set()
+        for (user_id, month), (active_notebooks, entries) in totals.items():
+            if (not active_notebooks and not entries) or user_id in rebuilt:
+                continue
+
+            updates = {
+                'active_notebooks': Greatest(F('active_notebooks') + active_notebooks, Value(0)),
+                'total_entries': Greatest(F('total_entries') + entries, Value(0)),
+            }
+            if month and entries:
+                newer = Q(month__isnull=True) | Q(month__lt=month)
+                updates['monthly_entries'] = Case(
+                    When(month=month, then=Greatest(F('monthly_entries') + entries, Value(0))),
+                    When(newer, then=Value(max(entries, 0))),
+                    default=F('monthly_entries'),
+                    output_field=PositiveIntegerField(),
+                )
+                updates['month'] = Case(When(newer, then=Value(month)), default=F('month'))
+
+            updated = DashboardStats.objects.filter(user_id=user_id).update(**updates)
+            invalidate_user_cache(user_id)
+
+            # 統計行が未作成の場合は全件集計で作成（このユーザーの他の月の増減も含まれるため以降は適用しない）
+            if not updated and User.objects.filter(pk=user_id).exists():
+                DashboardStatsService.rebuild(User.objects.filter(pk=user_id))
+                rebuilt.add(user_id)
+
+    @staticmethod
+    def rebuild(users=None):
+        """全件集計で統計を再計算（初回作成・整合性チェック用）
+
+        Returns:
+            int: 作成または更新した統計行の数
+        """
+        if users is None:
+            users = User.objects.all()
+
+        month = get_current_month()
+        month_start = timezone.make_aware(datetime.combine(month, time.min))
+
+        active_counts = dict(
+            Notebook.objects.filter(user__in=users, status='ACTIVE')
+            .values('user').annotate(count=Count('id')).values_list('user', 'count')
+        )
+        entries = Entry.objects.filter(user__in=users).values('user')
+        total_counts = dict(entries.annotate(count=Count('id')).values_list('user', 'count'))
+        monthly_counts = dict(
+            entries.filter(created_at__gte=month_start)
+            .annotate(count=Count('id')).values_list('user', 'count')
+        )
+
+        existing = {stats.user_id: stats for stats in DashboardStats.objects.filter(user__in=users)}
+        created, changed = [], []
+        for user_id in users.values_list('id', flat=True):
+            values = {
+                'active_notebooks': active_counts.get(user_id, 0),
+                'total_entries': total_counts.get(user_id, 0),
+                'monthly_entries': monthly_counts.get(user_id, 0),
+                'month': month,
+            }
+            stats = existing.get(user_id)
+            if stats is None:
+                created.append(DashboardStats(user_id=user_id, **values))
+            elif any(getattr(stats, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(stats, field, value)
+                changed.append(stats)
+
+        DashboardStats.objects.bulk_create(created, batch_size=500, ignore_conflicts=True)
+        DashboardStats.objects.bulk_update(
+            changed, ['active_notebooks', 'total_entries', 'monthly_entries', 'month'], batch_size=500
+        )
+        for stats in changed:
+            invalidate_user_cache(stats.user_id)
+        return len(created) + len(changed)
+
+
+class DailyActivityService:
+    """日次アクティビティ集計（DailyActivity）の差分更新"""
+
+    @staticmethod
+    def record(user_id, day, entry_type, delta):
+        """エントリー数の増減を記録（day: エントリー作成日）"""
+        if delta:
+            outbox.publish('dashboard.daily_activity', user_id, {
+                'date': day.isoformat(),
+                'entry_type': entry_type,
+                'delta': delta,
+            })
+
+    @staticmethod
+    def apply(deltas):
+        """(user_id, date, entry_type, delta) の増減をキーごとに1回のUPDATEで反映"""
+        totals = defaultdict(int)
+        for user_id, day, entry_type, delta in deltas:
+            totals[(user_id, day, entry_type)] += delta
+
+        # 加算対象で未作成の行をまとめて作成
+        DailyActivity.objects.bulk_create(
+            [
+                DailyActivity(user_id=user_id, date=day, entry_type=entry_type)
+                for (user_id, day, entry_type), delta in totals.items() if delta > 0
+            ],
+            ignore_conflicts=True,
+        )
+        for (user_id, day, entry_type), delta in totals.items():
+            if delta:
+                DailyActivity.objects.filter(user_id=user_id, date=day, entry_type=entry_type).update(
+                    count=Greatest(F('count') + delta, Value(0))
+                )
+
+    @staticmethod
+    def rebuild(users=None, since=None):
+        """エントリーから日次集計を再作成（バックフィル用）
+
+        Returns:
+            int: 作成した集計行の数
+        """
+        if users is None:
+            users = User.objects.all()
+
+        entries = Entry.objects.filter(user__in=users)
+        rows = DailyActivity.objects.filter(user__in=users)
+        if since:
+            entries = entries.filter(created_at__gte=timezone.make_aware(datetime.combine(since, time.min)))
+            rows = rows.filter(date__gte=since)
+
+        counts = entries.annotate(day=TruncDate('created_at')).order_by().values(
+            'user', 'day', 'entry_type'
+        ).annotate(count=Count('id')).values_list('user', 'day', 'entry_type', 'count')
+
+        with transaction.atomic():
+            rows.delete()
+            created = DailyActivity.objects.bulk_create(
+                [
+                    DailyActivity(user_id=user_id, date=day, entry_type=entry_type, count=count)
+                    for user_id, day, entry_type, count in counts.iterator()
+                ],
+                batch_size=1000,
+            )
+        return len(created)
+
+    @staticmethod
+    def get_series(user, start, end, entry_type=None):
+        """期間内の日次エントリー数を取得（(user, date) の範囲スキャン1回）
+
+        Returns:
+            dict: {date: {entry_type: count}}（エントリーのない日は含まない）
+        """
+        series = defaultdict(dict)
+        rows = DailyActivity.objects.filter(
+            user=user, date__gte=start, date__lte=end, count__gt=0
+        )
+        if entry_type:
+            rows = rows.filter(entry_type=entry_type)
+        rows = rows.values_list('date', 'entry_type', 'count')
+        for day, entry_type, count in rows:
+            series[day][entry_type] = count
+        return series
+
+
+class ActivityService:
+    """アクティビティ記録（リクエスト単位でまとめて書き込み）"""
+
+    @staticmethod
+    def record(user_id, activity_type, title, description='', related_object_id=None):
+        """アクティビティを記録（アウトボックス経由でまとめてbulk_create）"""
+        outbox.publish('activity.recorded', user_id, {
+            'activity_type': activity_type,
+            'title': title[:200],
+            'description': description,
+            'related_object_id': str(related_object_id) if related_object_id else None,
+        })
+
+    @staticmethod
+    def flush(activities):
+        """バッファされたアクティビティを1回のINSERTで保存"""
+        RecentActivity.objects.bulk_create(activities)
+        for user_id in {activity.user_id for activity in activities}:
+            invalidate_user_cache(user_id)
+
+    @staticmethod
+    def prune(user_id, keep=100, days=90, chunk_size=1000):
+        """古いアクティビティを削除（最新keep件と直近days日分は保持）
+
+        Returns:
+            int: 削除件数
+        """
+        cutoff = timezone.now() - timedelta(days=days)
+
+        # 最新keep件は日数に関係なく保持
+        keep_ids = list(
+            RecentActivity.objects.filter(user_id=user_id)
+            .order_by('-created_at', '-id')
+            .values_list('id', flat=True)[:keep]
+        )
+
+        stale = RecentActivity.objects.filter(
+            user_id=user_id,
+            created_at__lt=cutoff,
+        ).exclude(id__in=keep_ids)
+
+        deleted = 0
+        while True:
+            ids = list(stale.order_by('created_at', 'id').values_list('id', flat=True)[:chunk_size])
+            if not ids:
+                break
+            count, _ = RecentActivity.objects.filter(id__in=ids).delete()
+            deleted += count
+        return deleted
+
+
+@outbox.handler('activity.recorded')
+def apply_recorded_activities(events):
+    ActivityService.flush([RecentActivity(user_id=user_id, **payload) for user_id, payload in events])
+
+
+@outbox.handler('dashboard.stats')
+def apply_dashboard_stats(events):
+    DashboardStatsService.apply(
+        (
+            user_id,
+            payload.get('active_notebooks', 0),
+            payload.get('entries', 0),
+            date.fromisoformat(payload['month']) if payload.get('month') else None,
+        )
+        for user_id, payload in events
+    )
+
+
+@outbox.handler('dashboard.daily_activity')
+def apply_daily_activity(events):
+    DailyActivityService.apply(
+        (user_id, date.fromisoformat(payload['date']), payload['entry_type'], payload['delta'])
+        for user_id, payload in events
+    )
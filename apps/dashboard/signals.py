@@ -0,0 +1,108 @@
+# ========================================
+# apps/dashboard/signals.py - ダッシュボード統計の差分更新
+# ========================================
+
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate, TruncMonth
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from apps.common.cache import invalidate_user_cache
+from apps.common.signals import pre_soft_delete
+from apps.dashboard.services import DailyActivityService, DashboardStatsService, get_entry_month
+from apps.notes.models import Notebook, Entry
+from apps.tags.models import Tag
+
+
+def _is_active(status):
+    return 1 if status == 'ACTIVE' else 0
+
+
+@receiver(post_save, sender=Notebook)
+def update_dashboard_stats_on_notebook_save(sender, instance, created, **kwargs):
+    """ノートブック作成・ステータス変更時にアクティブノート数を増減"""
+    # 最新のノート一覧が変わるためダッシュボードのキャッシュを無効化
+    invalidate_user_cache(instance.user_id)
+
+    if created:
+        delta = _is_active(instance.status)
+    elif 'status' in getattr(instance, 'changed_fields', ()):
+        delta = _is_active(instance.status) - _is_active(instance.get_loaded_value('status'))
+    else:
+        return
+    DashboardStatsService.record(instance.user_id, active_notebooks=delta)
+
+
+@receiver(post_save, sender=Entry)
+def update_dashboard_stats_on_entry_save(sender, instance, created, **kwargs):
+    """エントリー作成時に総数・今月のエントリー数・日次集計を加算"""
+    day = timezone.localdate(instance.created_at)
+    if created:
+        user_id = instance.user_id
+        DashboardStatsService.record(user_id, entries=1, month=get_entry_month(instance.created_at))
+        DailyActivityService.record(user_id, day, instance.entry_type, 1)
+    elif 'entry_type' in getattr(instance, 'changed_fields', ()):
+        # タイプ変更時は日次集計を付け替え
+        user_id = instance.user_id
+        DailyActivityService.record(user_id, day, instance.get_loaded_value('entry_type'), -1)
+        DailyActivityService.record(user_id, day, instance.entry_type, 1)
+
+
+@receiver(post_delete, sender=Notebook)
+def update_dashboard_stats_on_notebook_delete(sender, instance, **kwargs):
+    """ノートブック物理削除時（論理削除済みの場合は反映済み）"""
+    if not instance.is_deleted:
+        DashboardStatsService.record(instance.user_id, active_notebooks=-_is_active(instance.status))
+
+
+@receiver(post_delete, sender=Entry)
+def update_dashboard_stats_on_entry_delete(sender, instance, **kwargs):
+    """エントリー物理削除時（論理削除済みの場合は反映済み）"""
+    if instance.is_deleted:
+        return
+    try:
+        user_id = instance.user_id
+    except Notebook.DoesNotExist:
+        return
+    DashboardStatsService.record(user_id, entries=-1, month=get_entry_month(instance.created_at))
+    DailyActivityService.record(user_id, timezone.localdate(instance.created_at), instance.entry_type, -1)
+
+
+@receiver(pre_soft_delete, sender=Notebook)
+def update_dashboard_stats_on_notebook_soft_delete(sender, queryset, **kwargs):
+    """ノートブック論理削除時（ユーザーごとに集計して減算）"""
+    counts = queryset.values('user').annotate(
+        count=Count('pk'), active=Count('pk', filter=Q(status='ACTIVE'))
+    )
+    for user_id, count, active in counts.values_list('user', 'count', 'active'):
+        invalidate_user_cache(user_id)
+        DashboardStatsService.record(user_id, active_notebooks=-active)
+
+
+@receiver(pre_soft_delete, sender=Entry)
+def update_dashboard_stats_on_entry_soft_delete(sender, queryset, **kwargs):
+    """エントリー論理削除時（ユーザー・作成月/作成日ごとに集計して減算）"""
+    counts = queryset.annotate(month=TruncMonth('created_at')).values('user', 'month').annotate(
+        count=Count('pk')
+    )
+    for user_id, month, count in counts.values_list('user', 'month', 'count'):
+        DashboardStatsService.record(user_id, entries=-count, month=timezone.localdate(month))
+
+    daily = queryset.annotate(day=TruncDate('created_at')).values('user', 'day', 'entry_type').annotate(
+        count=Count('pk')
+    )
+    for user_id, day, entry_type, count in daily.values_list('user', 'day', 'entry_type', 'count'):
+        DailyActivityService.record(user_id, day, entry_type, -count)
+
+
+@receiver(post_save, sender=Tag)
+def invalidate_dashboard_on_tag_save(sender, instance, **kwargs):
+    """タグ変更時（トレンドタグの表示が変わるため）"""
+    invalidate_user_cache(instance.user_id)
+
+
+@receiver(pre_soft_delete, sender=Tag)
+def invalidate_dashboard_on_tag_soft_delete(sender, queryset, **kwargs):
+    """タグ論理削除時"""
+    for user_id in queryset.values_list('user', flat=True).distinct():
+        invalidate_user_cache(user_id)
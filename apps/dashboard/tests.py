@@ -1,3 +1,220 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from apps.common.middleware import CommitBufferMiddleware
+from apps.dashboard.models import DailyActivity, DashboardStats, RecentActivity
+from apps.dashboard.services import get_current_month
+from apps.notes.models import Notebook, Entry
 
-# Create your tests here.
+
+class RecentActivityTests(TestCase):
+    """アクティビティのリクエスト単位の書き込みと整理"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='activity', password='password123')
+            self.other = User.objects.create_user(username='other', password='password123')
+
+    def test_activities_are_inserted_once_per_request(self):
+        def view(request):
+            # リクエスト内の複数のトランザクションで記録されたアクティビティ
+            with self.captureOnCommitCallbacks(execute=True):
+                notebook = Notebook.objects.create(user=self.user, title='アクティビティ')
+            for i in range(3):
+                with self.captureOnCommitCallbacks(execute=True):
+                    Entry.objects.create(
+                        notebook=notebook, entry_type='MEMO', title=f'メモ{i}', content={'observation': '観察'}
+                    )
+            self.assertFalse(RecentActivity.objects.exists())
+            return HttpResponse()
+
+        with CaptureQueriesContext(connection) as queries:
+            CommitBufferMiddleware(view)(RequestFactory().get('/'))
+
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT INTO "dashboard_recentactivity"')]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(
+            sorted(RecentActivity.objects.filter(user=self.user).values_list('activity_type', flat=True)),
+            ['ENTRY_ADDED'] * 3 + ['NOTEBOOK_CREATED'],
+        )
+
+    def _create_activities(self, user, count, days_ago):
+        activities = RecentActivity.objects.bulk_create(
+            RecentActivity(user=user, activity_type='ENTRY_ADDED', title=f'{days_ago}日前') for _ in range(count)
+        )
+        RecentActivity.objects.filter(pk__in=[a.pk for a in activities]).update(
+            created_at=timezone.now() - timedelta(days=days_ago)
+        )
+
+    def test_prune_removes_only_rows_past_retention(self):
+        self._create_activities(self.user, 5, days_ago=120)
+        self._create_activities(self.user, 3, days_ago=10)
+        self._create_activities(self.other, 5, days_ago=120)
+
+        call_command('prune_activities', '--user', 'activity', '--keep', '2', '--chunk-size', '2', stdout=StringIO())
+
+        # 直近90日分は最新件数に関係なく保持し、他のユーザーには影響しない
+        self.assertEqual(RecentActivity.objects.filter(user=self.user).count(), 3)
+        self.assertFalse(RecentActivity.objects.filter(user=self.user, title='120日前').exists())
+        self.assertEqual(RecentActivity.objects.filter(user=self.other).count(), 5)
+
+    def test_prune_keeps_latest_rows(self):
+        self._create_activities(self.user, 5, days_ago=120)
+        self._create_activities(self.user, 3, days_ago=10)
+
+        call_command('prune_activities', '--keep', '4', stdout=StringIO())
+
+        # 最新4件（直近3件＋期間外の1件）は保持
+        self.assertEqual(RecentActivity.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(RecentActivity.objects.filter(user=self.user, title='120日前').count(), 1)
+
+
+class DashboardStatsTests(TestCase):
+    """ダッシュボード統計の差分更新と全件集計による再構築"""
+
+    FIELDS = ('active_notebooks', 'total_entries', 'monthly_entries', 'month')
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='stats', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='アクティブ')
+            Notebook.objects.create(user=self.user, title='監視中', status='MONITORING')
+            for i in range(3):
+                Entry.objects.create(
+                    notebook=self.notebook, entry_type='MEMO', title=f'メモ{i}', content={'observation': '観察'}
+                )
+
+    def _apply(self, func, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            func(*args)
+
+    def _stats(self):
+        return DashboardStats.objects.filter(user=self.user).values(*self.FIELDS).get()
+
+    def _assert_matches_rebuild(self):
+        incremental = self._stats()
+        out = StringIO()
+        call_command('rebuild_dashboard_stats', '--user', 'stats', stdout=out)
+        self.assertIn('0件更新', out.getvalue())
+        self.assertEqual(self._stats(), incremental)
+
+    def test_incremental_updates_match_rebuild(self):
+        self.assertEqual(self._stats(), {
+            'active_notebooks': 1, 'total_entries': 3, 'monthly_entries': 3, 'month': get_current_month(),
+        })
+
+        # ステータス変更・エントリーの論理削除・ノートブックの論理削除
+        notebook = Notebook.objects.get(title='監視中')
+        notebook.status = 'ACTIVE'
+        self._apply(notebook.save)
+        self._apply(Entry.objects.filter(notebook=self.notebook).first().delete)
+        self.assertEqual(self._stats()['active_notebooks'], 2)
+        self._assert_matches_rebuild()
+
+        self._apply(self.notebook.delete)
+        self.assertEqual(self._stats()['total_entries'], 0)
+        self._assert_matches_rebuild()
+
+    def test_month_rollover_resets_monthly_entries(self):
+        # 集計月が先月のまま残っている状態
+        last_month = (get_current_month() - timedelta(days=1)).replace(day=1)
+        DashboardStats.objects.filter(user=self.user).update(month=last_month, monthly_entries=3)
+        stats = DashboardStats.objects.get(user=self.user)
+        self.assertEqual(stats.get_monthly_entries(get_current_month()), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Entry.objects.create(
+                notebook=self.notebook, entry_type='MEMO', title='今月', content={'observation': '観察'}
+            )
+
+        stats = self._stats()
+        self.assertEqual((stats['monthly_entries'], stats['month']), (1, get_current_month()))
+        self.assertEqual(stats['total_entries'], 4)
+
+    def test_rebuild_repairs_drift(self):
+        DashboardStats.objects.filter(user=self.user).update(active_notebooks=9, total_entries=0)
+
+        out = StringIO()
+        call_command('rebuild_dashboard_stats', stdout=out)
+
+        self.assertIn('1件更新', out.getvalue())
+        stats = self._stats()
+        self.assertEqual((stats['active_notebooks'], stats['total_entries']), (1, 3))
+
+
+class DailyActivityTests(TestCase):
+    """日次アクティビティ集計とヒートマップAjax"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='heatmap', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='ヒートマップ')
+            for entry_type, content in (
+                ('MEMO', {'observation': '観察'}),
+                ('MEMO', {'observation': '観察'}),
+                ('GOAL', {'target_price': 3000}),
+            ):
+                Entry.objects.create(notebook=self.notebook, entry_type=entry_type, title=entry_type, content=content)
+        self.client.force_login(self.user)
+        self.url = reverse('dashboard:activity_heatmap')
+
+    def _raw_counts(self):
+        rows = Entry.objects.filter(user=self.user).annotate(day=TruncDate('created_at')).order_by().values(
+            'day', 'entry_type'
+        ).annotate(count=Count('id')).values_list('day', 'entry_type', 'count')
+        return {(day, entry_type): count for day, entry_type, count in rows}
+
+    def _rollup(self):
+        rows = DailyActivity.objects.filter(user=self.user, count__gt=0).values_list('date', 'entry_type', 'count')
+        return {(day, entry_type): count for day, entry_type, count in rows}
+
+    def test_rollup_matches_raw_counts(self):
+        entry = Entry.objects.get(notebook=self.notebook, entry_type='GOAL')
+        entry.entry_type = 'MEMO'
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            Entry.objects.filter(notebook=self.notebook).first().delete()
+
+        self.assertEqual(self._rollup(), self._raw_counts())
+        self.assertEqual(sum(self._rollup().values()), 2)
+
+    def test_heatmap_json_shape(self):
+        today = timezone.localdate()
+        data = self.client.get(self.url, {'days': 7}).json()
+
+        self.assertTrue(data['success'])
+        self.assertEqual(len(data['days']), 7)
+        self.assertEqual((data['start'], data['end']), ((today - timedelta(days=6)).isoformat(), today.isoformat()))
+        self.assertEqual(data['days'][-1], {'date': today.isoformat(), 'count': 3, 'by_type': {'MEMO': 2, 'GOAL': 1}})
+        self.assertEqual(data['days'][0]['count'], 0)
+        self.assertEqual(data['totals'], {'MEMO': 2, 'GOAL': 1})
+        self.assertEqual(data['max_count'], 3)
+
+        data = self.client.get(self.url, {'days': 7, 'entry_type': 'GOAL'}).json()
+        self.assertEqual(data['days'][-1]['by_type'], {'GOAL': 1})
+
+    def test_invalid_days_is_rejected(self):
+        response = self.client.get(self.url, {'days': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+    def test_backfill_rebuilds_rollup_from_entries(self):
+        # 集計導入前に作成されたエントリー（集計行なし）
+        Entry.all_objects.filter(entry_type='GOAL').update(created_at=timezone.now() - timedelta(days=3))
+        DailyActivity.objects.all().delete()
+
+        call_command('backfill_daily_activity', '--user', 'heatmap', stdout=StringIO())
+
+        self.assertEqual(self._rollup(), self._raw_counts())
+        data = self.client.get(self.url, {'days': 7}).json()
+        self.assertEqual([day['count'] for day in data['days']][-4:], [1, 0, 0, 2])
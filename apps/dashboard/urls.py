@@ -9,4 +9,5 @@ app_name = 'dashboard'
 
 urlpatterns = [
     path('', views.dashboard_view, name='index'),
+    path('activity/heatmap/', views.activity_heatmap_ajax, name='activity_heatmap'),
 ]
@@ -4,13 +4,14 @@
 
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
 from django.db.models import Count, Q
 from django.utils import timezone
 from datetime import datetime, timedelta
 from apps.notes.models import Notebook, Entry
 from apps.tags.models import Tag
 from apps.dashboard.models import DashboardStats, RecentActivity
-from apps.dashboard.services import DashboardService
+from apps.dashboard.services import DailyActivityService, DashboardService
 
 @login_required
 def dashboard_view(request):
@@ -28,4 +29,46 @@ def dashboard_view(request):
             'error': 'ダッシュボードの読み込みに失敗しました。',
             'debug_error': str(e) if request.user.is_staff else None
         }
-        return render(request, 'dashboard/index.html', context)
\ No newline at end of file
+        return render(request, 'dashboard/index.html', context)
+
+
+@login_required
+def activity_heatmap_ajax(request):
+    """日次のエントリー作成数をJSONで取得（ヒートマップ・スパークライン用）"""
+    try:
+        days = int(request.GET.get('days', 365))
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': '日数の指定が不正です'
+        }, status=400)
+    days = min(max(days, 1), 366)
+    entry_type = request.GET.get('entry_type', '')
+    
+    end = timezone.localdate()
+    start = end - timedelta(days=days - 1)
+    series = DailyActivityService.get_series(request.user, start, end, entry_type=entry_type)
+    
+    # エントリーのない日も0で埋めた連続データ
+    data = []
+    totals = {}
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        counts = series.get(day, {})
+        for type_code, count in counts.items():
+            totals[type_code] = totals.get(type_code, 0) + count
+        data.append({
+            'date': day.isoformat(),
+            'count': sum(counts.values()),
+            'by_type': counts,
+        })
+    
+    return JsonResponse({
+        'success': True,
+        'start': start.isoformat(),
+        'end': end.isoformat(),
+        'entry_type': entry_type,
+        'days': data,
+        'totals': totals,
+        'max_count': max((day['count'] for day in data), default=0),
+    })
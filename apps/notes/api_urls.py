@@ -0,0 +1,14 @@
+# ========================================
+# apps/notes/api_urls.py - ノートブック・エントリーAPIのURL設定
+# ========================================
+
+from rest_framework.routers import SimpleRouter
+from apps.notes import api_views
+
+app_name = 'notes_api'
+
+router = SimpleRouter()
+router.register('notebooks', api_views.NotebookViewSet, basename='notebook')
+router.register('entries', api_views.EntryViewSet, basename='entry')
+
+urlpatterns = router.urls
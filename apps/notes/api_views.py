@@ -0,0 +1,63 @@
+# ========================================
+# apps/notes/api_views.py - ノートブック・エントリーの読み取りAPI
+# ========================================
+
+from django.db.models import Prefetch
+from rest_framework import permissions, viewsets
+from apps.common.api import ApiCursorPagination, SparseFieldsetMixin
+from apps.notes.models import Notebook, SubNotebook, Entry
+from apps.notes.serializers import NotebookApiSerializer, EntryApiSerializer
+from apps.tags.models import Tag
+
+# 埋め込みタグは表示に必要な列だけを読み込む
+TAG_PREFETCH_QUERYSET = Tag.objects.only('id', 'name', 'color')
+
+
+class NotebookViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """ログインユーザーのノートブック一覧・詳細"""
+    serializer_class = NotebookApiSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ApiCursorPagination
+    filterset_fields = ['notebook_type', 'status', 'is_favorite', 'tags']
+    search_fields = ['title', 'description']
+    ordering_fields = ['updated_at', 'created_at']
+    ordering = '-updated_at'
+
+    field_columns = {
+        'notebook_type_display': ('notebook_type',),
+        'status_display': ('status',),
+    }
+    field_prefetches = {
+        'tags': Prefetch('tags', queryset=TAG_PREFETCH_QUERYSET),
+        'sub_notebooks': Prefetch(
+            'sub_notebooks',
+            queryset=SubNotebook.objects.only('id', 'notebook', 'title', 'order').order_by('order'),
+        ),
+    }
+
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(Notebook.objects.filter(user=self.request.user))
+
+
+class EntryViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """ログインユーザーのエントリー一覧・詳細（ノートブック横断）"""
+    serializer_class = EntryApiSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ApiCursorPagination
+    filterset_fields = [
+        'notebook', 'sub_notebook', 'entry_type', 'stock_code',
+        'is_important', 'is_bookmarked', 'tags',
+    ]
+    search_fields = ['title', 'stock_code', 'company_name']
+    ordering_fields = ['created_at', 'updated_at']
+    ordering = '-created_at'
+
+    field_columns = {
+        'entry_type_display': ('entry_type',),
+    }
+    field_prefetches = {
+        'tags': Prefetch('tags', queryset=TAG_PREFETCH_QUERYSET),
+    }
+
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(Entry.objects.filter(user=self.request.user))
@@ -224,17 +224,12 @@ class NotebookForm(forms.ModelForm):
                     user=self.instance.user,
                     defaults={
                         'description': self._generate_tag_description(tag_name),
-                        'usage_count': 1,
                         'is_active': True
                     }
                 )
                 
-                # ノートブックに関連付け
+                # ノートブックに関連付け（使用回数は m2m_changed シグナルで更新）
                 instance.tags.add(tag)
-                
-                # 使用回数をインクリメント（既存タグの場合）
-                if not created:
-                    tag.increment_usage()
                     
         except Exception as e:
             import logging
@@ -371,11 +366,10 @@ class EntryForm(forms.ModelForm):
             instance.save()
             
             # タグを関連付け
+            # 使用回数は m2m_changed シグナルで更新
             selected_tags = self.cleaned_data.get('selected_tags')
             if selected_tags:
                 instance.tags.set(selected_tags)
-                for tag in selected_tags:
-                    tag.increment_usage()
         
         return instance
 
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.notes.models import Entry
+
+
+class Command(BaseCommand):
+    help = 'エントリーのコンテンツプレビュー（content_preview）をチャンク単位で生成'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='1回の bulk_update で更新する最大件数（デフォルト: 1000）'
+        )
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='生成済みのエントリーも含めて作り直す（プレビューの生成規則を変更した場合）'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size は1以上を指定してください')
+
+        # 論理削除済みも含めて対象にする（復元時に再生成が不要になるように）
+        entries = Entry.all_objects.order_by('pk')
+        if not options['all']:
+            entries = entries.filter(content_preview='')
+
+        total = updated = 0
+        last_pk = None
+        while True:
+            chunk = entries if last_pk is None else entries.filter(pk__gt=last_pk)
+            rows = list(chunk.only('pk', 'entry_type', 'content', 'content_preview')[:chunk_size])
+            if not rows:
+                break
+            last_pk = rows[-1].pk
+
+            changed = []
+            for entry in rows:
+                preview = Entry.build_content_preview(entry.entry_type, entry.content)
+                if preview != entry.content_preview:
+                    entry.content_preview = preview
+                    changed.append(entry)
+            # save() を経由しないため updated_at は変わらない
+            Entry.all_objects.bulk_update(changed, ['content_preview'])
+
+            total += len(rows)
+            updated += len(changed)
+            self.stdout.write(f'{total}件確認（{updated}件更新）...')
+
+        self.stdout.write(self.style.SUCCESS(f'コンテンツプレビューを生成しました（{updated}件更新）'))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F, OuterRef, Subquery
+from apps.notes.models import Notebook, Entry
+
+
+class Command(BaseCommand):
+    help = 'エントリーの所有者（user）をノートブックの所有者からチャンク単位で設定'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000,
+            help='1回のUPDATEで更新する最大件数（デフォルト: 1000）'
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        if chunk_size <= 0:
+            raise CommandError('--chunk-size は1以上を指定してください')
+
+        # 未設定、またはノートブックの所有者と一致しないエントリー（論理削除済みも含む）
+        stale = Entry.all_objects.exclude(user=F('notebook__user')) | Entry.all_objects.filter(user__isnull=True)
+        owner = Notebook.all_objects.filter(pk=OuterRef('notebook_id')).values('user_id')[:1]
+
+        total = 0
+        while True:
+            pks = list(stale.order_by().values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            total += Entry.all_objects.filter(pk__in=pks).update(user_id=Subquery(owner))
+            self.stdout.write(f'{total}件更新...')
+
+        self.stdout.write(self.style.SUCCESS(f'エントリーの所有者を設定しました（{total}件）'))
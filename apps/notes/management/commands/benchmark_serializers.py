@@ -0,0 +1,195 @@
+import json
+import time
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils import timezone
+from apps.notes.models import Notebook, Entry
+from apps.notes.services import SearchResultSerializer
+from apps.tags.models import Tag
+from apps.tags.services import TagSerializer
+
+
+class Command(BaseCommand):
+    help = '検索Ajaxのシリアライズ処理（モデル経由 / values() 経由）の1ミリ秒あたりの行数を計測'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            required=True,
+            help='計測に使うデータの所有ユーザー名'
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=200,
+            help='1回あたりにシリアライズする最大行数（デフォルト: 200）'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='計測の繰り返し回数（デフォルト: 20）'
+        )
+        parser.add_argument(
+            '--query',
+            type=str,
+            default='',
+            help='ノートブックのハイライト判定に使う検索語（デフォルト: なし）'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" not found')
+
+        limit, repeat, query = options['limit'], options['repeat'], options['query']
+        if limit <= 0 or repeat <= 0:
+            raise CommandError('--limit と --repeat は1以上を指定してください')
+
+        notebooks = Notebook.objects.filter(user=user)
+        entries = Entry.objects.filter(user=user).order_by('-created_at')
+        tags = Tag.objects.get_for_user(user).order_by('-usage_count', 'name')
+
+        cases = [
+            ('notebooks', self._legacy_notebooks, lambda: SearchResultSerializer.notebook_rows(
+                SearchResultSerializer.notebook_values(
+                    notebooks.annotate(**self._notebook_annotations())
+                )[:limit],
+                query,
+            )),
+            ('entries', self._legacy_entries, lambda: SearchResultSerializer.entry_rows(
+                SearchResultSerializer.entry_values(entries)[:limit]
+            )),
+            ('tags', self._legacy_tags, lambda: TagSerializer.rows(tags[:limit], with_details=True, with_urls=True)),
+        ]
+
+        for name, legacy, fast in cases:
+            legacy_rate = self._measure(lambda: legacy(user, limit, query), repeat)
+            fast_rate = self._measure(fast, repeat)
+            ratio = fast_rate / legacy_rate if legacy_rate else 0
+            self.stdout.write(
+                f'{name}: モデル経由 {legacy_rate:.1f} 行/ms, values() 経由 {fast_rate:.1f} 行/ms（{ratio:.1f}倍）'
+            )
+
+    def _measure(self, serialize, repeat):
+        """JSON文字列化までを repeat 回実行し、1ミリ秒あたりの行数を返す"""
+        rows = 0
+        started = time.perf_counter()
+        for _ in range(repeat):
+            results = serialize()
+            json.dumps(results, ensure_ascii=False)
+            rows += len(results)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        return rows / elapsed_ms if elapsed_ms else 0
+
+    def _notebook_annotations(self):
+        return {
+            'recent_entries_count': Count(
+                'entries', filter=Q(entries__created_at__gte=timezone.now() - timedelta(days=30))
+            ),
+            'stock_count': Count('entries__stock_code', distinct=True),
+        }
+
+    # 比較用：変更前の検索Ajaxの処理（モデルインスタンスを生成して行ごとに表示名・URL・プレビューを解決）
+
+    def _legacy_notebooks(self, user, limit, query=''):
+        notebooks = Notebook.objects.filter(user=user).annotate(
+            **self._notebook_annotations()
+        ).select_related().prefetch_related('tags')[:limit]
+        return [
+            {
+                'id': str(notebook.pk),
+                'title': notebook.title,
+                'notebook_type': notebook.get_notebook_type_display(),
+                'status': notebook.get_status_display(),
+                'status_code': notebook.status,
+                'entry_count': notebook.entry_count,
+                'recent_entries_count': getattr(notebook, 'recent_entries_count', 0),
+                'stock_count': getattr(notebook, 'stock_count', 0),
+                'is_favorite': notebook.is_favorite,
+                'updated_at': notebook.updated_at.isoformat(),
+                'tags': [{'id': tag.pk, 'name': tag.name} for tag in notebook.tags.all()],
+                'url': reverse('notes:detail', kwargs={'pk': notebook.pk}),
+                'highlight': self._legacy_highlight(notebook, query) if query else {},
+            }
+            for notebook in notebooks
+        ]
+
+    def _legacy_highlight(self, notebook, search_query):
+        highlight_info = {}
+        search_terms = [term.strip().lower() for term in search_query.split() if term.strip()]
+        if any(term in notebook.title.lower() for term in search_terms):
+            highlight_info['title'] = True
+        if notebook.description:
+            description_lower = notebook.description.lower()
+            if any(term in description_lower for term in search_terms):
+                highlight_info['description'] = True
+        for tag_name in [tag.name.lower() for tag in notebook.tags.all()]:
+            if any(term in tag_name for term in search_terms):
+                highlight_info['tags'] = True
+                break
+        return highlight_info
+
+    def _legacy_entries(self, user, limit, query=''):
+        entries = Entry.objects.filter(user=user).select_related(
+            'sub_notebook'
+        ).prefetch_related('tags').order_by('-created_at')[:limit]
+        return [
+            {
+                'id': str(entry.pk),
+                'title': entry.title,
+                'entry_type': entry.entry_type,
+                'entry_type_display': entry.get_entry_type_display(),
+                'stock_code': entry.stock_code,
+                'company_name': entry.company_name,
+                'stock_display': entry.get_stock_display(),
+                'sub_notebook': {
+                    'id': str(entry.sub_notebook.pk) if entry.sub_notebook else None,
+                    'title': entry.sub_notebook.title if entry.sub_notebook else None
+                },
+                'is_important': entry.is_important,
+                'is_bookmarked': entry.is_bookmarked,
+                'created_at': entry.created_at.isoformat(),
+                'tags': [{'id': tag.pk, 'name': tag.name} for tag in entry.tags.all()],
+                'content_preview': self._legacy_content_preview(entry),
+            }
+            for entry in entries
+        ]
+
+    def _legacy_content_preview(self, entry):
+        content = entry.content
+        entry_type = entry.entry_type
+
+        if entry_type == 'ANALYSIS' and content.get('summary'):
+            return content['summary'][:100] + '...' if len(content['summary']) > 100 else content['summary']
+        elif entry_type == 'NEWS' and content.get('headline'):
+            return content['headline']
+        elif entry_type == 'CALCULATION' and content.get('current_price'):
+            return f"現在株価: {content['current_price']}"
+        elif entry_type == 'MEMO' and content.get('observation'):
+            return content['observation'][:100] + '...' if len(content['observation']) > 100 else content['observation']
+        elif entry_type == 'GOAL' and content.get('target_price'):
+            return f"目標株価: {content['target_price']}"
+
+        return "詳細はクリックして確認してください"
+
+    def _legacy_tags(self, user, limit, query=''):
+        tags = Tag.objects.get_for_user(user).order_by('-usage_count', 'name')[:limit]
+        return [
+            {
+                'id': tag.pk,
+                'name': tag.name,
+                'description': tag.description,
+                'usage_count': tag.usage_count,
+                'is_active': tag.is_active,
+                'color': tag.get_effective_color(),
+                'edit_url': f'/tags/{tag.pk}/edit/',
+                'delete_url': f'/tags/{tag.pk}/delete/',
+            }
+            for tag in tags
+        ]
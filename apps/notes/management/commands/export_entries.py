@@ -0,0 +1,66 @@
+import sys
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from apps.notes.models import Notebook
+from apps.notes.services import EntryExportService
+
+
+class Command(BaseCommand):
+    help = 'ノートブックのエントリーを NDJSON / CSV 形式でストリーミング出力'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            required=True,
+            help='対象ユーザー名'
+        )
+        parser.add_argument(
+            '--notebook',
+            type=str,
+            help='対象ノートブックID（指定しない場合は全ノートブック）'
+        )
+        parser.add_argument(
+            '--format',
+            choices=EntryExportService.FORMATS,
+            default='ndjson',
+            help='出力形式（デフォルト: ndjson）'
+        )
+        parser.add_argument(
+            '--gzip',
+            action='store_true',
+            help='gzip 圧縮して出力'
+        )
+        parser.add_argument(
+            '--output',
+            type=str,
+            help='出力ファイル（指定しない場合は標準出力）'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["user"]}" not found')
+
+        notebook = None
+        if options.get('notebook'):
+            try:
+                notebook = Notebook.objects.get(pk=options['notebook'], user=user)
+            except (Notebook.DoesNotExist, ValueError, ValidationError):
+                raise CommandError(f'Notebook "{options["notebook"]}" not found')
+
+        queryset = EntryExportService.get_queryset(user, notebook)
+        chunks = EntryExportService.stream(queryset, options['format'], compress=options['gzip'])
+
+        if options.get('output'):
+            with open(options['output'], 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            self.stderr.write(self.style.SUCCESS(f'エクスポートしました: {options["output"]}'))
+        else:
+            out = sys.stdout.buffer
+            for chunk in chunks:
+                out.write(chunk)
+            out.flush()
@@ -0,0 +1,55 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from apps.notes.models import Notebook
+from apps.notes.services import EntryImportService
+
+
+class Command(BaseCommand):
+    help = 'NDJSON / CSV ファイルからノートブックにエントリーを一括インポート'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', type=str, help='インポートするファイル')
+        parser.add_argument(
+            '--notebook',
+            type=str,
+            required=True,
+            help='インポート先のノートブックID'
+        )
+        parser.add_argument(
+            '--format',
+            choices=EntryImportService.FORMATS,
+            help='入力形式（指定しない場合は拡張子から判定）'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=EntryImportService.BATCH_SIZE,
+            help=f'1トランザクションで作成する件数（デフォルト: {EntryImportService.BATCH_SIZE}）'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            notebook = Notebook.objects.select_related('user').get(pk=options['notebook'])
+        except (Notebook.DoesNotExist, ValueError, ValidationError):
+            raise CommandError(f'Notebook "{options["notebook"]}" not found')
+
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size は1以上を指定してください')
+
+        path = options['path']
+        import_format = options.get('format') or ('csv' if path.lower().endswith('.csv') else 'ndjson')
+
+        try:
+            with open(path, encoding='utf-8-sig', newline='') as f:
+                result = EntryImportService.import_file(notebook, f, import_format, options['batch_size'])
+        except OSError as e:
+            raise CommandError(f'ファイルを読み込めません: {e}')
+
+        for error in result['errors']:
+            self.stderr.write(f"{error['line']}行目: {error['error']}")
+
+        self.stdout.write(
+            f"{result['created']}件作成 / {result['error_count']}件エラー"
+            f"（{result['elapsed']}秒, {result['rows_per_second']}行/秒）"
+        )
+        self.stdout.write(self.style.SUCCESS(f'「{notebook.title}」へのインポートが完了しました'))
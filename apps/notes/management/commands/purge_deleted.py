@@ -0,0 +1,91 @@
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+from apps.accounts.services import ProfileStatisticsService
+from apps.notes.models import Notebook, SubNotebook, Entry
+from apps.tags.models import Tag, TagTrendScore
+
+
+class Command(BaseCommand):
+    help = '論理削除済みのノートブック・エントリー・タグをチャンク単位で物理削除'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=7,
+            help='削除後この日数を経過した行のみ物理削除（デフォルト: 7日）'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='1トランザクションで削除する最大件数（デフォルト: 500）'
+        )
+
+    def handle(self, *args, **options):
+        days = options['days']
+        chunk_size = options['chunk_size']
+
+        if days < 0 or chunk_size <= 0:
+            raise CommandError('--days は0以上、--chunk-size は1以上を指定してください')
+
+        cutoff = timezone.now() - timedelta(days=days)
+        touched_users = set()
+
+        # エントリー → ノートブック → タグ の順に削除（参照される側を後にする）
+        entries = Entry.all_objects.filter(deleted_at__lt=cutoff)
+        deleted = self._purge(entries, 'user', touched_users, chunk_size, [
+            lambda pks: Entry.tags.through.objects.filter(entry_id__in=pks),
+        ])
+        self.stdout.write(f'エントリー: {deleted}件削除')
+
+        # 未削除のエントリーが残っているノートブックは次回以降に回す
+        notebooks = Notebook.all_objects.filter(deleted_at__lt=cutoff).exclude(
+            Exists(Entry.all_objects.filter(notebook=OuterRef('pk')))
+        )
+        deleted = self._purge(notebooks, 'user', touched_users, chunk_size, [
+            lambda pks: Notebook.tags.through.objects.filter(notebook_id__in=pks),
+            lambda pks: SubNotebook.objects.filter(notebook_id__in=pks),
+        ])
+        self.stdout.write(f'ノートブック: {deleted}件削除')
+
+        tags = Tag.all_objects.filter(deleted_at__lt=cutoff)
+        deleted = self._purge(tags, 'user', set(), chunk_size, [
+            lambda pks: Notebook.tags.through.objects.filter(tag_id__in=pks),
+            lambda pks: Entry.tags.through.objects.filter(tag_id__in=pks),
+            lambda pks: TagTrendScore.objects.filter(tag_id__in=pks),
+        ])
+        self.stdout.write(f'タグ: {deleted}件削除')
+
+        # 行ごとのシグナルを通していないため、最後に一度だけ統計を再集計
+        if touched_users:
+            changed = ProfileStatisticsService.reconcile(User.objects.filter(pk__in=touched_users))
+            self.stdout.write(f'統計を再集計しました（{changed}件更新）')
+
+        self.stdout.write(self.style.SUCCESS('論理削除済みデータの物理削除が完了しました'))
+
+    def _purge(self, queryset, user_field, touched_users, chunk_size, dependents):
+        """チャンク単位で物理削除（シグナル・カスケード収集を経由しない）
+
+        論理削除時に派生カウンタは減算済みのため、行ごとの post_delete は不要。
+        依存する行（中間テーブル等）を先に削除してから本体を削除する。
+        """
+        total = 0
+        while True:
+            chunk = list(queryset.order_by('deleted_at').values_list('pk', user_field)[:chunk_size])
+            if not chunk:
+                return total
+
+            pks = [pk for pk, user_id in chunk]
+            with transaction.atomic():
+                for dependent in dependents:
+                    rows = dependent(pks)
+                    rows._raw_delete(rows.db)
+                rows = queryset.model.all_objects.filter(pk__in=pks)
+                total += rows._raw_delete(rows.db)
+
+            touched_users.update(user_id for pk, user_id in chunk)
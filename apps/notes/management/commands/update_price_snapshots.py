@@ -0,0 +1,96 @@
+import csv
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.dashboard.goals import parse_price
+from apps.notes.models import Entry, PriceSnapshot
+
+# yfinance関連のインポート
+try:
+    import yfinance as yf
+except ImportError:
+    yf = None
+
+
+class Command(BaseCommand):
+    help = '投資目標が設定されている銘柄の株価スナップショットを更新'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--csv',
+            type=str,
+            help='ローカルの株価ファイル（"銘柄コード,株価" 形式）から読み込む'
+        )
+        parser.add_argument(
+            '--compute',
+            action='store_true',
+            help='更新後に目標達成率を再計算する'
+        )
+
+    def handle(self, *args, **options):
+        if options.get('csv'):
+            prices, source = self._load_csv(options['csv']), 'csv'
+        else:
+            prices, source = self._fetch_yfinance(), 'yfinance'
+
+        now = timezone.now()
+        snapshots = [
+            PriceSnapshot(stock_code=stock_code, price=price, as_of=now, source=source)
+            for stock_code, price in prices.items()
+        ]
+        PriceSnapshot.objects.bulk_create(
+            snapshots,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['stock_code'],
+            update_fields=['price', 'as_of', 'source'],
+        )
+        self.stdout.write(self.style.SUCCESS(f'株価スナップショットを更新しました（{len(snapshots)}銘柄）'))
+
+        if options['compute']:
+            call_command('compute_goal_achievement', stdout=self.stdout)
+
+    def _load_csv(self, path):
+        """CSVファイルから {銘柄コード: 株価} を読み込み"""
+        prices = {}
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                for row in csv.reader(f):
+                    if len(row) < 2:
+                        continue
+                    price = parse_price(row[1])
+                    if price is not None:
+                        prices[row[0].strip()] = price
+        except OSError as e:
+            raise CommandError(f'ファイルを読み込めません: {e}')
+        return prices
+
+    def _fetch_yfinance(self):
+        """目標が設定されている銘柄の終値を yfinance から一括取得"""
+        if yf is None:
+            raise CommandError('yfinance ライブラリがインストールされていません（--csv を指定してください）')
+
+        stock_codes = sorted(set(
+            Entry.objects.filter(entry_type='GOAL').exclude(stock_code='')
+            .values_list('stock_code', flat=True).distinct()
+        ))
+        if not stock_codes:
+            return {}
+
+        # 4桁の銘柄コードは東証銘柄として扱う
+        symbols = {
+            (f"{code}.T" if code.isdigit() and len(code) == 4 else code): code
+            for code in stock_codes
+        }
+        data = yf.download(list(symbols), period='5d', progress=False, group_by='ticker')
+
+        prices = {}
+        for symbol, code in symbols.items():
+            try:
+                closes = data[symbol]['Close'] if len(symbols) > 1 else data['Close']
+                closes = closes.dropna()
+                if len(closes):
+                    prices[code] = float(closes.iloc[-1])
+            except (KeyError, IndexError):
+                self.stderr.write(f'株価を取得できませんでした: {code}')
+        return prices
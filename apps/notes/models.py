@@ -5,11 +5,11 @@
 import uuid
 from django.db import models
 from django.contrib.auth.models import User
-from apps.common.models import BaseModel
+from apps.common.models import BaseModel, ChangeTrackingMixin, SoftDeleteModel
 from apps.tags.models import Tag
 from django.db.models import Count, Q
 
-class Notebook(BaseModel):
+class Notebook(ChangeTrackingMixin, SoftDeleteModel, BaseModel):
     """ノートブック（テーマ単位のフォルダ的役割）"""
     
     STATUS_CHOICES = [
@@ -64,14 +64,15 @@ class Notebook(BaseModel):
             models.Index(fields=['is_favorite']),
         ]
     
+    # 変更追跡対象（entry_count はエントリー側のシグナルで管理）
+    tracked_fields = [
+        'user', 'title', 'description', 'notebook_type', 'status',
+        'key_criteria', 'risk_factors', 'is_public', 'is_favorite',
+    ]
+    
     def __str__(self):
         return self.title
     
-    def save(self, *args, **kwargs):
-        """保存時にエントリー数を更新"""
-        super().save(*args, **kwargs)
-        self.update_entry_count()
-    
     def update_entry_count(self):
         """エントリー数を正確にカウントして更新"""
         actual_count = self.entries.count()
@@ -80,8 +81,8 @@ class Notebook(BaseModel):
             super(Notebook, self).save(update_fields=['entry_count'])
     
     def get_recent_entries(self, limit=5):
-        """最新のエントリーを取得"""
-        return self.entries.order_by('-created_at')[:limit]
+        """最新のエントリーを取得（一覧表示用のため content は読み込まない）"""
+        return self.entries.defer('content').order_by('-created_at')[:limit]
     
     def get_stock_count(self):
         """ノート内の銘柄数を取得"""
@@ -135,11 +136,13 @@ class SubNotebook(BaseModel):
         return f"{self.notebook.title} - {self.title}"
     
     def get_entries_count(self):
-        """このサブノートのエントリー数を取得"""
+        """このサブノートのエントリー数を取得（annotate 済みの場合はその値）"""
+        if hasattr(self, 'entries_count'):
+            return self.entries_count
         return self.entries.count()
 
 
-class Entry(BaseModel):
+class Entry(ChangeTrackingMixin, SoftDeleteModel, BaseModel):
     """エントリー（1銘柄 or 1イベント単位）"""
     
     ENTRY_TYPE_CHOICES = [
@@ -152,6 +155,17 @@ class Entry(BaseModel):
         ('MARKET_EVENT', '市場イベント'),
     ]
     
+    # エントリータイプ → (プレビューに使うキー, 表示形式)
+    PREVIEW_SOURCES = {
+        'ANALYSIS': ('summary', '{}'),
+        'NEWS': ('headline', '{}'),
+        'MEMO': ('observation', '{}'),
+        'GOAL': ('target_price', '目標株価: {}'),
+    }
+    PREVIEW_LENGTH = 100
+    # 一覧・検索結果でプレビューがない場合の表示
+    PREVIEW_FALLBACK = '詳細はクリックして確認してください'
+    
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     notebook = models.ForeignKey(
         Notebook, 
@@ -159,6 +173,15 @@ class Entry(BaseModel):
         related_name='entries',
         verbose_name='ノートブック'
     )
+    # 所有者（ノートブックの所有者を非正規化・ユーザー単位の検索でJOINを不要にする）
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        null=True,
+        editable=False,
+        related_name='entries',
+        verbose_name='ユーザー'
+    )
     sub_notebook = models.ForeignKey(
         SubNotebook, 
         on_delete=models.SET_NULL, 
@@ -175,6 +198,8 @@ class Entry(BaseModel):
     )
     title = models.CharField(max_length=200, verbose_name='エントリータイトル')
     content = models.JSONField(verbose_name='コンテンツ')
+    # 一覧表示用のプレビュー（保存時に content から生成・一覧では content を読み込まない）
+    content_preview = models.CharField(max_length=110, blank=True, editable=False, verbose_name='コンテンツプレビュー')
     
     # 銘柄情報（エントリーレベルで管理）
     stock_code = models.CharField(max_length=10, blank=True, verbose_name='銘柄コード')
@@ -193,27 +218,60 @@ class Entry(BaseModel):
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['notebook', 'stock_code']),
+            models.Index(fields=['user', 'created_at']),
+            # 銘柄タイムライン（ノートブック横断・新しい順）用
+            models.Index(fields=['user', 'stock_code', '-created_at']),
             models.Index(fields=['entry_type', 'event_date']),
             models.Index(fields=['is_important']),
             models.Index(fields=['is_bookmarked']),
         ]
     
+    # 変更追跡対象（所有者・プレビューの再生成、ノート統計・日次集計の付け替えに使うもののみ）
+    tracked_fields = [
+        'notebook', 'user', 'sub_notebook', 'entry_type', 'content',
+        'stock_code', 'company_name', 'is_important',
+    ]
+    
     def __str__(self):
         return f"{self.notebook.title} - {self.title}"
     
     def save(self, *args, **kwargs):
-        """保存時にノートブックのエントリー数を更新"""
-        is_new = self._state.adding
+        """保存時に所有者をノートブックの所有者に合わせ（ノートブック移動時も含む）、
+        コンテンツが変わった場合はプレビューを作り直す"""
+        if self.notebook_id and (self.user_id is None or self.has_changed('notebook')):
+            self.user_id = self.notebook.user_id
+            self._add_update_field(kwargs, 'user')
+        if self.has_changed('content', 'entry_type'):
+            self.content_preview = self.build_content_preview(self.entry_type, self.content)
+            self._add_update_field(kwargs, 'content_preview')
         super().save(*args, **kwargs)
-        
-        if is_new:
-            self.notebook.update_entry_count()
     
-    def delete(self, *args, **kwargs):
-        """削除時にノートブックのエントリー数を更新"""
-        notebook = self.notebook
-        super().delete(*args, **kwargs)
-        notebook.update_entry_count()
+    @staticmethod
+    def _add_update_field(kwargs, name):
+        """update_fields 指定時に派生フィールドを保存対象に加える"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and name not in update_fields:
+            kwargs['update_fields'] = [*update_fields, name]
+    
+    @classmethod
+    def build_content_preview(cls, entry_type, content):
+        """コンテンツからプレビュー文字列を生成（該当がなければ空文字）
+        
+        エントリータイプごとの代表キー、なければ最初の文字列値を使い、
+        PREVIEW_LENGTH 文字を超える場合は切り詰める。
+        """
+        if not content or not isinstance(content, dict):
+            return ''
+        
+        key, template = cls.PREVIEW_SOURCES.get(entry_type, (None, '{}'))
+        if key and content.get(key):
+            text = template.format(content[key])
+        else:
+            values = [v for v in content.values() if isinstance(v, str) and v.strip()]
+            text = values[0] if values else ''
+        
+        text = text.strip()
+        return text[:cls.PREVIEW_LENGTH] + '...' if len(text) > cls.PREVIEW_LENGTH else text
     
     def get_stock_display(self):
         """銘柄表示用"""
@@ -226,45 +284,170 @@ class Entry(BaseModel):
         return "銘柄未設定"
     
     def get_content_preview(self, max_length=100):
-        """コンテンツプレビューを取得"""
-        if not self.content:
-            return "コンテンツなし"
-        
-        # エントリータイプに応じてプレビューテキストを生成
-        if self.entry_type == 'ANALYSIS' and self.content.get('summary'):
-            text = self.content['summary']
-        elif self.entry_type == 'NEWS' and self.content.get('headline'):
-            text = self.content['headline']
-        elif self.entry_type == 'MEMO' and self.content.get('observation'):
-            text = self.content['observation']
-        elif self.entry_type == 'GOAL' and self.content.get('target_price'):
-            text = f"目標株価: {self.content['target_price']}"
-        else:
-            # その他の場合は最初の値を取得
-            values = [v for v in self.content.values() if isinstance(v, str) and v.strip()]
-            text = values[0] if values else "詳細はクリックして確認"
+        """コンテンツプレビューを取得（保存時に生成済みの値を使用）
         
-        return text[:max_length] + '...' if len(text) > max_length else text
+        プレビューがない場合は content を参照して従来と同じ表示を返す
+        （content を読み込まない一覧では get_list_preview を使用すること）。
+        """
+        text = self.content_preview
+        if not text:
+            return "詳細はクリックして確認" if self.content else "コンテンツなし"
+        if max_length < self.PREVIEW_LENGTH and len(text) > max_length:
+            return text[:max_length] + '...'
+        return text
+    
+    def get_list_preview(self):
+        """一覧表示用のプレビュー（content を参照しない）"""
+        return self.content_preview or self.PREVIEW_FALLBACK
     
     def has_stock_info(self):
         """銘柄情報があるかどうか"""
         return bool(self.stock_code or self.company_name)
 
 
+class PriceSnapshot(models.Model):
+    """銘柄の最新株価スナップショット（目標達成率の計算用・銘柄ごとに1行）"""
+    
+    stock_code = models.CharField(max_length=10, unique=True, verbose_name='銘柄コード')
+    price = models.FloatField(verbose_name='株価')
+    as_of = models.DateTimeField(verbose_name='取得日時')
+    source = models.CharField(max_length=20, blank=True, verbose_name='取得元')
+    
+    class Meta:
+        verbose_name = '株価スナップショット'
+        verbose_name_plural = '株価スナップショット'
+        ordering = ['stock_code']
+    
+    def __str__(self):
+        return f"{self.stock_code}: {self.price}"
+
+
 # シグナルを使用してエントリー数の整合性を保つ
-from django.db.models.signals import post_save, post_delete
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed, post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
+from apps.common import outbox
+from apps.common.cache import invalidate_notebook_cache
+from apps.common.signals import pre_soft_delete
+
+@outbox.handler('notebook.entry_count')
+def recount_notebook_entries(events):
+    """対象ノートブックのエントリー数を1回のUPDATEで再集計（再実行しても同じ結果）"""
+    notebook_ids = {payload['notebook_id'] for user_id, payload in events}
+    alive = Entry.objects.filter(notebook=OuterRef('pk')).order_by().values('notebook').annotate(
+        count=Count('pk')
+    ).values('count')
+    Notebook.all_objects.filter(pk__in=notebook_ids).update(
+        entry_count=Coalesce(Subquery(alive), Value(0))
+    )
+    # 一覧のエントリー数が変わるためETag用のデータ世代を進める
+    from apps.accounts.services import DataGenerationService
+    for user_id in {user_id for user_id, payload in events}:
+        DataGenerationService.mark_changed(user_id)
+
 
 @receiver(post_save, sender=Entry)
 def update_notebook_entry_count_on_save(sender, instance, created, **kwargs):
     """エントリー保存時にノートブックのエントリー数を更新"""
     if created:
-        instance.notebook.update_entry_count()
+        outbox.publish('notebook.entry_count', instance.user_id, {'notebook_id': str(instance.notebook_id)})
 
 @receiver(post_delete, sender=Entry)
 def update_notebook_entry_count_on_delete(sender, instance, **kwargs):
     """エントリー削除時にノートブックのエントリー数を更新"""
+    if instance.is_deleted:
+        # 論理削除時に反映済み
+        return
     try:
-        instance.notebook.update_entry_count()
+        outbox.publish('notebook.entry_count', instance.user_id, {'notebook_id': str(instance.notebook_id)})
     except Notebook.DoesNotExist:
-        pass
\ No newline at end of file
+        pass
+
+
+@receiver(post_save, sender=Notebook)
+def sync_entry_owner_on_notebook_save(sender, instance, created, **kwargs):
+    """ノートブックの所有者変更時に配下エントリーの所有者を1回のUPDATEで更新"""
+    if not created and 'user' in getattr(instance, 'changed_fields', ()):
+        Entry.all_objects.filter(notebook=instance).update(user_id=instance.user_id)
+
+
+@receiver(pre_soft_delete, sender=Notebook)
+def soft_delete_notebook_entries(sender, queryset, **kwargs):
+    """ノートブック論理削除時に配下のエントリーもまとめて論理削除"""
+    Entry.objects.filter(notebook__in=queryset.values('pk')).delete()
+
+
+@receiver(pre_soft_delete, sender=Entry)
+def update_notebook_entry_count_on_soft_delete(sender, queryset, **kwargs):
+    """エントリー論理削除時にノートブックごとの件数を1回のUPDATEで減算"""
+    removed = queryset.filter(notebook=OuterRef('pk')).values('notebook').annotate(
+        count=Count('pk')
+    ).values('count')
+    Notebook.all_objects.filter(pk__in=queryset.values('notebook')).update(
+        entry_count=Greatest(F('entry_count') - Coalesce(Subquery(removed), Value(0)), Value(0))
+    )
+
+
+# エントリー詳細のキャッシュは updated_at をキーにしているため、
+# 表示に含まれるタグが変わった場合も updated_at を更新する
+@receiver(m2m_changed, sender=Entry.tags.through)
+def touch_entry_on_tags_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """エントリーのタグ付け外し時に updated_at を更新"""
+    now = timezone.now()
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            Entry.all_objects.filter(pk=instance.pk).update(updated_at=now)
+            instance.updated_at = now
+    elif action in ('post_add', 'post_remove') and pk_set:
+        Entry.all_objects.filter(pk__in=pk_set).update(updated_at=now)
+    elif action == 'pre_clear':
+        # clear後は対象のエントリーが取得できないため削除前に更新する
+        Entry.all_objects.filter(tags=instance).update(updated_at=now)
+
+
+@receiver(post_save, sender=Tag)
+def touch_entries_on_tag_save(sender, instance, created, **kwargs):
+    """タグの名前変更等を付与済みエントリーの詳細表示に反映"""
+    if not created:
+        Entry.all_objects.filter(tags=instance).update(updated_at=timezone.now())
+
+
+@receiver(pre_soft_delete, sender=Tag)
+def touch_entries_on_tag_soft_delete(sender, queryset, **kwargs):
+    """論理削除されたタグを付与済みエントリーの詳細表示から外す"""
+    Entry.all_objects.filter(tags__in=queryset.values('pk')).update(updated_at=timezone.now())
+
+
+# ノート詳細の統計キャッシュ（NotebookDetailService）の無効化
+NOTEBOOK_SUMMARY_FIELDS = {'notebook', 'sub_notebook', 'is_important', 'stock_code', 'company_name'}
+
+
+@receiver(post_save, sender=Entry)
+def invalidate_notebook_summary_on_entry_save(sender, instance, created, **kwargs):
+    """エントリー作成時・統計に関わるフィールドの変更時"""
+    changed = getattr(instance, 'changed_fields', set())
+    if created or changed & NOTEBOOK_SUMMARY_FIELDS:
+        invalidate_notebook_cache(instance.notebook_id)
+    if not created and 'notebook' in changed:
+        invalidate_notebook_cache(instance.get_loaded_value('notebook'))
+
+
+@receiver(post_delete, sender=Entry)
+def invalidate_notebook_summary_on_entry_delete(sender, instance, **kwargs):
+    if not instance.is_deleted:
+        invalidate_notebook_cache(instance.notebook_id)
+
+
+@receiver(pre_soft_delete, sender=Entry)
+def invalidate_notebook_summary_on_entry_soft_delete(sender, queryset, **kwargs):
+    for notebook_id in set(queryset.values_list('notebook_id', flat=True)):
+        invalidate_notebook_cache(notebook_id)
+
+
+@receiver(post_save, sender=SubNotebook)
+@receiver(post_delete, sender=SubNotebook)
+def invalidate_notebook_summary_on_sub_notebook_change(sender, instance, **kwargs):
+    invalidate_notebook_cache(instance.notebook_id)
+
@@ -0,0 +1,50 @@
+# ========================================
+# apps/notes/serializers.py - ノートブック・エントリーAPI用シリアライザー
+# ========================================
+
+from rest_framework import serializers
+from apps.common.api import SparseFieldsetSerializerMixin
+from apps.notes.models import Notebook, SubNotebook, Entry
+from apps.tags.serializers import TagSummarySerializer
+
+
+class SubNotebookSummarySerializer(serializers.ModelSerializer):
+    """ノートブックに埋め込むサブノート"""
+
+    class Meta:
+        model = SubNotebook
+        fields = ('id', 'title', 'order')
+
+
+class NotebookApiSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """ノートブック"""
+    notebook_type_display = serializers.CharField(source='get_notebook_type_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    tags = TagSummarySerializer(many=True, read_only=True)
+    sub_notebooks = SubNotebookSummarySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Notebook
+        fields = (
+            'id', 'title', 'description', 'notebook_type', 'notebook_type_display',
+            'status', 'status_display', 'key_criteria', 'risk_factors',
+            'entry_count', 'is_public', 'is_favorite', 'tags', 'sub_notebooks',
+            'created_at', 'updated_at',
+        )
+        read_only_fields = fields
+
+
+class EntryApiSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """エントリー（content は ?fields= で除外すれば読み込まない）"""
+    entry_type_display = serializers.CharField(source='get_entry_type_display', read_only=True)
+    tags = TagSummarySerializer(many=True, read_only=True)
+
+    class Meta:
+        model = Entry
+        fields = (
+            'id', 'notebook', 'sub_notebook', 'entry_type', 'entry_type_display',
+            'title', 'content', 'content_preview', 'stock_code', 'company_name',
+            'event_date', 'is_important', 'is_bookmarked', 'tags',
+            'created_at', 'updated_at',
+        )
+        read_only_fields = fields
@@ -2,11 +2,32 @@
 # apps/notes/services.py
 # ========================================
 
-from django.db.models import Count, Q
+import base64
+import csv
+import hashlib
+import json
+import time
+import uuid
+import zlib
+from collections import Counter, defaultdict
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Prefetch, Q
+from django.template.loader import render_to_string
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from datetime import timedelta
-from apps.notes.models import Notebook, Entry
+from apps.accounts.services import ProfileStatisticsService
+from apps.common import outbox
+from apps.common.cache import invalidate_notebook_cache, invalidate_user_cache, notebook_cache_key, user_cache_key
+from apps.common.serialization import tag_map, url_pattern
+from apps.common.utils import ContentHelper
+from apps.dashboard.services import DailyActivityService, DashboardStatsService, get_entry_month
+from apps.notes.models import Notebook, SubNotebook, Entry
 from apps.tags.models import Tag
+from apps.tags.services import TagTrendService
 
 class NotebookService:
     """ノートブック関連のビジネスロジック"""
@@ -40,4 +61,837 @@ class NotebookService:
             if filters.get('tags'):
                 queryset = queryset.filter(tags__in=filters['tags'])
         
-        return queryset.select_related().prefetch_related('tags')
\ No newline at end of file
+        return queryset.select_related().prefetch_related('tags')
+
+
+class NotebookSidebarService:
+    """ノート一覧画面のサイドバー情報
+    
+    お気に入り・最近更新・トレンドタグ・件数はページやフィルターに依存しないため、
+    ユーザーのデータバージョン付きキーでキャッシュする。ページ送りや
+    フィルター変更時は一覧本体のクエリのみ実行される。
+    """
+    
+    SIDEBAR_LIMIT = 5
+    TAG_LIMIT = 15
+    
+    @staticmethod
+    def get_sidebar(user):
+        """お気に入り・最近更新・トレンドタグ・統計を取得（キャッシュ優先）"""
+        key = user_cache_key(user.pk, 'notebook_sidebar')
+        sidebar = cache.get(key)
+        if sidebar is None:
+            sidebar = NotebookSidebarService.build_sidebar(user)
+            cache.set(key, sidebar, getattr(settings, 'NOTEBOOK_SIDEBAR_CACHE_TIMEOUT', 300))
+        return sidebar
+    
+    @staticmethod
+    def build_sidebar(user):
+        notebooks = Notebook.objects.filter(user=user)
+        limit = NotebookSidebarService.SIDEBAR_LIMIT
+        return {
+            'notebook_stats': notebooks.aggregate(
+                total_notebooks=Count('pk'),
+                favorite_notebooks=Count('pk', filter=Q(is_favorite=True)),
+                active_notebooks=Count('pk', filter=Q(status='ACTIVE')),
+            ),
+            'favorite_notebooks': list(notebooks.filter(is_favorite=True)[:limit]),
+            'recent_notebooks': list(notebooks.order_by('-updated_at')[:limit]),
+            'trending_tags': Tag.objects.get_trending_tags(user, limit=NotebookSidebarService.TAG_LIMIT),
+        }
+    
+    @staticmethod
+    def get_search_context(user, search_query, results, params_key=''):
+        """検索時の統計と関連タグを取得（検索条件ごとにキャッシュ）
+        
+        Args:
+            results: 検索・フィルター適用後のノートブックのクエリセット
+            params_key: ページ番号を除いた検索条件（キャッシュキー用）
+        """
+        digest = hashlib.md5(params_key.encode()).hexdigest()
+        key = user_cache_key(user.pk, 'notebook_search', digest)
+        context = cache.get(key)
+        if context is None:
+            context = {
+                'search_stats': NotebookSidebarService.build_search_stats(user, search_query),
+                'trending_tags': NotebookSidebarService.build_related_tags(user, search_query, results),
+            }
+            cache.set(key, context, getattr(settings, 'NOTEBOOK_SIDEBAR_CACHE_TIMEOUT', 300))
+        return context
+    
+    @staticmethod
+    def build_search_stats(user, search_query):
+        """フィールドごとの一致件数を1回の集計クエリで取得"""
+        tag_matches = Notebook.tags.through.objects.filter(notebook=OuterRef('pk')).filter(
+            Q(tag__name__icontains=search_query) | Q(tag__description__icontains=search_query)
+        )
+        entry_matches = Entry.objects.filter(notebook=OuterRef('pk')).filter(
+            Q(title__icontains=search_query) |
+            Q(company_name__icontains=search_query) |
+            Q(stock_code__icontains=search_query)
+        )
+        stats = Notebook.objects.filter(user=user).aggregate(
+            title_matches=Count('pk', filter=Q(title__icontains=search_query)),
+            description_matches=Count('pk', filter=Q(description__icontains=search_query)),
+            tag_matches=Count('pk', filter=Q(Exists(tag_matches))),
+            entry_matches=Count('pk', filter=Q(Exists(entry_matches))),
+        )
+        stats['query'] = search_query
+        return stats
+    
+    @staticmethod
+    def build_related_tags(user, search_query, results):
+        """検索語に一致するタグと検索結果のノートに付与されたタグ（使用回数順）"""
+        return list(
+            Tag.objects.filter(user=user, is_active=True).filter(
+                Q(name__icontains=search_query) |
+                Q(description__icontains=search_query) |
+                Q(pk__in=Notebook.tags.through.objects.filter(
+                    notebook__in=results.values('pk')
+                ).values('tag_id'))
+            ).order_by('-usage_count', 'name')[:NotebookSidebarService.TAG_LIMIT]
+        )
+
+
+class NotebookDetailService:
+    """ノート詳細画面の統計・サイドバー情報
+    
+    統計は1回の集計クエリ、サブノートはエントリー数を annotate して取得し、
+    ノートブックのバージョン付きキーでキャッシュする（エントリー・サブノートの
+    変更時に apps/notes/models.py のシグナルでバージョンを更新）。
+    """
+    
+    RECENT_DAYS = 7
+    
+    @staticmethod
+    def get_summary(notebook):
+        """統計・銘柄一覧・サブノート一覧を取得（キャッシュ優先）
+        
+        Returns:
+            dict: stats / stocks / sub_notebooks
+        """
+        key = notebook_cache_key(notebook.pk, 'notebook_summary')
+        summary = cache.get(key)
+        if summary is None:
+            summary = NotebookDetailService.build_summary(notebook)
+            cache.set(key, summary, getattr(settings, 'NOTEBOOK_SUMMARY_CACHE_TIMEOUT', 300))
+        return summary
+    
+    @staticmethod
+    def build_summary(notebook):
+        """集計クエリ・銘柄一覧・サブノート一覧の3クエリで取得"""
+        entries = Entry.objects.filter(notebook=notebook)
+        recent_since = timezone.now() - timedelta(days=NotebookDetailService.RECENT_DAYS)
+        stats = entries.aggregate(
+            total_entries=Count('pk'),
+            recent_entries=Count('pk', filter=Q(created_at__gte=recent_since)),
+            important_entries=Count('pk', filter=Q(is_important=True)),
+        )
+        
+        stocks = list(
+            entries.exclude(stock_code='').values('stock_code', 'company_name').distinct().order_by('stock_code')
+        )
+        stats['stock_count'] = len({stock['stock_code'] for stock in stocks})
+        
+        sub_notebooks = list(
+            SubNotebook.objects.filter(notebook=notebook).annotate(
+                entries_count=Count('entries', filter=Q(entries__deleted_at__isnull=True))
+            )
+        )
+        
+        return {
+            'stats': stats,
+            'stocks': stocks,
+            'sub_notebooks': sub_notebooks,
+        }
+
+
+class EntryDetailService:
+    """エントリー詳細（Ajax）の描画
+    
+    詳細HTMLはテンプレートフラグメントで描画し、(エントリーID, updated_at)
+    をキーにキャッシュする。タグの付け外し・変更時も updated_at が更新される
+    （apps/notes/models.py のシグナル）ため、同じエントリーの再表示は
+    エントリー取得とキャッシュ参照のみで返せる。
+    """
+    
+    CONTENT_TEMPLATES = {
+        'ANALYSIS': 'notes/partials/entry_content/analysis.html',
+        'NEWS': 'notes/partials/entry_content/news.html',
+        'MEMO': 'notes/partials/entry_content/memo.html',
+        'GOAL': 'notes/partials/entry_content/goal.html',
+        'EARNINGS': 'notes/partials/entry_content/earnings.html',
+        'IR_EVENT': 'notes/partials/entry_content/ir_event.html',
+        'MARKET_EVENT': 'notes/partials/entry_content/market_event.html',
+    }
+    KEY_METRIC_LABELS = {
+        'revenue': '売上高',
+        'operating_profit': '営業利益',
+        'net_income': '純利益',
+        'eps': 'EPS',
+    }
+    
+    @staticmethod
+    def cache_key(entry):
+        """キャッシュキー（ブックマークは updated_at を更新せずに保存されるためキーに含める）"""
+        return f'entry_detail:{entry.pk}:{entry.updated_at.timestamp()}:{int(entry.is_bookmarked)}'
+    
+    @staticmethod
+    def get_detail(entry):
+        """エントリー詳細のレスポンス用データを取得（キャッシュ優先）"""
+        key = EntryDetailService.cache_key(entry)
+        detail = cache.get(key)
+        if detail is None:
+            detail = EntryDetailService.build_detail(entry)
+            cache.set(key, detail, getattr(settings, 'ENTRY_DETAIL_CACHE_TIMEOUT', 86400))
+        return detail
+    
+    @staticmethod
+    def build_detail(entry):
+        """エントリー詳細を描画（タグは1回だけ取得）
+        
+        sub_notebook は select_related 済みのエントリーを渡すこと。
+        """
+        tags = list(entry.tags.all())
+        content = entry.content if isinstance(entry.content, dict) else {}
+        key_metrics = content.get('key_metrics') if entry.entry_type == 'ANALYSIS' else None
+        
+        html = render_to_string('notes/partials/entry_detail.html', {
+            'entry': entry,
+            'tags': tags,
+            'content': content,
+            'content_template': EntryDetailService.CONTENT_TEMPLATES.get(entry.entry_type),
+            'key_metrics': [
+                (EntryDetailService.KEY_METRIC_LABELS.get(key, key), value)
+                for key, value in key_metrics.items() if value
+            ] if isinstance(key_metrics, dict) else [],
+        })
+        
+        return {
+            'entry_id': str(entry.pk),
+            'title': entry.title,
+            'entry_type': entry.get_entry_type_display(),
+            'stock_info': entry.get_stock_display(),
+            'sub_notebook': entry.sub_notebook.title if entry.sub_notebook else None,
+            'created_at': timezone.localtime(entry.created_at).strftime('%Y/%m/%d %H:%M'),
+            'updated_at': timezone.localtime(entry.updated_at).strftime('%Y/%m/%d %H:%M'),
+            'is_important': entry.is_important,
+            'is_bookmarked': entry.is_bookmarked,
+            'event_date': entry.event_date.strftime('%Y/%m/%d') if entry.event_date else None,
+            'tags': [{'id': tag.pk, 'name': tag.name} for tag in tags],
+            'html': html,
+        }
+
+
+class StockTimelineService:
+    """銘柄タイムライン（ユーザーの全ノートブック横断・キーセットページネーション）"""
+    
+    PAGE_SIZE = 20
+    MAX_PAGE_SIZE = 100
+    
+    @staticmethod
+    def encode_cursor(entry):
+        """ページ末尾のエントリーから次ページ用カーソルを生成"""
+        raw = f"{entry.created_at.isoformat()}|{entry.pk}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def decode_cursor(cursor):
+        """カーソルを (created_at, id) に復元（不正な場合は ValueError）"""
+        try:
+            created_at, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|', 1)
+        except Exception:
+            raise ValueError('invalid cursor')
+        created_at = parse_datetime(created_at)
+        if created_at is None:
+            raise ValueError('invalid cursor')
+        try:
+            pk = uuid.UUID(pk)
+        except ValueError:
+            raise ValueError('invalid cursor')
+        return created_at, pk
+    
+    @staticmethod
+    def get_page(user, stock_code, cursor=None, page_size=PAGE_SIZE):
+        """銘柄のエントリーを新しい順に1ページ取得
+        
+        (user, stock_code, -created_at) インデックスを (created_at, id) の
+        キーセットで辿るため、履歴の件数に関係なく一定の時間で取得できる。
+        
+        Returns:
+            tuple: (エントリーのリスト, 次ページのカーソルまたはNone)
+        """
+        page_size = min(max(page_size, 1), StockTimelineService.MAX_PAGE_SIZE)
+        queryset = Entry.objects.filter(
+            user=user,
+            stock_code=stock_code
+        ).select_related('notebook', 'sub_notebook').prefetch_related('tags').defer('content').order_by('-created_at', '-id')
+        
+        if cursor:
+            created_at, pk = StockTimelineService.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            )
+        
+        entries = list(queryset[:page_size + 1])
+        next_cursor = None
+        if len(entries) > page_size:
+            entries = entries[:page_size]
+            next_cursor = StockTimelineService.encode_cursor(entries[-1])
+        return entries, next_cursor
+
+
+class SearchResultSerializer:
+    """検索Ajax用の軽量シリアライザー
+
+    モデルインスタンスを生成せず、必要な列だけを values() で取得する。
+    選択肢の表示名は事前に作成した辞書、URLは1回だけ reverse() したパターン、
+    タグは中間テーブルからの1クエリでまとめて解決する。
+    コンテンツは JSON 全体ではなく保存時に生成したプレビュー列のみを読む。
+    """
+
+    NOTEBOOK_TYPE_LABELS = dict(Notebook.NOTEBOOK_TYPE_CHOICES)
+    STATUS_LABELS = dict(Notebook.STATUS_CHOICES)
+    ENTRY_TYPE_LABELS = dict(Entry.ENTRY_TYPE_CHOICES)
+
+    NOTEBOOK_FIELDS = (
+        'pk', 'title', 'description', 'notebook_type', 'status', 'entry_count',
+        'is_favorite', 'updated_at', 'recent_entries_count', 'stock_count',
+    )
+    ENTRY_FIELDS = (
+        'pk', 'title', 'entry_type', 'stock_code', 'company_name', 'sub_notebook_id',
+        'sub_notebook__title', 'is_important', 'is_bookmarked', 'created_at', 'content_preview',
+    )
+
+    @staticmethod
+    def notebook_values(queryset):
+        """ノートブック検索結果に必要な列のみを取得するクエリセット"""
+        return queryset.values(*SearchResultSerializer.NOTEBOOK_FIELDS)
+
+    @staticmethod
+    def notebook_rows(rows, search_query=''):
+        """ノートブックの行をAjax応答用の辞書に変換"""
+        rows = list(rows)
+        tags = tag_map(Notebook.tags.through, 'notebook', [row['pk'] for row in rows])
+        detail_url = url_pattern('notes:detail')
+        terms = [term.strip().lower() for term in search_query.split() if term.strip()]
+        type_labels = SearchResultSerializer.NOTEBOOK_TYPE_LABELS
+        status_labels = SearchResultSerializer.STATUS_LABELS
+
+        results = []
+        for row in rows:
+            notebook_tags = tags.get(row['pk'], [])
+            results.append({
+                'id': str(row['pk']),
+                'title': row['title'],
+                'notebook_type': type_labels.get(row['notebook_type'], row['notebook_type']),
+                'status': status_labels.get(row['status'], row['status']),
+                'status_code': row['status'],
+                'entry_count': row['entry_count'],
+                'recent_entries_count': row['recent_entries_count'],
+                'stock_count': row['stock_count'],
+                'is_favorite': row['is_favorite'],
+                'updated_at': row['updated_at'].isoformat(),
+                'tags': notebook_tags,
+                'url': detail_url(row['pk']),
+                'highlight': SearchResultSerializer.highlight(row, notebook_tags, terms) if terms else {},
+            })
+        return results
+
+    @staticmethod
+    def highlight(row, tags, terms):
+        """検索語が一致した項目（タイトル・説明・タグ）"""
+        highlight = {}
+        if any(term in row['title'].lower() for term in terms):
+            highlight['title'] = True
+        description = row['description'].lower()
+        if description and any(term in description for term in terms):
+            highlight['description'] = True
+        if any(term in tag['name'].lower() for tag in tags for term in terms):
+            highlight['tags'] = True
+        return highlight
+
+    @staticmethod
+    def entry_values(queryset):
+        """エントリー検索結果に必要な列のみを取得するクエリセット"""
+        return queryset.values(*SearchResultSerializer.ENTRY_FIELDS)
+
+    @staticmethod
+    def entry_rows(rows):
+        """エントリーの行をAjax応答用の辞書に変換"""
+        rows = list(rows)
+        tags = tag_map(Entry.tags.through, 'entry', [row['pk'] for row in rows])
+        type_labels = SearchResultSerializer.ENTRY_TYPE_LABELS
+
+        results = []
+        for row in rows:
+            stock_code, company_name = row['stock_code'], row['company_name']
+            if stock_code and company_name:
+                stock_display = f"{stock_code} {company_name}"
+            else:
+                stock_display = stock_code or company_name or "銘柄未設定"
+            sub_notebook_id = row['sub_notebook_id']
+
+            results.append({
+                'id': str(row['pk']),
+                'title': row['title'],
+                'entry_type': row['entry_type'],
+                'entry_type_display': type_labels.get(row['entry_type'], row['entry_type']),
+                'stock_code': stock_code,
+                'company_name': company_name,
+                'stock_display': stock_display,
+                'sub_notebook': {
+                    'id': str(sub_notebook_id) if sub_notebook_id else None,
+                    'title': row['sub_notebook__title'],
+                },
+                'is_important': row['is_important'],
+                'is_bookmarked': row['is_bookmarked'],
+                'created_at': row['created_at'].isoformat(),
+                'tags': tags.get(row['pk'], []),
+                'content_preview': row['content_preview'] or Entry.PREVIEW_FALLBACK,
+            })
+        return results
+
+
+class _Echo:
+    """csv.writer の出力をそのまま返す疑似ファイル"""
+    
+    def write(self, value):
+        return value
+
+
+class EntryExportService:
+    """エントリーのエクスポート（NDJSON / CSV のストリーミング出力）
+    
+    iterator(chunk_size=...) でチャンクごとに読み込み、タグもチャンク単位で
+    プリフェッチするため、ノートブックの件数に関係なくメモリ使用量は一定。
+    """
+    
+    FORMATS = ('ndjson', 'csv')
+    CHUNK_SIZE = 500
+    CSV_COLUMNS = [
+        'id', 'notebook', 'sub_notebook', 'entry_type', 'title', 'stock_code',
+        'company_name', 'event_date', 'is_important', 'is_bookmarked',
+        'tags', 'created_at', 'updated_at', 'content',
+    ]
+    
+    @staticmethod
+    def get_queryset(user, notebook=None):
+        """エクスポート対象のエントリー（ノートブック指定なしの場合はユーザーの全ノートブック）"""
+        queryset = Entry.objects.filter(user=user)
+        if notebook is not None:
+            queryset = queryset.filter(notebook=notebook)
+        return queryset.select_related('notebook', 'sub_notebook').prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.only('id', 'name'))
+        ).order_by('notebook_id', 'created_at', 'id')
+    
+    @staticmethod
+    def serialize(entry):
+        """エクスポート用にエントリーを辞書化"""
+        return {
+            'id': str(entry.pk),
+            'notebook': entry.notebook.title,
+            'sub_notebook': entry.sub_notebook.title if entry.sub_notebook else '',
+            'entry_type': entry.entry_type,
+            'title': entry.title,
+            'stock_code': entry.stock_code,
+            'company_name': entry.company_name,
+            'event_date': entry.event_date.isoformat() if entry.event_date else None,
+            'is_important': entry.is_important,
+            'is_bookmarked': entry.is_bookmarked,
+            'tags': [tag.name for tag in entry.tags.all()],
+            'created_at': entry.created_at.isoformat(),
+            'updated_at': entry.updated_at.isoformat(),
+            'content': entry.content,
+        }
+    
+    @staticmethod
+    def iter_ndjson(queryset):
+        """1行1エントリーのJSONを順に生成"""
+        for entry in queryset.iterator(chunk_size=EntryExportService.CHUNK_SIZE):
+            data = EntryExportService.serialize(entry)
+            yield json.dumps(data, ensure_ascii=False, cls=DjangoJSONEncoder) + '\n'
+    
+    @staticmethod
+    def iter_csv(queryset):
+        """ヘッダー行に続けてCSVの行を順に生成（Excel向けにBOM付き）"""
+        writer = csv.writer(_Echo())
+        yield '\ufeff' + writer.writerow(EntryExportService.CSV_COLUMNS)
+        for entry in queryset.iterator(chunk_size=EntryExportService.CHUNK_SIZE):
+            data = EntryExportService.serialize(entry)
+            data['tags'] = ','.join(data['tags'])
+            data['content'] = json.dumps(data['content'], ensure_ascii=False, cls=DjangoJSONEncoder)
+            yield writer.writerow([
+                '' if data[column] is None else data[column]
+                for column in EntryExportService.CSV_COLUMNS
+            ])
+    
+    @staticmethod
+    def stream(queryset, export_format='ndjson', compress=False):
+        """エクスポート内容をバイト列のチャンクとして生成
+        
+        Args:
+            export_format: 'ndjson' または 'csv'
+            compress: True の場合は gzip 形式で出力
+        """
+        if export_format not in EntryExportService.FORMATS:
+            raise ValueError(f'unsupported format: {export_format}')
+        
+        if export_format == 'csv':
+            lines = EntryExportService.iter_csv(queryset)
+        else:
+            lines = EntryExportService.iter_ndjson(queryset)
+        
+        if not compress:
+            for line in lines:
+                yield line.encode('utf-8')
+            return
+        
+        compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+        for line in lines:
+            chunk = compressor.compress(line.encode('utf-8'))
+            if chunk:
+                yield chunk
+        yield compressor.flush()
+
+
+class EntryImportService:
+    """エントリーの一括インポート（EntryExportService の出力形式を読み込む）
+    
+    ファイルを1行ずつ読み込み、BATCH_SIZE 件ごとに検証・タグ/サブノートの
+    解決・bulk_create を1トランザクションで行う。行ごとのシグナルは発生しないため、
+    エントリー数・統計・日次集計・タグ使用回数は最後に一度だけ反映する。
+    """
+    
+    FORMATS = EntryExportService.FORMATS
+    BATCH_SIZE = 500
+    MAX_ERRORS = 100  # 結果に含めるエラーの最大件数
+    TRUE_VALUES = {True, 'true', 'True', 'TRUE', '1', 1}
+    
+    @staticmethod
+    def read_rows(file, import_format='ndjson'):
+        """テキストファイルから (行番号, データ) を順に生成（解釈できない行のデータは None）"""
+        if import_format == 'csv':
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        
+        for line_number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except json.JSONDecodeError:
+                yield line_number, None
+    
+    @staticmethod
+    def clean_row(data):
+        """1行分のデータを検証して整形
+        
+        Returns:
+            tuple: (整形済みデータ, None) またはエラー時 (None, エラーメッセージ)
+        """
+        if not isinstance(data, dict):
+            return None, 'JSONとして解釈できません'
+        
+        entry_type = data.get('entry_type') or ''
+        if entry_type not in dict(Entry.ENTRY_TYPE_CHOICES):
+            return None, f'エントリータイプが不正です: {entry_type}'
+        
+        title = (data.get('title') or '').strip()
+        if not title:
+            return None, 'タイトルは必須です'
+        if len(title) > 200:
+            return None, 'タイトルは200文字以内で指定してください'
+        
+        stock_code = (data.get('stock_code') or '').strip()
+        company_name = (data.get('company_name') or '').strip()
+        if len(stock_code) > 10 or len(company_name) > 100:
+            return None, '銘柄コードまたは企業名が長すぎます'
+        
+        content = data.get('content') or {}
+        if isinstance(content, str):
+            try:
+                content = json.loads(content)
+            except json.JSONDecodeError:
+                return None, 'コンテンツがJSONとして解釈できません'
+        if not isinstance(content, dict):
+            return None, 'コンテンツはJSONオブジェクトで指定してください'
+        
+        event_date = data.get('event_date') or None
+        if event_date:
+            try:
+                event_date = parse_date(str(event_date))
+            except ValueError:
+                event_date = None
+            if event_date is None:
+                return None, 'イベント日が不正です'
+        
+        tags = data.get('tags') or []
+        if isinstance(tags, str):
+            tags = tags.split(',')
+        tags = list(dict.fromkeys(
+            Tag.normalize_name(str(name).strip()) for name in tags if str(name).strip()
+        ))
+        if any(len(name) > 50 for name in tags):
+            return None, 'タグ名は50文字以内で指定してください'
+        
+        return {
+            'entry_type': entry_type,
+            'title': title,
+            'stock_code': stock_code,
+            'company_name': company_name,
+            'event_date': event_date,
+            'is_important': data.get('is_important') in EntryImportService.TRUE_VALUES,
+            'is_bookmarked': data.get('is_bookmarked') in EntryImportService.TRUE_VALUES,
+            'content': ContentHelper.format_json_content(content, entry_type),
+            'sub_notebook': (data.get('sub_notebook') or '').strip()[:200],
+            'tags': tags,
+        }, None
+    
+    @staticmethod
+    def _resolve_sub_notebooks(notebook, titles):
+        """サブノートをタイトルでまとめて取得（存在しないものは作成）"""
+        if not titles:
+            return {}
+        sub_notebooks = {
+            sub.title: sub for sub in SubNotebook.objects.filter(notebook=notebook, title__in=titles)
+        }
+        missing = [SubNotebook(notebook=notebook, title=title) for title in titles if title not in sub_notebooks]
+        for sub in SubNotebook.objects.bulk_create(missing):
+            sub_notebooks[sub.title] = sub
+        return sub_notebooks
+    
+    @staticmethod
+    def _resolve_tags(user, names):
+        """タグを名前でまとめて取得（存在しないものは作成）し {名前: ID} を返す"""
+        if not names:
+            return {}
+        tag_ids = dict(Tag.objects.filter(user=user, name__in=names).values_list('name', 'id'))
+        missing = [name for name in names if name not in tag_ids]
+        if missing:
+            # bulk_create は Tag.save() を通らないため既定色をここで設定する
+            Tag.objects.bulk_create([Tag(user=user, name=name, color=Tag.DEFAULT_COLOR) for name in missing])
+            # 一部のDBでは bulk_create で主キーが返らないため取得し直す
+            tag_ids.update(Tag.objects.filter(user=user, name__in=missing).values_list('name', 'id'))
+        return tag_ids
+    
+    @staticmethod
+    def import_batch(notebook, rows, tally):
+        """検証済みの行をまとめて作成（1トランザクション）
+        
+        Args:
+            rows: clean_row() の結果のリスト
+            tally: 最後に反映する集計（この関数内で加算する）
+        
+        Returns:
+            int: 作成したエントリー数
+        """
+        with transaction.atomic():
+            sub_notebooks = EntryImportService._resolve_sub_notebooks(
+                notebook, {row['sub_notebook'] for row in rows if row['sub_notebook']}
+            )
+            tag_ids = EntryImportService._resolve_tags(
+                notebook.user, {name for row in rows for name in row['tags']}
+            )
+            
+            entries = Entry.objects.bulk_create([
+                Entry(
+                    notebook=notebook,
+                    # bulk_create は save() を経由しないため所有者を明示する
+                    user_id=notebook.user_id,
+                    sub_notebook=sub_notebooks.get(row['sub_notebook']),
+                    entry_type=row['entry_type'],
+                    title=row['title'],
+                    stock_code=row['stock_code'],
+                    company_name=row['company_name'],
+                    event_date=row['event_date'],
+                    is_important=row['is_important'],
+                    is_bookmarked=row['is_bookmarked'],
+                    content=row['content'],
+                    content_preview=Entry.build_content_preview(row['entry_type'], row['content']),
+                )
+                for row in rows
+            ])
+            
+            through_rows = [
+                Entry.tags.through(entry_id=entry.pk, tag_id=tag_ids[name])
+                for entry, row in zip(entries, rows)
+                for name in row['tags']
+            ]
+            Entry.tags.through.objects.bulk_create(through_rows, batch_size=EntryImportService.BATCH_SIZE)
+        
+        for entry in entries:
+            tally['daily'][(timezone.localdate(entry.created_at), entry.entry_type)] += 1
+            tally['monthly'][get_entry_month(entry.created_at)] += 1
+        for through in through_rows:
+            tally['tags'][through.tag_id] += 1
+        return len(entries)
+    
+    @staticmethod
+    def reconcile(notebook, tally):
+        """インポートしたエントリー分の派生データをまとめて反映"""
+        user_id = notebook.user_id
+        total = sum(tally['monthly'].values())
+        
+        if total:
+            outbox.publish('notebook.entry_count', user_id, {'notebook_id': str(notebook.pk)})
+            ProfileStatisticsService.record(user_id, entries=total)
+            for month, count in tally['monthly'].items():
+                DashboardStatsService.record(user_id, entries=count, month=month)
+            for (day, entry_type), count in tally['daily'].items():
+                DailyActivityService.record(user_id, day, entry_type, count)
+        
+        if tally['tags']:
+            by_count = defaultdict(list)
+            for tag_id, count in tally['tags'].items():
+                by_count[count].append(tag_id)
+            for count, tag_ids in by_count.items():
+                outbox.publish('tag.usage', user_id, {'tag_ids': sorted(tag_ids), 'delta': count})
+            TagTrendService.record(user_id, tag_ids=sorted(tally['tags']))
+        
+        invalidate_user_cache(user_id)
+        invalidate_notebook_cache(notebook.pk)
+    
+    @staticmethod
+    def import_file(notebook, file, import_format='ndjson', batch_size=BATCH_SIZE):
+        """ファイルからノートブックにエントリーを一括インポート
+        
+        Args:
+            file: テキストモードのファイル（1行ずつ読み込むため全体を読み込まない）
+        
+        Returns:
+            dict: created / error_count / errors（行番号とメッセージ）/ elapsed / rows_per_second
+        """
+        if import_format not in EntryImportService.FORMATS:
+            raise ValueError(f'unsupported format: {import_format}')
+        
+        started = time.monotonic()
+        tally = {'daily': Counter(), 'monthly': Counter(), 'tags': Counter()}
+        created, error_count, errors = 0, 0, []
+        batch = []
+        
+        try:
+            for line_number, data in EntryImportService.read_rows(file, import_format):
+                row, error = EntryImportService.clean_row(data)
+                if error:
+                    error_count += 1
+                    if len(errors) < EntryImportService.MAX_ERRORS:
+                        errors.append({'line': line_number, 'error': error})
+                    continue
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    created += EntryImportService.import_batch(notebook, batch, tally)
+                    batch = []
+            if batch:
+                created += EntryImportService.import_batch(notebook, batch, tally)
+        finally:
+            # 途中で失敗しても、コミット済みのバッチ分は反映する
+            EntryImportService.reconcile(notebook, tally)
+        
+        elapsed = time.monotonic() - started
+        return {
+            'created': created,
+            'error_count': error_count,
+            'errors': errors,
+            'elapsed': round(elapsed, 3),
+            'rows_per_second': round((created + error_count) / elapsed, 1) if elapsed else 0.0,
+        }
+
+
+class EntryBulkService:
+    """エントリーの一括操作（ブックマーク・重要フラグ・サブノート移動・削除）
+    
+    選択されたエントリーを1回のUPDATE（削除は論理削除のUPDATE）で更新する。
+    行ごとの save() やシグナルを経由しないため、ノート統計・ユーザー単位の
+    キャッシュはバッチごとに1回だけ無効化する。削除時のエントリー数・
+    プロフィール・ダッシュボード統計は pre_soft_delete のシグナルでまとめて減算される。
+    """
+    
+    # アクション → (更新するフィールド, 値)
+    FLAG_ACTIONS = {
+        'bookmark': ('is_bookmarked', True),
+        'unbookmark': ('is_bookmarked', False),
+        'mark_important': ('is_important', True),
+        'unmark_important': ('is_important', False),
+    }
+    ACTIONS = (*FLAG_ACTIONS, 'move', 'delete')
+    ACTION_MESSAGES = {
+        'bookmark': 'ブックマークに追加しました',
+        'unbookmark': 'ブックマークから削除しました',
+        'mark_important': '重要に設定しました',
+        'unmark_important': '重要から外しました',
+        'move': '移動しました',
+        'delete': '削除しました',
+    }
+    MAX_ENTRIES = 1000
+    
+    @staticmethod
+    def parse_ids(entry_ids):
+        """エントリーIDのリストを検証（不正な場合は ValueError）"""
+        if not isinstance(entry_ids, list) or not entry_ids:
+            raise ValueError('エントリーが選択されていません')
+        if len(entry_ids) > EntryBulkService.MAX_ENTRIES:
+            raise ValueError(f'一度に操作できるエントリーは{EntryBulkService.MAX_ENTRIES}件までです')
+        try:
+            return {uuid.UUID(str(entry_id)) for entry_id in entry_ids}
+        except ValueError:
+            raise ValueError('エントリーIDが不正です')
+    
+    @staticmethod
+    def apply(user, entry_ids, action, sub_notebook_id=None):
+        """一括操作を実行
+        
+        Args:
+            sub_notebook_id: move の移動先（None の場合はサブノートから外す）
+        
+        Returns:
+            int: 更新（削除）したエントリー数
+        """
+        if action not in EntryBulkService.ACTIONS:
+            raise ValueError('無効なアクションです')
+        
+        entries = Entry.objects.filter(user=user, pk__in=EntryBulkService.parse_ids(entry_ids))
+        now = timezone.now()
+        
+        with transaction.atomic():
+            if action == 'move':
+                if sub_notebook_id:
+                    try:
+                        sub_notebook_id = uuid.UUID(str(sub_notebook_id))
+                    except ValueError:
+                        raise ValueError('移動先のサブノートが見つかりません')
+                    sub_notebook = SubNotebook.objects.filter(
+                        pk=sub_notebook_id, notebook__user=user
+                    ).only('pk', 'notebook_id').first()
+                    if sub_notebook is None:
+                        raise ValueError('移動先のサブノートが見つかりません')
+                    # サブノートは同じノートブック内のエントリーにのみ設定できる
+                    entries = entries.filter(notebook_id=sub_notebook.notebook_id).exclude(sub_notebook=sub_notebook)
+                else:
+                    sub_notebook = None
+                    entries = entries.filter(sub_notebook__isnull=False)
+                notebook_ids = set(entries.values_list('notebook_id', flat=True))
+                # 詳細表示のキャッシュは updated_at をキーにしているため更新する
+                count = entries.update(sub_notebook=sub_notebook, updated_at=now)
+            elif action == 'delete':
+                notebook_ids = set()  # 論理削除のシグナルで無効化される
+                count, _ = entries.delete()
+            else:
+                field, value = EntryBulkService.FLAG_ACTIONS[action]
+                entries = entries.exclude(**{field: value})
+                if field == 'is_important':
+                    notebook_ids = set(entries.values_list('notebook_id', flat=True))
+                    count = entries.update(is_important=value, updated_at=now)
+                else:
+                    # ブックマークは詳細表示のキャッシュキーに含まれ、ノート統計にも影響しない
+                    notebook_ids = set()
+                    count = entries.update(is_bookmarked=value)
+        
+        if count:
+            for notebook_id in notebook_ids:
+                invalidate_notebook_cache(notebook_id)
+            invalidate_user_cache(user.pk)
+        return count
@@ -1,3 +1,801 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from apps.accounts.models import UserProfile
+from apps.dashboard.models import DailyActivity
+from apps.notes.management.commands.benchmark_serializers import Command as BenchmarkCommand
+from apps.notes.models import Notebook, SubNotebook, Entry
+from apps.notes.services import EntryExportService, SearchResultSerializer, StockTimelineService
+from apps.tags.models import Tag
+from apps.tags.services import TagSerializer
 
-# Create your tests here.
+
+class NotebookChangeTrackingTests(TestCase):
+    """ノートブックの変更追跡と派生処理のスキップ"""
+
+    def setUp(self):
+        # エントリー数などの副作用はコミット時に反映される
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='tracker', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='高配当株ウォッチ')
+            self._create_entries()
+        self.notebook = Notebook.objects.get(pk=self.notebook.pk)
+
+    def _create_entries(self):
+        for i in range(3):
+            Entry.objects.create(
+                notebook=self.notebook,
+                entry_type='MEMO',
+                title=f'メモ{i}',
+                content={'observation': f'観察{i}'},
+            )
+
+    def test_changed_fields_detects_only_modified_fields(self):
+        self.assertEqual(self.notebook.get_changed_fields(), set())
+
+        self.notebook.title = '高配当株ウォッチ2025'
+        self.assertEqual(self.notebook.get_changed_fields(), {'title'})
+
+        self.notebook.save()
+        self.assertEqual(self.notebook.changed_fields, {'title'})
+        self.assertEqual(self.notebook.get_changed_fields(), set())
+
+    def test_update_fields_save_keeps_other_pending_changes(self):
+        self.notebook.title = '未保存のタイトル'
+        self.notebook.is_favorite = True
+        self.notebook.save(update_fields=['is_favorite'])
+
+        self.assertEqual(self.notebook.changed_fields, {'is_favorite'})
+        self.assertEqual(self.notebook.get_changed_fields(), {'title'})
+
+    def test_entry_content_change_is_detected_in_place(self):
+        entry = Entry.objects.get(notebook=self.notebook, title='メモ0')
+        self.assertEqual(entry.get_changed_fields(), set())
+
+        entry.content['observation'] = '書き換え'
+        self.assertEqual(entry.get_changed_fields(), {'content'})
+        entry.save()
+        self.assertEqual(entry.content_preview, '書き換え')
+
+    def test_update_fields_save_is_single_query(self):
+        self.notebook.is_favorite = True
+        with self.assertNumQueries(1):
+            self.notebook.save(update_fields=['is_favorite'])
+
+    def test_title_edit_does_not_recount_entries(self):
+        self.notebook.title = '別タイトル'
+        with self.assertNumQueries(1):
+            self.notebook.save()
+
+    def test_toggle_favorite_query_count(self):
+        self.client.force_login(self.user)
+        url = reverse('notes:toggle_favorite', kwargs={'pk': self.notebook.pk})
+
+        # セッション・ユーザー取得、ノート取得、UPDATEのみ
+        with self.assertNumQueries(4):
+            response = self.client.post(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()['is_favorite'])
+        self.notebook.refresh_from_db()
+        self.assertTrue(self.notebook.is_favorite)
+        self.assertEqual(self.notebook.entry_count, 3)
+
+
+# キャッシュの読み書き自体がクエリとして数えられないよう、クエリ数のテストではメモリキャッシュを使う
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class EntryContentPreviewTests(TestCase):
+    """保存時に生成されるコンテンツプレビュー"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='preview', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='プレビューノート')
+
+    def _create(self, entry_type, content):
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = Entry.objects.create(notebook=self.notebook, entry_type=entry_type, title='プレビュー', content=content)
+        return Entry.objects.get(pk=entry.pk)
+
+    def test_preview_uses_type_specific_key(self):
+        self.assertEqual(self._create('GOAL', {'target_price': 3000}).get_content_preview(), '目標株価: 3000')
+        self.assertEqual(
+            self._create('NEWS', {'source': '日経', 'headline': '増配発表'}).get_content_preview(), '増配発表'
+        )
+
+    def test_long_preview_is_truncated(self):
+        entry = self._create('MEMO', {'observation': 'あ' * 150})
+        self.assertEqual(entry.get_content_preview(), 'あ' * 100 + '...')
+        self.assertEqual(entry.get_content_preview(max_length=10), 'あ' * 10 + '...')
+
+    def test_fallback_matches_previous_output(self):
+        # 表示できる文字列がない場合は従来の get_content_preview と同じ表示
+        self.assertEqual(self._create('ANALYSIS', {'summary': ''}).get_content_preview(), '詳細はクリックして確認')
+        self.assertEqual(self._create('MEMO', {}).get_content_preview(), 'コンテンツなし')
+
+    def test_list_preview_does_not_load_content(self):
+        self._create('ANALYSIS', {'summary': ''})
+        entry = Entry.objects.defer('content').get(notebook=self.notebook)
+        with self.assertNumQueries(0):
+            self.assertEqual(entry.get_list_preview(), Entry.PREVIEW_FALLBACK)
+
+
+class SearchResultSerializerTests(TestCase):
+    """values() 経由の検索Ajaxシリアライズが変更前の処理と同じ出力になること"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='serializer', password='password123')
+            tags = [
+                Tag.objects.create(user=self.user, name='#高配当', description='配当重視', usage_count=2),
+                Tag.objects.create(user=self.user, name='#半導体', color='#ff0000'),
+            ]
+            notebook = Notebook.objects.create(user=self.user, title='配当ノート', description='高配当株を記録')
+            notebook.tags.set(tags)
+            Notebook.objects.create(user=self.user, title='空のノート')
+            sub_notebook = SubNotebook.objects.create(notebook=notebook, title='四半期')
+            entries = [
+                ('MEMO', {'observation': '観察' * 60}, '8058', '三菱商事', sub_notebook),
+                ('GOAL', {'target_price': 3000}, '8058', '', None),
+                ('NEWS', {'headline': '増配を発表'}, '', '', None),
+                ('ANALYSIS', {'summary': ''}, '', '三井物産', None),
+            ]
+            for entry_type, content, stock_code, company_name, sub in entries:
+                entry = Entry.objects.create(
+                    notebook=notebook, sub_notebook=sub, entry_type=entry_type, title=entry_type,
+                    content=content, stock_code=stock_code, company_name=company_name,
+                )
+                entry.tags.set(tags[:1])
+        self.legacy = BenchmarkCommand()
+
+    def test_notebook_rows_match_previous_payload(self):
+        queryset = Notebook.objects.filter(user=self.user).annotate(**self.legacy._notebook_annotations())
+        with self.assertNumQueries(2):
+            rows = SearchResultSerializer.notebook_rows(SearchResultSerializer.notebook_values(queryset), '配当')
+        self.assertEqual(rows, self.legacy._legacy_notebooks(self.user, 20, '配当'))
+
+    def test_entry_rows_match_previous_payload(self):
+        queryset = Entry.objects.filter(user=self.user).order_by('-created_at')
+        with self.assertNumQueries(2):
+            rows = SearchResultSerializer.entry_rows(SearchResultSerializer.entry_values(queryset))
+        self.assertEqual(rows, self.legacy._legacy_entries(self.user, 20))
+
+    def test_tag_rows_match_previous_payload(self):
+        queryset = Tag.objects.get_for_user(self.user).order_by('-usage_count', 'name')
+        with self.assertNumQueries(1):
+            rows = TagSerializer.rows(queryset, with_details=True, with_urls=True)
+        self.assertEqual(rows, self.legacy._legacy_tags(self.user, 20))
+
+
+class NotebookDetailQueryBudgetTests(TestCase):
+    """ノート詳細画面のクエリ数（エントリー数に依存しないこと）"""
+
+    # セッション・ユーザー・ETag用のデータ世代・ノート・ノートのタグ・ページ件数・プロフィール・
+    # エントリー・エントリーのタグ
+    CACHED_QUERIES = 9
+    # 上記 + 統計の集計・銘柄一覧・サブノート一覧
+    UNCACHED_QUERIES = CACHED_QUERIES + 3
+
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='reader', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='決算分析ノート')
+            self.sub_notebook = SubNotebook.objects.create(notebook=self.notebook, title='2025年度')
+            self._create_entries(12)
+        self.client.force_login(self.user)
+        self.url = reverse('notes:detail', kwargs={'pk': self.notebook.pk})
+
+    def _create_entries(self, count):
+        for i in range(count):
+            Entry.objects.create(
+                notebook=self.notebook,
+                sub_notebook=self.sub_notebook if i % 2 else None,
+                entry_type='MEMO',
+                title=f'メモ{i}',
+                stock_code=f'{7200 + i % 3}',
+                is_important=i % 4 == 0,
+                content={'observation': f'観察{i}'},
+            )
+
+    def test_stats_are_aggregated(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.context['stats'], {
+            'total_entries': 12,
+            'recent_entries': 12,
+            'important_entries': 3,
+            'stock_count': 3,
+        })
+        self.assertEqual(
+            [sub.get_entries_count() for sub in response.context['sub_notebooks']], [6]
+        )
+
+    def test_query_budget(self):
+        with self.assertNumQueries(self.UNCACHED_QUERIES):
+            self.client.get(self.url)
+        with self.assertNumQueries(self.CACHED_QUERIES):
+            self.client.get(self.url)
+
+    def test_query_budget_does_not_grow_with_entries(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_entries(40)
+
+        with self.assertNumQueries(self.UNCACHED_QUERIES):
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['stats']['total_entries'], 52)
+
+    def test_entry_changes_invalidate_stats(self):
+        self.client.get(self.url)
+
+        entry = Entry.objects.filter(notebook=self.notebook, is_important=False).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.is_important = True
+            entry.save()
+        self.assertEqual(self.client.get(self.url).context['stats']['important_entries'], 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry.delete()
+        self.assertEqual(self.client.get(self.url).context['stats']['total_entries'], 11)
+
+
+class NotesApiQueryBudgetTests(TestCase):
+    """ノートブック・エントリーAPIのクエリ数（件数に依存しないこと）と疎なフィールドセット"""
+
+    # セッション・ユーザー・一覧（カーソル方式のためCOUNTなし）
+    BASE_QUERIES = 3
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='api', password='password123')
+            other = User.objects.create_user(username='other', password='password123')
+            Notebook.objects.create(user=other, title='他人のノート')
+            self.tag = Tag.objects.create(user=self.user, name='#半導体')
+            for i in range(3):
+                notebook = Notebook.objects.create(user=self.user, title=f'ノート{i}')
+                notebook.tags.add(self.tag)
+                SubNotebook.objects.create(notebook=notebook, title='2025年度')
+                for j in range(5):
+                    entry = Entry.objects.create(
+                        notebook=notebook,
+                        entry_type='MEMO',
+                        title=f'メモ{i}-{j}',
+                        content={'observation': f'観察{j}'},
+                    )
+                    entry.tags.add(self.tag)
+        self.client.force_login(self.user)
+
+    def test_notebook_list_query_budget(self):
+        # 上記 + タグ・サブノートのプリフェッチ
+        with self.assertNumQueries(self.BASE_QUERIES + 2):
+            response = self.client.get(reverse('notes_api:notebook-list'))
+
+        results = response.json()['results']
+        self.assertEqual(len(results), 3)
+        self.assertEqual(results[0]['tags'][0]['name'], '#半導体')
+        self.assertEqual(results[0]['sub_notebooks'][0]['title'], '2025年度')
+
+    def test_notebook_sparse_fields_skip_prefetch(self):
+        with self.assertNumQueries(self.BASE_QUERIES):
+            response = self.client.get(reverse('notes_api:notebook-list'), {'fields': 'id,title'})
+
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'title'})
+
+    def test_notebook_detail_query_budget(self):
+        notebook = Notebook.objects.filter(user=self.user).first()
+        with self.assertNumQueries(self.BASE_QUERIES + 2):
+            response = self.client.get(reverse('notes_api:notebook-detail', kwargs={'pk': notebook.pk}))
+        self.assertEqual(response.json()['title'], notebook.title)
+
+    def test_entry_list_query_budget(self):
+        # 上記 + タグのプリフェッチ
+        with self.assertNumQueries(self.BASE_QUERIES + 1):
+            response = self.client.get(reverse('notes_api:entry-list'), {'page_size': 10})
+
+        data = response.json()
+        self.assertEqual(len(data['results']), 10)
+        self.assertIsNotNone(data['next'])
+
+    def test_entry_sparse_fields_do_not_fetch_content(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('notes_api:entry-list'), {'fields': 'id,title,content_preview'}
+            )
+
+        self.assertEqual(len(queries), self.BASE_QUERIES)
+        self.assertNotIn('"content"', queries[-1]['sql'])
+        result = response.json()['results'][0]
+        self.assertEqual(set(result), {'id', 'title', 'content_preview'})
+        self.assertTrue(result['content_preview'].startswith('観察'))
+
+    def test_cursor_pagination_walks_all_entries(self):
+        url, seen = reverse('notes_api:entry-list'), []
+        params = {'page_size': 4, 'fields': 'id'}
+        while url:
+            data = self.client.get(url, params).json()
+            seen.extend(result['id'] for result in data['results'])
+            url, params = data['next'], None
+        self.assertEqual(len(seen), 15)
+        self.assertEqual(len(set(seen)), 15)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(reverse('notes_api:entry-list'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_other_users_data_is_hidden(self):
+        other = Notebook.objects.get(title='他人のノート')
+        response = self.client.get(reverse('notes_api:notebook-detail', kwargs={'pk': other.pk}))
+        self.assertEqual(response.status_code, 404)
+
+
+class ConditionalGetTests(TestCase):
+    """ETagによる条件付きGET（データ世代はDBに保持され全ワーカーで共有される）"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='etag', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='ETagノート')
+        self.client.force_login(self.user)
+        self.url = reverse('notes:detail', kwargs={'pk': self.notebook.pk})
+        # 初回表示でCSRFクッキーが発行されETagが変わるため、発行後の状態から始める
+        self.client.get(self.url)
+
+    def test_unchanged_page_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_advances_generation_after_commit(self):
+        etag = self.client.get(self.url)['ETag']
+        generation = UserProfile.objects.get(user=self.user).data_generation
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Entry.objects.create(
+                notebook=self.notebook, entry_type='MEMO', title='追記', content={'observation': '追記'}
+            )
+
+        self.assertGreater(UserProfile.objects.get(user=self.user).data_generation, generation)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_profile_save_keeps_generation(self):
+        # 書き込み前に読み込んだプロフィール・ユーザーを保存しても、データ世代は巻き戻らない
+        etag = self.client.get(self.url)['ETag']
+        stale = UserProfile.objects.get(user=self.user)
+        generation = stale.data_generation
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Entry.objects.create(
+                notebook=self.notebook, entry_type='MEMO', title='追記', content={'observation': '追記'}
+            )
+        User.objects.get(pk=self.user.pk).save()
+        stale.bio = '自己紹介'
+        stale.save()
+
+        self.assertGreater(UserProfile.objects.get(user=self.user).data_generation, generation)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+
+class SoftDeleteTests(TestCase):
+    """論理削除と派生カウンター・物理削除（purge_deleted）"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='softdelete', password='password123')
+            self.tag = Tag.objects.create(user=self.user, name='#高配当')
+            self.notebook = Notebook.objects.create(user=self.user, title='削除するノート')
+            self.kept = Notebook.objects.create(user=self.user, title='残すノート')
+            self.notebook.tags.add(self.tag)
+            self.kept.tags.add(self.tag)
+            for notebook in (self.notebook, self.kept):
+                for i in range(2):
+                    entry = Entry.objects.create(
+                        notebook=notebook, entry_type='MEMO', title=f'メモ{i}', content={'observation': '観察'}
+                    )
+                    entry.tags.add(self.tag)
+
+    def _delete(self, obj):
+        with self.captureOnCommitCallbacks(execute=True):
+            obj.delete()
+
+    def _usage(self):
+        return Tag.all_objects.get(pk=self.tag.pk).usage_count
+
+    def test_soft_deleted_rows_are_hidden_but_kept(self):
+        self._delete(self.notebook)
+
+        self.assertFalse(Notebook.objects.filter(pk=self.notebook.pk).exists())
+        self.assertTrue(Notebook.all_objects.get(pk=self.notebook.pk).is_deleted)
+        # 配下のエントリーもまとめて論理削除される
+        self.assertFalse(Entry.objects.filter(notebook=self.notebook).exists())
+        self.assertEqual(Entry.all_objects.filter(notebook=self.notebook, deleted_at__isnull=False).count(), 2)
+
+    def test_soft_delete_adjusts_counters(self):
+        self.assertEqual(self._usage(), 6)
+        self._delete(Entry.objects.filter(notebook=self.kept).first())
+
+        self.assertEqual(Notebook.objects.get(pk=self.kept.pk).entry_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=self.user).total_entries, 3)
+        self.assertEqual(self._usage(), 5)
+
+        self._delete(self.notebook)
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.total_notebooks, profile.total_entries), (1, 1))
+        self.assertEqual(self._usage(), 2)
+
+    def test_tag_clear_after_notebook_delete_is_not_counted_twice(self):
+        self._delete(self.notebook)
+        self.assertEqual(self._usage(), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.notebook_set.clear()
+        self.assertEqual(self._usage(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.entry_set.clear()
+        self.assertEqual(self._usage(), 0)
+
+    def test_purge_deleted_removes_expired_rows_in_chunks(self):
+        self._delete(self.notebook)
+        recent = Entry.objects.filter(notebook=self.kept).first()
+        self._delete(recent)
+        # 保持期間を過ぎた行と期間内の行
+        expired = timezone.now() - timedelta(days=10)
+        Notebook.all_objects.filter(pk=self.notebook.pk).update(deleted_at=expired)
+        Entry.all_objects.filter(notebook=self.notebook).update(deleted_at=expired)
+
+        call_command('purge_deleted', '--days', '7', '--chunk-size', '1', stdout=StringIO())
+
+        self.assertFalse(Notebook.all_objects.filter(pk=self.notebook.pk).exists())
+        self.assertFalse(Entry.all_objects.filter(notebook_id=self.notebook.pk).exists())
+        self.assertFalse(Notebook.tags.through.objects.filter(notebook_id=self.notebook.pk).exists())
+        self.assertTrue(Entry.all_objects.filter(pk=recent.pk).exists())
+        # 論理削除時に反映済みのため、物理削除で統計・使用回数は変わらない
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual((profile.total_notebooks, profile.total_entries), (1, 1))
+        self.assertEqual(self._usage(), 2)
+
+
+class StockTimelineTests(TestCase):
+    """銘柄タイムラインのキーセットページネーション"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='timeline', password='password123')
+            other = User.objects.create_user(username='other', password='password123')
+            notebooks = [Notebook.objects.create(user=self.user, title=f'ノート{i}') for i in range(2)]
+            for i in range(5):
+                Entry.objects.create(
+                    notebook=notebooks[i % 2], entry_type='MEMO', title=f'メモ{i}',
+                    content={'observation': '観察'}, stock_code='8058',
+                )
+            Entry.objects.create(
+                notebook=notebooks[0], entry_type='MEMO', title='別銘柄', content={'observation': '観察'}, stock_code='7203'
+            )
+            other_notebook = Notebook.objects.create(user=other, title='他人のノート')
+            Entry.objects.create(
+                notebook=other_notebook, entry_type='MEMO', title='他人', content={'observation': '観察'}, stock_code='8058'
+            )
+        # 作成日時が同じエントリーは id で順序が決まる
+        same_time = timezone.now() - timedelta(hours=1)
+        Entry.objects.filter(title__in=['メモ1', 'メモ2', 'メモ3']).update(created_at=same_time)
+        self.client.force_login(self.user)
+        self.url = reverse('notes:stock_timeline_api', kwargs={'stock_code': '8058'})
+
+    def test_pages_walk_all_entries_in_order(self):
+        expected = [
+            str(pk) for pk in Entry.objects.filter(user=self.user, stock_code='8058')
+            .order_by('-created_at', '-id').values_list('pk', flat=True)
+        ]
+
+        seen, cursor = [], None
+        while True:
+            params = {'page_size': 2, **({'cursor': cursor} if cursor else {})}
+            data = self.client.get(self.url, params).json()
+            self.assertLessEqual(len(data['results']), 2)
+            seen.extend(result['id'] for result in data['results'])
+            cursor = data['next_cursor']
+            self.assertEqual(data['has_next'], cursor is not None)
+            if not cursor:
+                break
+
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 5)
+
+    def test_bad_cursor_is_rejected(self):
+        for cursor in ('not-base64!', 'YWJj', StockTimelineService.encode_cursor(Entry(created_at=timezone.now(), id=None))):
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(response.status_code, 400)
+            self.assertFalse(response.json()['success'])
+
+        response = self.client.get(self.url, {'page_size': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+        page_url = reverse('notes:stock_timeline', kwargs={'stock_code': '8058'})
+        response = self.client.get(page_url, {'cursor': 'YWJj'})
+        self.assertRedirects(response, page_url)
+
+
+class EntryExportTests(TestCase):
+    """エントリーのストリーミングエクスポート（NDJSON / CSV / gzip）"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='exporter', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='エクスポート')
+            other_notebook = Notebook.objects.create(user=self.user, title='別ノート')
+            tag = Tag.objects.create(user=self.user, name='#高配当')
+            for i in range(3):
+                entry = Entry.objects.create(
+                    notebook=self.notebook, entry_type='MEMO', title=f'メモ{i}',
+                    content={'observation': f'観察{i}, "引用"'}, stock_code='8058',
+                )
+                entry.tags.add(tag)
+            Entry.objects.create(
+                notebook=other_notebook, entry_type='MEMO', title='対象外', content={'observation': '観察'}
+            )
+            Entry.objects.filter(title='メモ2').first().delete()
+        self.client.force_login(self.user)
+        self.url = reverse('notes:export', kwargs={'pk': self.notebook.pk})
+        self.expected_ids = {str(pk) for pk in Entry.objects.filter(notebook=self.notebook).values_list('pk', flat=True)}
+
+    def _get(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson_export_contains_notebook_entries(self):
+        response, body = self._get()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        self.assertEqual({row['id'] for row in rows}, self.expected_ids)
+        self.assertEqual(rows[0]['notebook'], 'エクスポート')
+        self.assertEqual(rows[0]['tags'], ['#高配当'])
+        self.assertEqual(rows[0]['content'], {'observation': '観察0, "引用"'})
+
+    def test_csv_export_contains_notebook_entries(self):
+        response, body = self._get(format='csv')
+
+        self.assertTrue(body.startswith('\ufeff'.encode()))
+        rows = list(csv.DictReader(io.StringIO(body.decode('utf-8-sig'))))
+        self.assertEqual(list(rows[0]), EntryExportService.CSV_COLUMNS)
+        self.assertEqual({row['id'] for row in rows}, self.expected_ids)
+        self.assertEqual(json.loads(rows[0]['content']), {'observation': '観察0, "引用"'})
+        self.assertEqual(rows[0]['is_important'], 'False')
+
+    def test_gzip_export_matches_uncompressed(self):
+        for export_format in EntryExportService.FORMATS:
+            response, body = self._get(format=export_format, gzip='1')
+            self.assertEqual(response['Content-Type'], 'application/gzip')
+            self.assertIn(f'.{export_format}.gz"', response['Content-Disposition'])
+            self.assertEqual(gzip.decompress(body), self._get(format=export_format)[1])
+
+    def test_export_command_writes_gzip_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'entries.ndjson.gz')
+            call_command(
+                'export_entries', '--user', 'exporter', '--notebook', str(self.notebook.pk),
+                '--gzip', '--output', path, stderr=StringIO(),
+            )
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                rows = [json.loads(line) for line in f]
+        self.assertEqual({row['id'] for row in rows}, self.expected_ids)
+
+    def test_invalid_requests_are_rejected(self):
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+
+        other = User.objects.create_user(username='other', password='password123')
+        other_notebook = Notebook.objects.create(user=other, title='他人のノート')
+        response = self.client.get(reverse('notes:export', kwargs={'pk': other_notebook.pk}))
+        self.assertEqual(response.status_code, 404)
+
+
+class EntryImportTests(TestCase):
+    """エントリーの一括インポートと派生データの反映"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='importer', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='インポート')
+            self.tag = Tag.objects.create(user=self.user, name='#高配当')
+        self.client.force_login(self.user)
+
+    def _write(self, directory, name, lines):
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        return path
+
+    def _import(self, path, *args):
+        out, err = StringIO(), StringIO()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('import_entries', path, '--notebook', str(self.notebook.pk), *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_batched_import_reconciles_counters(self):
+        rows = [
+            {'entry_type': 'MEMO', 'title': f'メモ{i}', 'content': {'observation': f'観察{i}'},
+             'tags': ['高配当', '#新規タグ', '新規タグ'], 'sub_notebook': '四半期'}
+            for i in range(5)
+        ]
+        rows.append({'entry_type': 'UNKNOWN', 'title': '不正なタイプ'})
+        with tempfile.TemporaryDirectory() as directory:
+            path = self._write(directory, 'entries.ndjson', [json.dumps(row, ensure_ascii=False) for row in rows] + ['{'])
+            out, err = self._import(path, '--batch-size', '2')
+
+        self.assertIn('5件作成 / 2件エラー', out)
+        self.assertIn('6行目: エントリータイプが不正です: UNKNOWN', err)
+        self.assertIn('7行目: JSONとして解釈できません', err)
+
+        entries = Entry.objects.filter(notebook=self.notebook)
+        self.assertEqual(entries.count(), 5)
+        self.assertEqual(SubNotebook.objects.filter(notebook=self.notebook, title='四半期').count(), 1)
+        self.assertEqual(Entry.objects.get(title='メモ3').content_preview, '観察3')
+        # タグ名は # 付きに正規化され、既存のタグは再利用される
+        self.assertEqual(
+            set(Tag.objects.filter(user=self.user).values_list('name', 'usage_count')),
+            {('#高配当', 5), ('#新規タグ', 5)},
+        )
+        self.assertEqual(Tag.objects.get(name='#新規タグ').color, Tag.DEFAULT_COLOR)
+        self.assertEqual(Notebook.objects.get(pk=self.notebook.pk).entry_count, 5)
+        self.assertEqual(UserProfile.objects.get(user=self.user).total_entries, 5)
+        self.assertEqual(
+            sum(DailyActivity.objects.filter(user=self.user).values_list('count', flat=True)), 5
+        )
+
+    def test_csv_export_round_trip(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            source = Notebook.objects.create(user=self.user, title='元ノート')
+            entry = Entry.objects.create(
+                notebook=source, entry_type='GOAL', title='目標', content={'target_price': 3000},
+                stock_code='8058', is_important=True,
+            )
+            entry.tags.add(self.tag)
+        body = b''.join(EntryExportService.stream(EntryExportService.get_queryset(self.user, source), 'csv'))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'entries.csv')
+            with open(path, 'wb') as f:
+                f.write(body)
+            self._import(path)
+
+        imported = Entry.objects.get(notebook=self.notebook)
+        self.assertEqual((imported.title, imported.stock_code, imported.is_important), ('目標', '8058', True))
+        self.assertEqual(imported.content['target_price'], 3000)
+        self.assertEqual(list(imported.tags.values_list('name', flat=True)), ['#高配当'])
+        self.assertEqual(Tag.objects.get(pk=self.tag.pk).usage_count, 2)
+
+    def test_bad_notebook_id_is_command_error(self):
+        for notebook_id in ('not-a-uuid', '00000000-0000-0000-0000-000000000000'):
+            with self.assertRaisesMessage(CommandError, 'not found'):
+                call_command('import_entries', 'entries.ndjson', '--notebook', notebook_id)
+
+    def test_view_rejects_non_utf8_file(self):
+        upload = SimpleUploadedFile('entries.csv', 'タイトル'.encode('shift_jis'))
+        response = self.client.post(reverse('notes:import', kwargs={'pk': self.notebook.pk}), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(response.json()['success'])
+
+
+class EntryBulkActionTests(TestCase):
+    """エントリーの一括操作Ajax"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='bulk', password='password123')
+            self.other = User.objects.create_user(username='bulkother', password='password123')
+            self.notebook = Notebook.objects.create(user=self.user, title='一括操作')
+            self.sub_notebook = SubNotebook.objects.create(notebook=self.notebook, title='移動先')
+            self.entries = [
+                Entry.objects.create(
+                    notebook=self.notebook, entry_type='MEMO', title=f'メモ{i}', content={'observation': '観察'}
+                )
+                for i in range(3)
+            ]
+            other_notebook = Notebook.objects.create(user=self.other, title='他人のノート')
+            self.foreign = Entry.objects.create(
+                notebook=other_notebook, entry_type='MEMO', title='他人', content={'observation': '観察'}
+            )
+        self.client.force_login(self.user)
+        self.url = reverse('notes:entry_bulk_action')
+
+    def _post(self, action, entries, **extra):
+        payload = {'action': action, 'entry_ids': [str(entry.pk) for entry in entries], **extra}
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(self.url, json.dumps(payload), content_type='application/json')
+
+    def _stale_updated_at(self):
+        past = timezone.now() - timedelta(days=1)
+        Entry.all_objects.update(updated_at=past)
+        return past
+
+    def test_flag_actions(self):
+        past = self._stale_updated_at()
+        response = self._post('bookmark', self.entries[:2])
+        self.assertEqual(response.json()['affected_count'], 2)
+        self.assertEqual(Entry.objects.filter(is_bookmarked=True).count(), 2)
+        # ブックマークは updated_at を変更しない
+        self.assertFalse(Entry.objects.exclude(updated_at=past).exists())
+
+        # 既に設定済みのエントリーは件数に含めない
+        self.assertEqual(self._post('bookmark', self.entries).json()['affected_count'], 1)
+        self.assertEqual(self._post('unbookmark', self.entries).json()['affected_count'], 3)
+
+        response = self._post('mark_important', self.entries[:1])
+        self.assertEqual(response.json()['affected_count'], 1)
+        entry = Entry.objects.get(pk=self.entries[0].pk)
+        self.assertTrue(entry.is_important)
+        self.assertGreater(entry.updated_at, past)
+        self.assertEqual(Entry.objects.filter(notebook=self.notebook, updated_at=past).count(), 2)
+
+        self._post('unmark_important', self.entries)
+        self.assertFalse(Entry.objects.filter(is_important=True).exists())
+
+    def test_move_to_sub_notebook_and_back(self):
+        past = self._stale_updated_at()
+        response = self._post('move', self.entries[:2], sub_notebook_id=str(self.sub_notebook.pk))
+        self.assertEqual(response.json()['affected_count'], 2)
+        self.assertEqual(
+            set(Entry.objects.filter(sub_notebook=self.sub_notebook).values_list('pk', flat=True)),
+            {entry.pk for entry in self.entries[:2]},
+        )
+        self.assertFalse(Entry.objects.filter(sub_notebook=self.sub_notebook, updated_at=past).exists())
+
+        # 移動先の指定なしはサブノートから外す
+        self.assertEqual(self._post('move', self.entries).json()['affected_count'], 2)
+        self.assertFalse(Entry.objects.filter(sub_notebook__isnull=False).exists())
+
+    def test_delete_adjusts_counters(self):
+        response = self._post('delete', self.entries[:2])
+        self.assertEqual(response.json()['affected_count'], 2)
+
+        self.assertEqual(Entry.objects.filter(notebook=self.notebook).count(), 1)
+        self.assertEqual(Entry.all_objects.filter(notebook=self.notebook).count(), 3)
+        self.assertEqual(Notebook.objects.get(pk=self.notebook.pk).entry_count, 1)
+        self.assertEqual(UserProfile.objects.get(user=self.user).total_entries, 1)
+
+    def test_other_users_entries_are_untouched(self):
+        response = self._post('delete', [self.foreign, self.entries[0]])
+        self.assertEqual(response.json()['affected_count'], 1)
+        self.assertTrue(Entry.objects.filter(pk=self.foreign.pk).exists())
+        self.assertEqual(UserProfile.objects.get(user=self.other).total_entries, 1)
+
+        # 他のユーザーのサブノートには移動できない
+        with self.captureOnCommitCallbacks(execute=True):
+            foreign_sub = SubNotebook.objects.create(notebook=self.foreign.notebook, title='他人のサブノート')
+        response = self._post('move', self.entries, sub_notebook_id=str(foreign_sub.pk))
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Entry.objects.filter(sub_notebook=foreign_sub).exists())
+
+    def test_invalid_requests_are_rejected(self):
+        for body in ('[]', '"bookmark"', 'null', '{'):
+            response = self.client.post(self.url, body, content_type='application/json')
+            self.assertEqual(response.status_code, 400, body)
+            self.assertFalse(response.json()['success'])
+
+        for action, entry_ids in (('unknown', [str(self.entries[0].pk)]), ('bookmark', []), ('bookmark', ['abc'])):
+            response = self.client.post(
+                self.url, json.dumps({'action': action, 'entry_ids': entry_ids}), content_type='application/json'
+            )
+            self.assertEqual(response.status_code, 400, action)
+        self.assertFalse(Entry.objects.filter(is_bookmarked=True).exists())
@@ -24,6 +24,16 @@ urlpatterns = [
     path('<uuid:pk>/favorite/', views.toggle_favorite_view, name='toggle_favorite'),
     path('entry/<uuid:entry_pk>/bookmark/', views.toggle_entry_bookmark, name='toggle_entry_bookmark'),
     path('entry/<uuid:entry_pk>/delete/', views.delete_entry, name='delete_entry'),
+    path('entry/bulk/', views.entry_bulk_action_ajax, name='entry_bulk_action'),
+    
+    # 銘柄タイムライン（ノートブック横断）
+    path('stock/<str:stock_code>/timeline/', views.stock_timeline_view, name='stock_timeline'),
+    path('stock/<str:stock_code>/timeline/api/', views.stock_timeline_api, name='stock_timeline_api'),
+    
+    # エクスポート
+    path('export/', views.export_entries_view, name='export_all'),
+    path('<uuid:pk>/export/', views.export_entries_view, name='export'),
+    path('<uuid:pk>/import/', views.import_entries_view, name='import'),
     
     # サブノート関連
     path('<uuid:notebook_pk>/sub-notebook/create/', views.sub_notebook_create_ajax, name='sub_notebook_create'),
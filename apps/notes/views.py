@@ -2,6 +2,7 @@
 # apps/notes/views.py - 見直し版（テーマ単位ノート対応）
 # ========================================
 
+import io
 import json
 from django.urls import reverse
 from django.conf import settings
@@ -11,20 +12,25 @@ from django.contrib.auth.decorators import login_required
 from django.views.generic import ListView, DetailView, CreateView, UpdateView
 from django.contrib import messages
 from django.urls import reverse_lazy
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.db.models import Q, Count, Prefetch
 from django.core.paginator import Paginator
 from django.template.loader import render_to_string
 from apps.notes.models import Notebook, Entry, SubNotebook
 from apps.tags.models import Tag
+from apps.tags.services import TagSerializer
 from apps.notes.forms import NotebookForm, EntryForm, SubNotebookForm, NotebookSearchForm
 from apps.common.mixins import UserOwnerMixin, SearchMixin
-from apps.notes.services import NotebookService
+from apps.notes.services import NotebookService, NotebookDetailService, NotebookSidebarService, EntryDetailService, StockTimelineService, SearchResultSerializer, EntryExportService, EntryImportService, EntryBulkService
 from apps.common.utils import ContentHelper, TagHelper, SearchHelper
+from apps.common.cache import get_notebook_version, get_tag_version
+from apps.common.conditional import user_condition
+from apps.common.serialization import json_response
 from django.utils import timezone
 from datetime import datetime, timedelta
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
+from django.utils.decorators import method_decorator
 import logging
 
 # yfinance関連のインポート
@@ -107,6 +113,7 @@ def get_company_name_from_stock_code(request):
         })
 
 
+@method_decorator(user_condition(), name='get')
 class NotebookListView(UserOwnerMixin, ListView):
     """ノート一覧ビュー（修正版検索機能付き）"""
     model = Notebook
@@ -116,18 +123,7 @@ class NotebookListView(UserOwnerMixin, ListView):
     
     def get_queryset(self):
         """修正された検索とフィルタリングを適用したクエリセット"""
-        queryset = super().get_queryset()
-        
-        # 検索クエリの取得と適用
-        search_query = self.get_search_query()
-        logger.info(f"検索クエリ: '{search_query}'")
-        
-        if search_query:
-            queryset = self.apply_enhanced_search(queryset, search_query)
-            logger.info(f"検索後の件数: {queryset.count()}")
-        
-        # フィルターの適用
-        queryset = self.apply_filters(queryset)
+        queryset = self.get_filtered_queryset(super().get_queryset())
         
         # 統計情報付きで取得
         queryset = queryset.annotate(
@@ -143,6 +139,13 @@ class NotebookListView(UserOwnerMixin, ListView):
         
         return queryset
     
+    def get_filtered_queryset(self, queryset):
+        """検索とフィルターのみを適用したクエリセット（集計なし）"""
+        search_query = self.get_search_query()
+        if search_query:
+            queryset = self.apply_enhanced_search(queryset, search_query)
+        return self.apply_filters(queryset)
+    
     def get_search_query(self):
         """検索クエリを取得"""
         return self.request.GET.get('q', '').strip()
@@ -192,23 +195,10 @@ class NotebookListView(UserOwnerMixin, ListView):
             
             logger.info(f"構築されたクエリ: {final_query}")
             
-            # 完全一致ボーナス（より関連性の高い結果を優先）
-            exact_match_query = Q()
-            exact_fields = ['title', 'tags__name', 'entries__stock_code']
-            
-            for field in exact_fields:
-                exact_match_query |= Q(**{f"{field}__iexact": search_query})
-            
-            # クエリを適用
+            # 完全一致（タイトル・タグ名・銘柄コード）は各検索語の部分一致に含まれるため、
+            # 部分一致の結果をそのまま返す
             filtered_queryset = queryset.filter(final_query).distinct()
             
-            # 完全一致がある場合は結果を確認
-            exact_matches = queryset.filter(exact_match_query).distinct()
-            if exact_matches.exists():
-                logger.info(f"完全一致: {exact_matches.count()}件")
-                # 完全一致を優先して返す
-                return (exact_matches | filtered_queryset).distinct()
-            
             return filtered_queryset
             
         except Exception as e:
@@ -266,32 +256,29 @@ class NotebookListView(UserOwnerMixin, ListView):
         context['search_form'] = NotebookSearchForm(self.request.GET)
         context['search_query'] = search_query
         
-        # 検索統計情報
-        if search_query:
-            context['search_stats'] = self.get_search_statistics(search_query)
-            logger.info(f"検索統計: {context['search_stats']}")
-        
-        # トレンドタグ
-        if search_query:
-            context['trending_tags'] = self.get_related_tags_for_search(search_query)
-        else:
-            context['trending_tags'] = Tag.objects.get_trending_tags(self.request.user, limit=15)
+        # ノートカードのフラグメントキャッシュ用（タグの変更・付け外しで更新）
+        context['tag_version'] = get_tag_version(self.request.user.pk)
         
-        # お気に入りノート
-        context['favorite_notebooks'] = self.model.objects.filter(
-            user=self.request.user, 
-            is_favorite=True
-        )[:5]
+        # サイドバー（お気に入り・最近更新・トレンドタグ）はユーザー単位でキャッシュ
+        sidebar = NotebookSidebarService.get_sidebar(self.request.user)
+        context.update(sidebar)
         
-        # 最近更新されたノート
-        context['recent_notebooks'] = self.model.objects.filter(
-            user=self.request.user
-        ).order_by('-updated_at')[:5]
+        # 検索時は検索統計と関連タグ（検索条件ごとにキャッシュ）
+        if search_query:
+            params = self.request.GET.copy()
+            params.pop('page', None)
+            context.update(NotebookSidebarService.get_search_context(
+                self.request.user,
+                search_query,
+                self.get_filtered_queryset(super().get_queryset()),
+                params.urlencode()
+            ))
+            context['search_stats'] = {**context['search_stats'], 'total_matches': context['paginator'].count}
         
         # デバッグ情報（開発環境のみ）
         if settings.DEBUG:
             context['debug_info'] = {
-                'total_notebooks': self.model.objects.filter(user=self.request.user).count(),
+                'total_notebooks': sidebar['notebook_stats']['total_notebooks'],
                 'search_query': search_query,
                 'filters_applied': bool(self.request.GET.get('notebook_type') or 
                                       self.request.GET.get('status') or 
@@ -300,79 +287,6 @@ class NotebookListView(UserOwnerMixin, ListView):
             }
         
         return context
-    
-    def get_search_statistics(self, search_query):
-        """検索統計情報を取得"""
-        try:
-            base_queryset = self.model.objects.filter(user=self.request.user)
-            
-            # 各フィールドでの一致数を計算
-            title_matches = base_queryset.filter(title__icontains=search_query).count()
-            description_matches = base_queryset.filter(description__icontains=search_query).count()
-            
-            # タグマッチ数
-            tag_matches = base_queryset.filter(
-                Q(tags__name__icontains=search_query) | 
-                Q(tags__description__icontains=search_query)
-            ).distinct().count()
-            
-            # エントリーマッチ数  
-            entry_matches = base_queryset.filter(
-                Q(entries__title__icontains=search_query) | 
-                Q(entries__company_name__icontains=search_query) |
-                Q(entries__stock_code__icontains=search_query)
-            ).distinct().count()
-            
-            total_matches = self.get_queryset().count()
-            
-            return {
-                'total_matches': total_matches,
-                'title_matches': title_matches,
-                'description_matches': description_matches,
-                'tag_matches': tag_matches,
-                'entry_matches': entry_matches,
-                'query': search_query
-            }
-        except Exception as e:
-            logger.error(f"検索統計取得エラー: {e}", exc_info=True)
-            return {
-                'total_matches': 0, 
-                'title_matches': 0,
-                'description_matches': 0,
-                'tag_matches': 0,
-                'entry_matches': 0,
-                'query': search_query
-            }
-    
-    def get_related_tags_for_search(self, search_query):
-        """検索結果に関連するタグを取得"""
-        try:
-            # 検索クエリに一致するタグを優先
-            related_tags = Tag.objects.filter(
-                Q(name__icontains=search_query) | Q(description__icontains=search_query),
-                is_active=True
-            )
-            
-            # 検索結果のノートブックに関連するタグも含める
-            result_queryset = self.get_queryset()
-            notebook_ids = list(result_queryset.values_list('id', flat=True))
-            
-            if notebook_ids:
-                notebook_tags = Tag.objects.filter(
-                    notebook__in=notebook_ids,
-                    is_active=True
-                )
-                
-                # 統合してユニークにして使用頻度順で返す
-                all_tags = (related_tags | notebook_tags).distinct().order_by('-usage_count')[:15]
-                return all_tags
-            
-            return related_tags[:15]
-            
-        except Exception as e:
-            logger.error(f"関連タグ取得エラー: {e}", exc_info=True)
-            # エラー時は通常のトレンドタグを返す
-            return Tag.objects.get_trending_tags(self.request.user, limit=15)
 
 
 # ========================================
@@ -381,42 +295,34 @@ class NotebookListView(UserOwnerMixin, ListView):
 
 
 @login_required
+@user_condition()
 def trending_tags_ajax(request):
-    """トレンドタグをAjaxで取得"""
+    """トレンドタグをAjaxで取得
+
+    タグにカテゴリーはないため category はそのまま返すだけで絞り込みには使わない。
+    """
     try:
         category = request.GET.get('category', '')
         limit = int(request.GET.get('limit', 10))
         
         # ユーザー固有のタグのみ取得
-        if category:
-            tags = Tag.objects.filter(
-                user=request.user,
-                category=category,
-                is_active=True,
-                usage_count__gt=0
-            ).order_by('-usage_count', '-updated_at')[:limit]
-        else:
-            tags = Tag.objects.get_trending_tags(request.user, limit=limit)
+        tags = Tag.objects.get_trending_tags(request.user, limit=limit)
         
-        # タグデータをシリアライズ
+        # 関連ノートブック・エントリー数は中間テーブルからまとめて集計
+        related = TagSerializer.related_counts(request.user, [tag.pk for tag in tags])
+        search_url = reverse('notes:list')
         tags_data = []
         for tag in tags:
-            # そのタグを使用しているノートブック数を取得
-            notebook_count = tag.notebook_set.filter(user=request.user).count()
-            entry_count = tag.entry_set.filter(notebook__user=request.user).count()
-            
+            notebook_count, entry_count = related.get(tag.pk, (0, 0))
             tags_data.append({
                 'id': tag.pk,
                 'name': tag.name,
-                'category': tag.category,
-                'category_display': tag.get_category_display(),
                 'description': tag.description,
                 'usage_count': tag.usage_count,
                 'color': tag.get_effective_color(),
-                'color_class': tag.get_color_class(),
                 'notebook_count': notebook_count,
                 'entry_count': entry_count,
-                'search_url': f"{reverse('notes:list')}?q={tag.name}"
+                'search_url': f"{search_url}?q={tag.name}"
             })
         
         return JsonResponse({
@@ -437,6 +343,7 @@ def trending_tags_ajax(request):
 
 
 @login_required
+@user_condition()
 def tag_search_ajax(request):
     """タグ検索Ajax"""
     query = request.GET.get('q', '').strip()
@@ -446,38 +353,20 @@ def tag_search_ajax(request):
     try:
         if query:
             # テキスト検索
-            tags = Tag.objects.search_tags(query)
-            if category:
-                tags = tags.filter(category=category)
-            tags = tags[:limit]
+            tags = Tag.objects.search_tags(request.user, query)[:limit]
         else:
-            # カテゴリ別取得
-            if category:
-                tags = Tag.objects.get_tags_by_category(category, limit=limit)
-            else:
-                tags = Tag.objects.get_popular_tags(limit=limit)
-        
-        # 結果をシリアライズ
-        results = []
-        for tag in tags:
-            # ユーザーの関連ノートブック・エントリー数
-            user_notebook_count = tag.notebook_set.filter(user=request.user).count()
-            user_entry_count = tag.entry_set.filter(notebook__user=request.user).count()
-            
-            results.append({
-                'id': tag.pk,
-                'name': tag.name,
-                'category': tag.category,
-                'category_display': tag.get_category_display(),
-                'description': tag.description,
-                'usage_count': tag.usage_count,
-                'color_class': tag.get_color_class(),
-                'user_notebook_count': user_notebook_count,
-                'user_entry_count': user_entry_count,
-                'total_related': user_notebook_count + user_entry_count
-            })
-        
-        return JsonResponse({
+            tags = Tag.objects.get_popular_tags(request.user, limit=limit)
+        
+        # 結果をシリアライズ（関連ノートブック・エントリー数は中間テーブルからまとめて集計）
+        results = TagSerializer.rows(tags, with_details=True)
+        related = TagSerializer.related_counts(request.user, [tag['id'] for tag in results])
+        for tag in results:
+            user_notebook_count, user_entry_count = related.get(tag['id'], (0, 0))
+            tag['user_notebook_count'] = user_notebook_count
+            tag['user_entry_count'] = user_entry_count
+            tag['total_related'] = user_notebook_count + user_entry_count
+        
+        return json_response({
             'success': True,
             'results': results,
             'query': query,
@@ -690,7 +579,7 @@ def search_suggestions_ajax(request):
                 remaining = limit - len(suggestions)
                 tag_names = Tag.objects.filter(
                     name__icontains=query,
-                    notebook__user=request.user
+                    user=request.user
                 ).distinct().values_list('name', flat=True)[:remaining]
                 
                 for tag_name in tag_names:
@@ -705,7 +594,7 @@ def search_suggestions_ajax(request):
             if len(suggestions) < limit:
                 remaining = limit - len(suggestions)
                 companies = Entry.objects.filter(
-                    notebook__user=request.user,
+                    user=request.user,
                     company_name__icontains=query
                 ).values_list('company_name', flat=True).distinct()[:remaining]
                 
@@ -732,18 +621,24 @@ def search_suggestions_ajax(request):
             'error': '検索サジェストの取得に失敗しました'
         }, status=500)
 
+@method_decorator(user_condition(
+    stamp=lambda request, pk: (get_notebook_version(pk),)
+), name='get')
 class NotebookDetailView(UserOwnerMixin, DetailView):
     """ノート詳細ビュー（統計情報修正版）"""
     model = Notebook
     template_name = 'notes/detail.html'
     context_object_name = 'notebook'
     
+    def get_queryset(self):
+        return super().get_queryset().prefetch_related('tags')
+    
     def get_context_data(self, **kwargs):
         """エントリー一覧と統計情報をページネーション付きで追加"""
         context = super().get_context_data(**kwargs)
         
         # エントリー一覧をページネーションで取得
-        entries_list = self.object.entries.select_related('sub_notebook').prefetch_related('tags').order_by('-created_at')
+        entries_list = self.object.entries.select_related('sub_notebook').prefetch_related('tags').defer('content').order_by('-created_at')
         
         # サブノートフィルター
         sub_notebook_id = self.request.GET.get('sub_notebook')
@@ -769,28 +664,8 @@ class NotebookDetailView(UserOwnerMixin, DetailView):
         context['is_paginated'] = entries.has_other_pages()
         context['page_obj'] = entries
         
-        # サブノート一覧
-        context['sub_notebooks'] = self.object.sub_notebooks.all()
-        
-        # 銘柄一覧（フィルター用）
-        context['stocks'] = self.object.get_stocks_list()
-        
-        # 統計情報（修正版）
-        total_entries = self.object.entries.count()
-        recent_entries = self.object.entries.filter(
-            created_at__gte=timezone.now() - timedelta(days=7)
-        ).count()
-        important_entries = self.object.entries.filter(is_important=True).count()
-        stock_count = self.object.entries.exclude(
-            Q(stock_code='') | Q(stock_code__isnull=True)
-        ).values('stock_code').distinct().count()
-        
-        context['stats'] = {
-            'total_entries': total_entries,
-            'stock_count': stock_count,
-            'recent_entries': recent_entries,
-            'important_entries': important_entries,
-        }
+        # 統計・銘柄一覧・サブノート一覧（ノートブック単位でキャッシュ）
+        context.update(NotebookDetailService.get_summary(self.object))
         
         return context    
 
@@ -942,7 +817,7 @@ def entry_create_view(request, notebook_pk):
 @login_required
 def entry_edit_view(request, entry_pk):
     """エントリー編集ビュー（新規追加）"""
-    entry = get_object_or_404(Entry, pk=entry_pk, notebook__user=request.user)
+    entry = get_object_or_404(Entry, pk=entry_pk, user=request.user)
     
     if request.method == 'POST':
         try:
@@ -1026,46 +901,6 @@ def entry_edit_view(request, entry_pk):
         }, status=500)
 
 
-@login_required
-def entry_detail_ajax(request, entry_pk):
-    """エントリー詳細をAjaxで返すビュー"""
-    try:
-        entry = get_object_or_404(Entry, pk=entry_pk, notebook__user=request.user)
-        
-        # エントリータイプに応じてHTMLを生成
-        html_content = render_entry_content_html(entry)
-        
-        return JsonResponse({
-            'success': True,
-            'entry_id': str(entry.pk),
-            'title': entry.title,
-            'entry_type': entry.get_entry_type_display(),
-            'stock_info': entry.get_stock_display(),
-            'sub_notebook': entry.sub_notebook.title if entry.sub_notebook else None,
-            'created_at': entry.created_at.strftime('%Y/%m/%d %H:%M'),
-            'updated_at': entry.updated_at.strftime('%Y/%m/%d %H:%M'),
-            'is_important': entry.is_important,
-            'is_bookmarked': entry.is_bookmarked,
-            'event_date': entry.event_date.strftime('%Y/%m/%d') if entry.event_date else None,
-            'tags': [{'id': tag.pk, 'name': tag.name} for tag in entry.tags.all()],
-            'html': html_content
-        })
-        
-    except Entry.DoesNotExist:
-        return JsonResponse({
-            'success': False,
-            'error': 'エントリーが見つかりません'
-        }, status=404)
-    except Exception as e:
-        import logging
-        logger = logging.getLogger(__name__)
-        logger.error(f"エントリー詳細取得エラー: {e}", exc_info=True)
-        return JsonResponse({
-            'success': False,
-            'error': f'エラーが発生しました: {str(e)}'
-        }, status=500)
-
-
 @login_required
 def toggle_favorite_view(request, pk):
     """ノートのお気に入り切り替え"""
@@ -1098,7 +933,7 @@ def toggle_favorite_view(request, pk):
 def toggle_entry_bookmark(request, entry_pk):
     """エントリーのブックマーク切り替え（修正版）"""
     try:
-        entry = get_object_or_404(Entry, pk=entry_pk, notebook__user=request.user)
+        entry = get_object_or_404(Entry, pk=entry_pk, user=request.user)
         entry.is_bookmarked = not entry.is_bookmarked
         entry.save(update_fields=['is_bookmarked'])
         
@@ -1123,18 +958,13 @@ def toggle_entry_bookmark(request, entry_pk):
 def delete_entry(request, entry_pk):
     """エントリー削除"""
     try:
-        entry = get_object_or_404(Entry, pk=entry_pk, notebook__user=request.user)
+        entry = get_object_or_404(Entry, pk=entry_pk, user=request.user)
         entry_title = entry.title
         notebook_pk = entry.notebook.pk
         
-        # エントリーを削除
+        # エントリーを論理削除（エントリー数などはシグナルで更新）
         entry.delete()
         
-        # ノートブックのエントリー数を更新
-        notebook = entry.notebook
-        notebook.entry_count = notebook.entries.count()
-        notebook.save(update_fields=['entry_count'])
-        
         return JsonResponse({
             'success': True,
             'message': f'エントリー「{entry_title}」を削除しました',
@@ -1209,215 +1039,6 @@ def sub_notebook_create_ajax(request, notebook_pk):
     return JsonResponse({'success': False, 'error': '無効なリクエストです'}, status=405)
 
 
-# ========================================
-# ヘルパー関数（既存のものを流用）
-# ========================================
-
-def render_entry_content_html(entry):
-    """エントリータイプに応じたHTMLコンテンツを生成"""
-    content = entry.content
-    entry_type = entry.entry_type
-    
-    # 銘柄情報を追加
-    stock_info_html = ''
-    if entry.stock_code or entry.company_name:
-        stock_info_html = f'''
-        <div class="bg-gray-700 p-4 rounded-lg mb-4">
-            <h4 class="font-semibold text-white mb-2">銘柄情報</h4>
-            <div class="grid grid-cols-2 gap-4">
-                {f'<div><p class="text-sm text-gray-400">銘柄コード</p><p class="text-white">{entry.stock_code}</p></div>' if entry.stock_code else ''}
-                {f'<div><p class="text-sm text-gray-400">企業名</p><p class="text-white">{entry.company_name}</p></div>' if entry.company_name else ''}
-                {f'<div><p class="text-sm text-gray-400">イベント日</p><p class="text-white">{entry.event_date.strftime("%Y/%m/%d")}</p></div>' if entry.event_date else ''}
-            </div>
-        </div>
-        '''
-    
-    # 既存のコンテンツ生成関数を使用
-    if entry_type == 'ANALYSIS':
-        content_html = render_analysis_content(content)
-    elif entry_type == 'NEWS':
-        content_html = render_news_content(content)
-    elif entry_type == 'MEMO':
-        content_html = render_memo_content(content)
-    elif entry_type == 'GOAL':
-        content_html = render_goal_content(content)
-    else:
-        content_html = '<p class="text-gray-300">コンテンツが見つかりません。</p>'
-    
-    return stock_info_html + content_html
-
-
-# 既存のコンテンツ生成関数をそのまま使用
-def render_analysis_content(content):
-    """決算分析コンテンツのHTML生成（既存のまま）"""
-    html = '<div class="space-y-6">'
-    
-    # サマリー
-    if content.get('summary'):
-        html += f'''
-        <div class="bg-gray-700 p-4 rounded-lg">
-            <h4 class="font-semibold text-white mb-2">サマリー</h4>
-            <p class="text-gray-300">{content["summary"]}</p>
-        </div>
-        '''
-    
-    # 主要指標
-    key_metrics = content.get('key_metrics', {})
-    if any(key_metrics.values()):
-        html += '<div class="grid grid-cols-2 md:grid-cols-4 gap-4">'
-        for key, value in key_metrics.items():
-            if value:
-                display_key = {
-                    'revenue': '売上高',
-                    'operating_profit': '営業利益', 
-                    'net_income': '純利益',
-                    'eps': 'EPS'
-                }.get(key, key)
-                html += f'''
-                <div class="bg-gray-700 p-3 rounded-lg text-center">
-                    <p class="text-sm text-gray-400">{display_key}</p>
-                    <p class="text-lg font-bold text-white">{value}</p>
-                </div>
-                '''
-        html += '</div>'
-    
-    # 分析
-    if content.get('analysis'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">分析</h4>
-            <p class="text-gray-300">{content["analysis"]}</p>
-        </div>
-        '''
-    
-    # 今後の見通し
-    if content.get('outlook'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">今後の見通し</h4>
-            <p class="text-gray-300">{content["outlook"]}</p>
-        </div>
-        '''
-    
-    html += '</div>'
-    return html
-
-
-def render_news_content(content):
-    """ニュースコンテンツのHTML生成（既存のまま）"""
-    html = '<div class="space-y-4">'
-    
-    # ヘッドライン
-    if content.get('headline'):
-        html += f'''
-        <div class="bg-gray-700 p-4 rounded-lg">
-            <h4 class="font-semibold text-white mb-2">{content["headline"]}</h4>
-            {f'<p class="text-gray-300">{content["content"]}</p>' if content.get("content") else ""}
-        </div>
-        '''
-    
-    # 事業への影響
-    if content.get('impact'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">事業への影響</h4>
-            <p class="text-gray-300">{content["impact"]}</p>
-        </div>
-        '''
-    
-    # 株価への影響
-    if content.get('stock_impact'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">株価への影響</h4>
-            <p class="text-gray-300">{content["stock_impact"]}</p>
-        </div>
-        '''
-    
-    html += '</div>'
-    return html
-
-
-def render_memo_content(content):
-    """メモコンテンツのHTML生成（既存のまま）"""
-    html = '<div class="space-y-4">'
-    
-    # 観察事項
-    if content.get('observation'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">観察事項</h4>
-            <p class="text-gray-300">{content["observation"]}</p>
-        </div>
-        '''
-    
-    
-    # 個人的メモ
-    if content.get('personal_note'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">個人的メモ</h4>
-            <p class="text-gray-300">{content["personal_note"]}</p>
-        </div>
-        '''
-    
-    # 次のアクション
-    if content.get('next_action'):
-        html += f'''
-        <div class="bg-yellow-900/30 p-4 rounded-lg border border-yellow-700">
-            <h4 class="font-semibold text-white mb-2">次のアクション</h4>
-            <p class="text-gray-300">{content["next_action"]}</p>
-        </div>
-        '''
-    
-    html += '</div>'
-    return html
-
-
-def render_goal_content(content):
-    """投資目標コンテンツのHTML生成（既存のまま）"""
-    html = '<div class="space-y-6">'
-    
-    # 目標情報
-    if content.get('target_price') or content.get('sell_timing'):
-        html += '<div class="grid grid-cols-1 md:grid-cols-2 gap-4">'
-        if content.get('target_price'):
-            html += f'''
-            <div class="space-y-2">
-                <h4 class="font-semibold text-white">目標株価</h4>
-                <p class="text-2xl font-bold text-green-400">{content["target_price"]}</p>
-            </div>
-            '''
-        if content.get('sell_timing'):
-            html += f'''
-            <div class="space-y-2">
-                <h4 class="font-semibold text-white">売却タイミング</h4>
-                <p class="text-gray-300">{content["sell_timing"]}</p>
-            </div>
-            '''
-        html += '</div>'
-    
-    # 投資理由
-    if content.get('investment_reason'):
-        html += f'''
-        <div class="space-y-2">
-            <h4 class="font-semibold text-white">投資理由</h4>
-            <p class="text-gray-300">{content["investment_reason"]}</p>
-        </div>
-        '''
-    
-    # 期待される効果
-    if content.get('expected_effect'):
-        html += f'''
-        <div class="bg-purple-900/30 p-4 rounded-lg border border-purple-700">
-            <h4 class="font-semibold text-white mb-2">期待される効果</h4>
-            <p class="text-gray-300">{content["expected_effect"]}</p>
-        </div>
-        '''
-    
-    html += '</div>'
-    return html
-
 @login_required
 def toggle_favorite_view(request, pk):
     """ノートのお気に入り切り替え"""
@@ -1450,7 +1071,7 @@ def toggle_bookmark_view(request, entry_pk):
     """エントリーのブックマーク切り替え"""
     if request.method == 'POST':
         try:
-            entry = get_object_or_404(Entry, pk=entry_pk, notebook__user=request.user)
+            entry = get_object_or_404(Entry, pk=entry_pk, user=request.user)
             entry.is_bookmarked = not entry.is_bookmarked
             entry.save(update_fields=['is_bookmarked'])
             
@@ -1550,7 +1171,6 @@ def notebook_search_ajax(request):
         # 検索の適用
         if query:
             queryset = apply_enhanced_search_ajax(queryset, query)
-            logger.info(f"Ajax検索後の件数: {queryset.count()}")
         
         # フィルターの適用
         if filters['notebook_type']:
@@ -1562,38 +1182,20 @@ def notebook_search_ajax(request):
         if filters['is_favorite']:
             queryset = queryset.filter(is_favorite=True)
         
-        # 統計情報付きで取得
+        # 統計情報付きで必要な列のみ取得
         queryset = queryset.annotate(
             recent_entries_count=Count(
                 'entries',
                 filter=Q(entries__created_at__gte=timezone.now() - timedelta(days=30))
             ),
             stock_count=Count('entries__stock_code', distinct=True)
-        ).select_related().prefetch_related('tags')[:20]
+        )
+        rows = SearchResultSerializer.notebook_values(queryset)[:20]
         
-        # 結果をシリアライズ
-        results = []
-        for notebook in queryset:
-            # 検索語のハイライト情報も含める
-            highlight_info = get_highlight_info(notebook, query) if query else {}
-            
-            results.append({
-                'id': str(notebook.pk),
-                'title': notebook.title,
-                'notebook_type': notebook.get_notebook_type_display(),
-                'status': notebook.get_status_display(),
-                'status_code': notebook.status,
-                'entry_count': notebook.entry_count,
-                'recent_entries_count': getattr(notebook, 'recent_entries_count', 0),
-                'stock_count': getattr(notebook, 'stock_count', 0),
-                'is_favorite': notebook.is_favorite,
-                'updated_at': notebook.updated_at.isoformat(),
-                'tags': [{'id': tag.pk, 'name': tag.name} for tag in notebook.tags.all()],
-                'url': reverse('notes:detail', kwargs={'pk': notebook.pk}),
-                'highlight': highlight_info
-            })
+        # 結果をシリアライズ（検索語のハイライト情報も含める）
+        results = SearchResultSerializer.notebook_rows(rows, query)
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'results': results,
             'count': len(results),
@@ -1648,40 +1250,6 @@ def apply_enhanced_search_ajax(queryset, search_query):
     return queryset.filter(final_query).distinct()
 
 
-def get_highlight_info(notebook, search_query):
-    """検索語のハイライト情報を取得"""
-    highlight_info = {}
-    
-    try:
-        if not search_query:
-            return highlight_info
-            
-        search_terms = [term.strip().lower() for term in search_query.split() if term.strip()]
-        
-        # タイトルのハイライト
-        title_lower = notebook.title.lower()
-        if any(term in title_lower for term in search_terms):
-            highlight_info['title'] = True
-        
-        # 説明のハイライト  
-        if notebook.description:
-            description_lower = notebook.description.lower()
-            if any(term in description_lower for term in search_terms):
-                highlight_info['description'] = True
-        
-        # タグのハイライト
-        tag_names = [tag.name.lower() for tag in notebook.tags.all()]
-        for tag_name in tag_names:
-            if any(term in tag_name for term in search_terms):
-                highlight_info['tags'] = True
-                break
-        
-        return highlight_info
-    except Exception as e:
-        logger.error(f"ハイライト情報取得エラー: {e}")
-        return {}
-
-
 def get_search_stats_ajax(user, search_query):
     """Ajax検索用の統計情報取得"""
     try:
@@ -1740,7 +1308,7 @@ def entry_search_ajax(request, notebook_pk):
     
     try:
         # 基本クエリセット
-        queryset = notebook.entries.select_related('sub_notebook').prefetch_related('tags')
+        queryset = notebook.entries.all()
         
         # フィルターの適用
         if filters['sub_notebook']:
@@ -1777,34 +1345,15 @@ def entry_search_ajax(request, notebook_pk):
         else:  # newest
             queryset = queryset.order_by('-created_at')
         
-        # ページネーション
+        # ページネーション（必要な列のみ取得）
         page_number = request.GET.get('page', 1)
-        paginator = Paginator(queryset, 10)
+        paginator = Paginator(SearchResultSerializer.entry_values(queryset), 10)
         page_obj = paginator.get_page(page_number)
         
         # 結果をシリアライズ
-        results = []
-        for entry in page_obj:
-            results.append({
-                'id': str(entry.pk),
-                'title': entry.title,
-                'entry_type': entry.entry_type,
-                'entry_type_display': entry.get_entry_type_display(),
-                'stock_code': entry.stock_code,
-                'company_name': entry.company_name,
-                'stock_display': entry.get_stock_display(),
-                'sub_notebook': {
-                    'id': str(entry.sub_notebook.pk) if entry.sub_notebook else None,
-                    'title': entry.sub_notebook.title if entry.sub_notebook else None
-                },
-                'is_important': entry.is_important,
-                'is_bookmarked': entry.is_bookmarked,
-                'created_at': entry.created_at.isoformat(),
-                'tags': [{'id': tag.pk, 'name': tag.name} for tag in entry.tags.all()],
-                'content_preview': generate_content_preview(entry)
-            })
+        results = SearchResultSerializer.entry_rows(page_obj.object_list)
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'results': results,
             'pagination': {
@@ -1828,22 +1377,8 @@ def entry_search_ajax(request, notebook_pk):
 
 
 def generate_content_preview(entry):
-    """エントリーコンテンツのプレビューを生成"""
-    content = entry.content
-    entry_type = entry.entry_type
-    
-    if entry_type == 'ANALYSIS' and content.get('summary'):
-        return content['summary'][:100] + '...' if len(content['summary']) > 100 else content['summary']
-    elif entry_type == 'NEWS' and content.get('headline'):
-        return content['headline']
-    elif entry_type == 'CALCULATION' and content.get('current_price'):
-        return f"現在株価: {content['current_price']}"
-    elif entry_type == 'MEMO' and content.get('observation'):
-        return content['observation'][:100] + '...' if len(content['observation']) > 100 else content['observation']
-    elif entry_type == 'GOAL' and content.get('target_price'):
-        return f"目標株価: {content['target_price']}"
-    
-    return "詳細はクリックして確認してください"
+    """エントリーコンテンツのプレビューを取得（保存時に生成済み）"""
+    return entry.get_list_preview()
 
 # ========================================
 # エントリーブックマーク・削除機能
@@ -1854,7 +1389,7 @@ def generate_content_preview(entry):
 def toggle_entry_bookmark(request, entry_pk):
     """エントリーのブックマーク切り替え（修正版）"""
     try:
-        entry = get_object_or_404(Entry, pk=entry_pk, notebook__user=request.user)
+        entry = get_object_or_404(Entry, pk=entry_pk, user=request.user)
         entry.is_bookmarked = not entry.is_bookmarked
         entry.save(update_fields=['is_bookmarked'])
         
@@ -1879,18 +1414,13 @@ def toggle_entry_bookmark(request, entry_pk):
 def delete_entry(request, entry_pk):
     """エントリー削除"""
     try:
-        entry = get_object_or_404(Entry, pk=entry_pk, notebook__user=request.user)
+        entry = get_object_or_404(Entry, pk=entry_pk, user=request.user)
         entry_title = entry.title
         notebook_pk = entry.notebook.pk
         
-        # エントリーを削除
+        # エントリーを論理削除（エントリー数などはシグナルで更新）
         entry.delete()
         
-        # ノートブックのエントリー数を更新
-        notebook = entry.notebook
-        notebook.entry_count = notebook.entries.count()
-        notebook.save(update_fields=['entry_count'])
-        
         return JsonResponse({
             'success': True,
             'message': f'エントリー「{entry_title}」を削除しました',
@@ -1907,28 +1437,68 @@ def delete_entry(request, entry_pk):
 
 
 @login_required
+@require_http_methods(["POST"])
+def entry_bulk_action_ajax(request):
+    """エントリーの一括操作Ajax（ブックマーク・重要フラグ・サブノート移動・削除）"""
+    try:
+        data = json.loads(request.body)
+        if not isinstance(data, dict):
+            return JsonResponse({
+                'success': False,
+                'error': '無効なJSONデータです'
+            }, status=400)
+        action = data.get('action')
+        count = EntryBulkService.apply(
+            request.user, data.get('entry_ids'), action, sub_notebook_id=data.get('sub_notebook_id')
+        )
+    except json.JSONDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': '無効なJSONデータです'
+        }, status=400)
+    except ValueError as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=400)
+    except Exception as e:
+        logger.error(f"エントリー一括操作エラー: {e}", exc_info=True)
+        return JsonResponse({
+            'success': False,
+            'error': 'エントリーの一括操作に失敗しました'
+        }, status=500)
+    
+    return JsonResponse({
+        'success': True,
+        'message': f'{count}件のエントリーを{EntryBulkService.ACTION_MESSAGES[action]}',
+        'affected_count': count
+    })
+
+
+def _entry_version(request, entry_pk):
+    """条件付きGET用のエントリーの (更新日時, ブックマーク) を1回だけ取得（存在しなければ None）"""
+    if not hasattr(request, '_entry_version'):
+        request._entry_version = Entry.objects.filter(
+            pk=entry_pk, user=request.user
+        ).values_list('updated_at', 'is_bookmarked').first()
+    return request._entry_version
+
+
+@login_required
+@user_condition(
+    stamp=_entry_version,
+    last_modified=lambda request, entry_pk: (_entry_version(request, entry_pk) or (None,))[0],
+)
 def entry_detail_ajax(request, entry_pk):
-    """エントリー詳細をAjaxで返すビュー（修正版）"""
+    """エントリー詳細をAjaxで返すビュー（描画結果はエントリーの更新日時ごとにキャッシュ）"""
     try:
-        entry = get_object_or_404(Entry, pk=entry_pk, notebook__user=request.user)
-        
-        # エントリータイプに応じてHTMLを生成
-        html_content = render_entry_content_html(entry)
+        entry = get_object_or_404(
+            Entry.objects.select_related('sub_notebook'), pk=entry_pk, user=request.user
+        )
         
         return JsonResponse({
             'success': True,
-            'entry_id': str(entry.pk),
-            'title': entry.title,
-            'entry_type': entry.get_entry_type_display(),
-            'stock_info': entry.get_stock_display(),
-            'sub_notebook': entry.sub_notebook.title if entry.sub_notebook else None,
-            'created_at': entry.created_at.strftime('%Y/%m/%d %H:%M'),
-            'updated_at': entry.updated_at.strftime('%Y/%m/%d %H:%M'),
-            'is_important': entry.is_important,
-            'is_bookmarked': entry.is_bookmarked,
-            'event_date': entry.event_date.strftime('%Y/%m/%d') if entry.event_date else None,
-            'tags': [{'id': tag.pk, 'name': tag.name} for tag in entry.tags.all()],
-            'html': html_content
+            **EntryDetailService.get_detail(entry)
         })
         
     except Entry.DoesNotExist:
@@ -1977,388 +1547,167 @@ def toggle_favorite_view(request, pk):
     return JsonResponse({'success': False, 'error': '無効なリクエストです'}, status=405)
 
 
-def render_entry_content_html(entry):
-    """エントリータイプに応じたHTMLコンテンツを生成（修正版）"""
-    content = entry.content
-    entry_type = entry.entry_type
-    
-    # 銘柄情報を追加
-    stock_info_html = ''
-    if entry.stock_code or entry.company_name:
-        stock_info_html = f'''
-        <div class="bg-gray-700 p-4 rounded-lg mb-4">
-            <h4 class="font-semibold text-white mb-2 flex items-center">
-                <svg class="h-4 w-4 mr-2 text-blue-400" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M16 8v8m-4-5v5m-4-2v2m-2 4h12a2 2 0 002-2V6a2 2 0 00-2-2H6a2 2 0 00-2 2v12a2 2 0 002 2z"></path>
-                </svg>
-                銘柄情報
-            </h4>
-            <div class="grid grid-cols-2 gap-4">
-                {f'<div><p class="text-sm text-gray-400">銘柄コード</p><p class="text-white font-semibold">{entry.stock_code}</p></div>' if entry.stock_code else ''}
-                {f'<div><p class="text-sm text-gray-400">企業名</p><p class="text-white font-semibold">{entry.company_name}</p></div>' if entry.company_name else ''}
-                {f'<div><p class="text-sm text-gray-400">イベント日</p><p class="text-white">{entry.event_date.strftime("%Y/%m/%d")}</p></div>' if entry.event_date else ''}
-            </div>
-        </div>
-        '''
-    
-    # エントリーメタ情報
-    meta_info_html = f'''
-    <div class="bg-gray-700 p-4 rounded-lg mb-4">
-        <h4 class="font-semibold text-white mb-2 flex items-center">
-            <svg class="h-4 w-4 mr-2 text-green-400" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M13 16h-1v-4h-1m1-4h.01M21 12a9 9 0 11-18 0 9 9 0 0118 0z"></path>
-            </svg>
-            エントリー情報
-        </h4>
-        <div class="grid grid-cols-2 gap-4">
-            <div><p class="text-sm text-gray-400">タイプ</p><p class="text-white">{entry.get_entry_type_display()}</p></div>
-            <div><p class="text-sm text-gray-400">作成日</p><p class="text-white">{entry.created_at.strftime("%Y/%m/%d %H:%M")}</p></div>
-            {f'<div><p class="text-sm text-gray-400">サブノート</p><p class="text-white">{entry.sub_notebook.title}</p></div>' if entry.sub_notebook else ''}
-            <div><p class="text-sm text-gray-400">最終更新</p><p class="text-white">{entry.updated_at.strftime("%Y/%m/%d %H:%M")}</p></div>
-        </div>
-    </div>
-    '''
-    
-    # タグ情報
-    tags_html = ''
-    if entry.tags.exists():
-        tags_list = ', '.join([tag.name for tag in entry.tags.all()])
-        tags_html = f'''
-        <div class="bg-gray-700 p-4 rounded-lg mb-4">
-            <h4 class="font-semibold text-white mb-2 flex items-center">
-                <svg class="h-4 w-4 mr-2 text-yellow-400" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                    <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M7 7h.01M7 3h5c.512 0 1.024.195 1.414.586l7 7a2 2 0 010 2.828l-7 7a2 2 0 01-2.828 0l-7-7A1.99 1.99 0 013 12V7a2 2 0 012-2z"></path>
-                </svg>
-                関連タグ
-            </h4>
-            <div class="flex flex-wrap gap-2">
-                {' '.join([f'<span class="px-2 py-1 bg-blue-600 text-white text-sm rounded">{tag.name}</span>' for tag in entry.tags.all()])}
-            </div>
-        </div>
-        '''
-    
-    # エントリータイプ別コンテンツ
-    if entry_type == 'ANALYSIS':
-        content_html = render_analysis_content(content)
-    elif entry_type == 'NEWS':
-        content_html = render_news_content(content)
-    elif entry_type == 'MEMO':
-        content_html = render_memo_content(content)
-    elif entry_type == 'GOAL':
-        content_html = render_goal_content(content)
-    elif entry_type == 'EARNINGS':
-        content_html = render_earnings_content(content)
-    elif entry_type == 'IR_EVENT':
-        content_html = render_ir_event_content(content)
-    else:
-        content_html = '<p class="text-gray-300">コンテンツが見つかりません。</p>'
-    
-    # アクションボタン
-    action_buttons_html = f'''
-    <div class="flex justify-end gap-2 mt-6 pt-4 border-t border-gray-600">
-        <button onclick="toggleEntryBookmark('{entry.pk}')" 
-                class="px-4 py-2 bg-blue-600 hover:bg-blue-700 text-white rounded-lg transition-colors flex items-center">
-            <svg class="h-4 w-4 mr-2" fill="{'currentColor' if entry.is_bookmarked else 'none'}" stroke="currentColor" viewBox="0 0 24 24">
-                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M5 5a2 2 0 012-2h10a2 2 0 012 2v16l-7-3.5L5 21V5z"></path>
-            </svg>
-            {'ブックマーク済み' if entry.is_bookmarked else 'ブックマーク'}
-        </button>
-        <button onclick="deleteEntry('{entry.pk}')" 
-                class="px-4 py-2 bg-red-600 hover:bg-red-700 text-white rounded-lg transition-colors flex items-center">
-            <svg class="h-4 w-4 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                <path stroke-linecap="round" stroke-linejoin="round" stroke-width="2" d="M19 7l-.867 12.142A2 2 0 0116.138 21H7.862a2 2 0 01-1.995-1.858L5 7m5 4v6m4-6v6m1-10V4a1 1 0 00-1-1h-4a1 1 0 00-1 1v3M4 7h16"></path>
-            </svg>
-            削除
-        </button>
-    </div>
-    '''
-    
-    return meta_info_html + stock_info_html + tags_html + content_html + action_buttons_html
-
+# ========================================
+# 銘柄タイムライン（ノートブック横断）
+# ========================================
 
-# 新しいエントリータイプ用のレンダー関数
-def render_earnings_content(content):
-    """決算発表コンテンツのHTML生成"""
-    html = '<div class="space-y-4">'
-    
-    if content.get('earnings_date'):
-        html += f'''
-        <div class="bg-purple-900/30 p-4 rounded-lg border border-purple-700">
-            <h4 class="font-semibold text-white mb-2">決算発表日</h4>
-            <p class="text-purple-300 text-lg font-semibold">{content["earnings_date"]}</p>
-        </div>
-        '''
-    
-    if content.get('quarter'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">対象四半期</h4>
-            <p class="text-gray-300">{content["quarter"]}</p>
-        </div>
-        '''
-    
-    if content.get('expectations'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">事前予想</h4>
-            <p class="text-gray-300">{content["expectations"]}</p>
-        </div>
-        '''
-    
-    if content.get('key_criteria'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">注目ポイント</h4>
-            <p class="text-gray-300">{content["key_criteria"]}</p>
-        </div>
-        '''
-    
-    html += '</div>'
-    return html
+def serialize_timeline_entry(entry):
+    """タイムライン表示用にエントリーをシリアライズ"""
+    return {
+        'id': str(entry.pk),
+        'title': entry.title,
+        'entry_type': entry.entry_type,
+        'entry_type_display': entry.get_entry_type_display(),
+        'stock_code': entry.stock_code,
+        'company_name': entry.company_name,
+        'notebook': {
+            'id': str(entry.notebook.pk),
+            'title': entry.notebook.title,
+            'url': reverse('notes:detail', kwargs={'pk': entry.notebook.pk}),
+        },
+        'sub_notebook': {
+            'id': str(entry.sub_notebook.pk) if entry.sub_notebook else None,
+            'title': entry.sub_notebook.title if entry.sub_notebook else None
+        },
+        'event_date': entry.event_date.isoformat() if entry.event_date else None,
+        'is_important': entry.is_important,
+        'is_bookmarked': entry.is_bookmarked,
+        'created_at': entry.created_at.isoformat(),
+        'tags': [{'id': tag.pk, 'name': tag.name} for tag in entry.tags.all()],
+        'content_preview': generate_content_preview(entry)
+    }
 
 
-def render_ir_event_content(content):
-    """IRイベントコンテンツのHTML生成"""
-    html = '<div class="space-y-4">'
-    
-    if content.get('event_name'):
-        html += f'''
-        <div class="bg-indigo-900/30 p-4 rounded-lg border border-indigo-700">
-            <h4 class="font-semibold text-white mb-2">イベント名</h4>
-            <p class="text-indigo-300 text-lg font-semibold">{content["event_name"]}</p>
-        </div>
-        '''
-    
-    if content.get('event_datetime'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">開催日時</h4>
-            <p class="text-gray-300">{content["event_datetime"]}</p>
-        </div>
-        '''
-    
-    if content.get('agenda'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">アジェンダ</h4>
-            <p class="text-gray-300">{content["agenda"]}</p>
-        </div>
-        '''
+@login_required
+def stock_timeline_view(request, stock_code):
+    """銘柄タイムライン（ユーザーの全ノートブックから該当銘柄のエントリーを新しい順に表示）"""
+    try:
+        entries, next_cursor = StockTimelineService.get_page(
+            request.user, stock_code, cursor=request.GET.get('cursor')
+        )
+    except ValueError:
+        return redirect('notes:stock_timeline', stock_code=stock_code)
     
-    if content.get('key_takeaways'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">主要なポイント</h4>
-            <p class="text-gray-300">{content["key_takeaways"]}</p>
-        </div>
-        '''
+    company_name = next((entry.company_name for entry in entries if entry.company_name), '')
     
-    html += '</div>'
-    return html
+    return render(request, 'notes/stock_timeline.html', {
+        'stock_code': stock_code,
+        'company_name': company_name,
+        'entries': entries,
+        'next_cursor': next_cursor,
+    })
 
 
-def render_market_event_content(content):
-    """市場イベントコンテンツのHTML生成"""
-    html = '<div class="space-y-4">'
-    
-    if content.get('event_title'):
-        html += f'''
-        <div class="bg-pink-900/30 p-4 rounded-lg border border-pink-700">
-            <h4 class="font-semibold text-white mb-2">イベントタイトル</h4>
-            <p class="text-pink-300 text-lg font-semibold">{content["event_title"]}</p>
-        </div>
-        '''
-    
-    if content.get('event_date'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">イベント日</h4>
-            <p class="text-gray-300">{content["event_date"]}</p>
-        </div>
-        '''
-    
-    if content.get('market_impact'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">市場への影響</h4>
-            <p class="text-gray-300">{content["market_impact"]}</p>
-        </div>
-        '''
-    
-    if content.get('sector_impact'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">セクターへの影響</h4>
-            <p class="text-gray-300">{content["sector_impact"]}</p>
-        </div>
-        '''
+@login_required
+def stock_timeline_api(request, stock_code):
+    """銘柄タイムラインAPI（カーソルページネーション）"""
+    try:
+        page_size = int(request.GET.get('page_size', StockTimelineService.PAGE_SIZE))
+        entries, next_cursor = StockTimelineService.get_page(
+            request.user, stock_code, cursor=request.GET.get('cursor'), page_size=page_size
+        )
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'error': 'パラメータが不正です'
+        }, status=400)
     
-    html += '</div>'
-    return html
+    return JsonResponse({
+        'success': True,
+        'stock_code': stock_code,
+        'results': [serialize_timeline_entry(entry) for entry in entries],
+        'next_cursor': next_cursor,
+        'has_next': next_cursor is not None,
+    })
 
 
-# 既存のレンダー関数は省略（変更なし）
-def render_analysis_content(content):
-    """決算分析コンテンツのHTML生成"""
-    html = '<div class="space-y-6">'
-    
-    if content.get('summary'):
-        html += f'''
-        <div class="bg-gray-700 p-4 rounded-lg">
-            <h4 class="font-semibold text-white mb-2">サマリー</h4>
-            <p class="text-gray-300">{content["summary"]}</p>
-        </div>
-        '''
-    
-    key_metrics = content.get('key_metrics', {})
-    if any(key_metrics.values()):
-        html += '<div class="grid grid-cols-2 md:grid-cols-4 gap-4">'
-        for key, value in key_metrics.items():
-            if value:
-                display_key = {
-                    'revenue': '売上高',
-                    'operating_profit': '営業利益', 
-                    'net_income': '純利益',
-                    'eps': 'EPS'
-                }.get(key, key)
-                html += f'''
-                <div class="bg-gray-700 p-3 rounded-lg text-center">
-                    <p class="text-sm text-gray-400">{display_key}</p>
-                    <p class="text-lg font-bold text-white">{value}</p>
-                </div>
-                '''
-        html += '</div>'
-    
-    if content.get('analysis'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">分析</h4>
-            <p class="text-gray-300">{content["analysis"]}</p>
-        </div>
-        '''
-    
-    if content.get('outlook'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">今後の見通し</h4>
-            <p class="text-gray-300">{content["outlook"]}</p>
-        </div>
-        '''
-    
-    html += '</div>'
-    return html
-
+# ========================================
+# エクスポート
+# ========================================
 
-def render_news_content(content):
-    """ニュースコンテンツのHTML生成"""
-    html = '<div class="space-y-4">'
-    
-    if content.get('headline'):
-        html += f'''
-        <div class="bg-gray-700 p-4 rounded-lg">
-            <h4 class="font-semibold text-white mb-2">{content["headline"]}</h4>
-            {f'<p class="text-gray-300">{content["content"]}</p>' if content.get("content") else ""}
-        </div>
-        '''
-    
-    if content.get('impact'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">事業への影響</h4>
-            <p class="text-gray-300">{content["impact"]}</p>
-        </div>
-        '''
-    
-    if content.get('stock_impact'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">株価への影響</h4>
-            <p class="text-gray-300">{content["stock_impact"]}</p>
-        </div>
-        '''
-    
-    html += '</div>'
-    return html
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
 
 
-def render_memo_content(content):
-    """メモコンテンツのHTML生成"""
-    html = '<div class="space-y-4">'
-    
-    if content.get('observation'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">観察事項</h4>
-            <p class="text-gray-300">{content["observation"]}</p>
-        </div>
-        '''
-    
-    if content.get('market_trend'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">市場トレンド</h4>
-            <p class="text-gray-300">{content["market_trend"]}</p>
-        </div>
-        '''
+@login_required
+def export_entries_view(request, pk=None):
+    """エントリーのエクスポート（pk 指定時はそのノートブック、未指定時は全ノートブック）
+    
+    クエリパラメータ:
+        format: ndjson（デフォルト）または csv
+        gzip: 1 の場合は gzip 圧縮して出力
+    """
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in EntryExportService.FORMATS:
+        return JsonResponse({
+            'success': False,
+            'error': '対応していない形式です'
+        }, status=400)
+    compress = request.GET.get('gzip') == '1'
     
-    if content.get('personal_note'):
-        html += f'''
-        <div>
-            <h4 class="font-semibold text-white mb-2">個人的メモ</h4>
-            <p class="text-gray-300">{content["personal_note"]}</p>
-        </div>
-        '''
+    notebook = None
+    if pk is not None:
+        notebook = get_object_or_404(Notebook, pk=pk, user=request.user)
     
-    if content.get('next_action'):
-        html += f'''
-        <div class="bg-yellow-900/30 p-4 rounded-lg border border-yellow-700">
-            <h4 class="font-semibold text-white mb-2">次のアクション</h4>
-            <p class="text-gray-300">{content["next_action"]}</p>
-        </div>
-        '''
+    queryset = EntryExportService.get_queryset(request.user, notebook)
+    filename = f"entries-{notebook.pk if notebook else 'all'}-{timezone.localdate():%Y%m%d}.{export_format}"
     
-    html += '</div>'
-    return html
+    if compress:
+        response = StreamingHttpResponse(
+            EntryExportService.stream(queryset, export_format, compress=True),
+            content_type='application/gzip'
+        )
+        filename += '.gz'
+    else:
+        response = StreamingHttpResponse(
+            EntryExportService.stream(queryset, export_format),
+            content_type=EXPORT_CONTENT_TYPES[export_format]
+        )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
 
 
-def render_goal_content(content):
-    """投資目標コンテンツのHTML生成"""
-    html = '<div class="space-y-6">'
+@login_required
+@require_http_methods(["POST"])
+def import_entries_view(request, pk):
+    """エントリーの一括インポート（エクスポートと同じ NDJSON / CSV 形式のファイル）"""
+    notebook = get_object_or_404(Notebook, pk=pk, user=request.user)
     
-    if content.get('target_price') or content.get('sell_timing'):
-        html += '<div class="grid grid-cols-1 md:grid-cols-2 gap-4">'
-        if content.get('target_price'):
-            html += f'''
-            <div class="space-y-2">
-                <h4 class="font-semibold text-white">目標株価</h4>
-                <p class="text-2xl font-bold text-green-400">{content["target_price"]}</p>
-            </div>
-            '''
-        if content.get('sell_timing'):
-            html += f'''
-            <div class="space-y-2">
-                <h4 class="font-semibold text-white">売却タイミング</h4>
-                <p class="text-gray-300">{content["sell_timing"]}</p>
-            </div>
-            '''
-        html += '</div>'
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({
+            'success': False,
+            'error': 'ファイルを指定してください'
+        }, status=400)
     
-    if content.get('investment_reason'):
-        html += f'''
-        <div class="space-y-2">
-            <h4 class="font-semibold text-white">投資理由</h4>
-            <p class="text-gray-300">{content["investment_reason"]}</p>
-        </div>
-        '''
+    import_format = request.POST.get('format') or ('csv' if upload.name.lower().endswith('.csv') else 'ndjson')
+    if import_format not in EntryImportService.FORMATS:
+        return JsonResponse({
+            'success': False,
+            'error': '対応していない形式です'
+        }, status=400)
     
-    if content.get('expected_effect'):
-        html += f'''
-        <div class="bg-purple-900/30 p-4 rounded-lg border border-purple-700">
-            <h4 class="font-semibold text-white mb-2">期待される効果</h4>
-            <p class="text-gray-300">{content["expected_effect"]}</p>
-        </div>
-        '''
+    try:
+        result = EntryImportService.import_file(
+            notebook,
+            io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline=''),
+            import_format
+        )
+    except UnicodeDecodeError:
+        return JsonResponse({
+            'success': False,
+            'error': 'UTF-8 のファイルを指定してください'
+        }, status=400)
+    except Exception as e:
+        logger.error(f"エントリーインポートエラー: {e}", exc_info=True)
+        return JsonResponse({
+            'success': False,
+            'error': 'インポートに失敗しました'
+        }, status=500)
     
-    html += '</div>'
-    return html
-
+    return JsonResponse({
+        'success': True,
+        **result
+    })
@@ -0,0 +1,13 @@
+# ========================================
+# apps/tags/api_urls.py - タグAPIのURL設定
+# ========================================
+
+from rest_framework.routers import SimpleRouter
+from apps.tags import api_views
+
+app_name = 'tags_api'
+
+router = SimpleRouter()
+router.register('', api_views.TagViewSet, basename='tag')
+
+urlpatterns = router.urls
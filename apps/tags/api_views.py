@@ -9,7 +9,12 @@ from django.views.decorators.csrf import csrf_exempt
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import ValidationError
 from apps.tags.models import Tag
+from apps.tags.services import TagSerializer
+from apps.common.serialization import json_response
 from apps.common.utils import SearchHelper
+from rest_framework import permissions, viewsets
+from apps.common.api import ApiCursorPagination, SparseFieldsetMixin
+from apps.tags.serializers import TagApiSerializer
 
 @login_required
 @require_http_methods(["GET"])
@@ -85,12 +90,11 @@ def tag_create_api(request):
                 'message': '既存のタグを返します'
             })
         
-        # 新規タグ作成（ユーザー固有）
+        # 新規タグ作成（ユーザー固有・使用回数は付与時に加算）
         tag = Tag.objects.create(
             user=request.user,
             name=tag_name,
-            description=description,
-            usage_count=1
+            description=description
         )
         
         return JsonResponse({
@@ -265,17 +269,9 @@ def popular_tags_api(request):
         
         tags = tags.order_by('-usage_count')[:limit]
         
-        results = [
-            {
-                'id': tag.pk,
-                'name': tag.name,
-                'usage_count': tag.usage_count,
-                'color': tag.get_effective_color()
-            }
-            for tag in tags
-        ]
+        results = TagSerializer.rows(tags)
         
-        return JsonResponse({
+        return json_response({
             'success': True,
             'tags': results,
             'count': len(results)
@@ -311,4 +307,18 @@ def user_tag_stats_api(request):
         return JsonResponse({
             'success': False,
             'error': str(e)
-        }, status=500)
\ No newline at end of file
+        }, status=500)
+
+
+class TagViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
+    """ログインユーザーのタグ一覧・詳細（読み取り専用）"""
+    serializer_class = TagApiSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = ApiCursorPagination
+    filterset_fields = ['is_active']
+    search_fields = ['name', 'description']
+    ordering_fields = ['name', 'usage_count', 'updated_at']
+    ordering = 'name'
+
+    def get_queryset(self):
+        return self.apply_sparse_fieldset(Tag.objects.get_for_user(self.request.user))
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TagsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.tags'
+    
+    def ready(self):
+        """アプリ起動時の初期化処理"""
+        import apps.tags.signals
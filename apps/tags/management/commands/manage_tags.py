@@ -320,7 +320,7 @@ class Command(BaseCommand):
             for i, tag in enumerate(user_tags, 1):
                 # ノートブックとエントリーでの使用回数を計算
                 notebook_count = Notebook.objects.filter(user=user, tags=tag).count()
-                entry_count = Entry.objects.filter(notebook__user=user, tags=tag).count()
+                entry_count = Entry.objects.filter(user=user, tags=tag).count()
                 new_count = notebook_count + entry_count
                 
                 if tag.usage_count != new_count:
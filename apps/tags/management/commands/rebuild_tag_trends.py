@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from apps.tags.services import TagTrendService
+
+
+class Command(BaseCommand):
+    help = 'タグのトレンドスコアを直近のノートブック/エントリー更新から再計算'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            type=str,
+            help='対象ユーザー名（指定しない場合は全ユーザー）'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='集計対象とする更新日の範囲（デフォルト: 90日）'
+        )
+
+    def handle(self, *args, **options):
+        username = options.get('user')
+        days = options['days']
+
+        if days <= 0:
+            raise CommandError('--days は1以上を指定してください')
+
+        users = User.objects.all()
+        if username:
+            users = users.filter(username=username)
+            if not users.exists():
+                raise CommandError(f'User "{username}" not found')
+
+        created = TagTrendService.rebuild(users, days=days)
+        self.stdout.write(self.style.SUCCESS(f'トレンドスコアを再計算しました（{created}件）'))
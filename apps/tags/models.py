@@ -1,38 +1,52 @@
+import math
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
-from datetime import timedelta
-from apps.common.models import BaseModel
+from datetime import datetime, timedelta, timezone as dt_timezone
+from apps.common.models import BaseModel, SoftDeleteManager, SoftDeleteModel, SoftDeleteQuerySet
 
-class TagManager(models.Manager):
-    """タグマネージャー（ユーザー固有クエリセット）"""
+class TagManager(SoftDeleteManager):
+    """タグマネージャー（ユーザー固有クエリセット・論理削除済みを除外）"""
     
     def get_for_user(self, user):
         """指定ユーザーのタグのみを取得"""
         return self.filter(user=user)
     
     def get_trending_tags(self, user, limit=10):
-        """ユーザーのトレンドタグを取得（使用頻度とアクティビティベース）"""
-        # 過去30日間でアクティブなタグを優先
-        recent_threshold = timezone.now() - timedelta(days=30)
-        
-        return self.filter(
+        """ユーザーのトレンドタグを取得（減衰付きトレンドスコア順）
+
+        TagTrendScore の (user, -score) インデックスから上位N件を読むだけで、
+        スコアのないタグは総使用回数順で補完する。
+        各タグには現在時点に換算したスコアを trend_score として設定する。
+        """
+        now = timezone.now()
+        scores = TagTrendScore.objects.filter(
             user=user,
-            is_active=True,
-            usage_count__gt=0
-        ).annotate(
-            recent_usage=models.Count(
-                'notebook',
-                filter=models.Q(notebook__updated_at__gte=recent_threshold)
-            ) + models.Count(
-                'entry',
-                filter=models.Q(entry__updated_at__gte=recent_threshold)
-            )
-        ).order_by(
-            '-recent_usage',  # 最近の使用頻度順
-            '-usage_count',   # 総使用回数順
-            '-updated_at'     # 更新日時順
-        )[:limit]
+            tag__is_active=True,
+            tag__deleted_at__isnull=True,
+            tag__usage_count__gt=0,
+            score__isnull=False,
+        ).select_related('tag').order_by('-score')[:limit]
+        
+        tags = []
+        for trend in scores:
+            trend.tag.trend_score = trend.get_current_score(now)
+            tags.append(trend.tag)
+        
+        if len(tags) < limit:
+            # 最近の使用がないタグは総使用回数順
+            popular = self.filter(
+                user=user,
+                is_active=True,
+                usage_count__gt=0
+            ).exclude(
+                pk__in=[tag.pk for tag in tags]
+            ).order_by('-usage_count', '-updated_at')[:limit - len(tags)]
+            for tag in popular:
+                tag.trend_score = 0.0
+                tags.append(tag)
+        
+        return tags
     
     def get_popular_tags(self, user, limit=20):
         """ユーザーの人気タグを取得（総使用回数ベース）"""
@@ -55,7 +69,7 @@ class TagManager(models.Manager):
         ).order_by('-usage_count', 'name')
 
 
-class Tag(BaseModel):
+class Tag(SoftDeleteModel, BaseModel):
     """タグモデル（ユーザー固有版・カテゴリなし）"""
     
     user = models.ForeignKey(
@@ -70,15 +84,24 @@ class Tag(BaseModel):
     is_active = models.BooleanField(default=True, verbose_name='有効フラグ')
     color = models.CharField(max_length=7, blank=True, verbose_name='カラーコード')
     
+    DEFAULT_COLOR = '#6b7280'  # gray-600
+    
     # カスタムマネージャーを使用
     objects = TagManager()
+    all_objects = SoftDeleteQuerySet.as_manager()
     
     class Meta:
         verbose_name = 'タグ'
         verbose_name_plural = 'タグ'
         ordering = ['-usage_count', 'name']
-        # ユーザー内でのタグ名の一意性を保証
-        unique_together = ['user', 'name']
+        # ユーザー内でのタグ名の一意性を保証（論理削除済みのタグは対象外）
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'name'],
+                condition=models.Q(deleted_at__isnull=True),
+                name='unique_active_tag_name_per_user',
+            ),
+        ]
         indexes = [
             models.Index(fields=['user', 'is_active']),
             models.Index(fields=['user', 'usage_count']),
@@ -88,16 +111,9 @@ class Tag(BaseModel):
     def __str__(self):
         return f"{self.user.username}:{self.name}"
     
-    def increment_usage(self):
-        """使用回数をインクリメント"""
-        self.usage_count = models.F('usage_count') + 1
-        self.save(update_fields=['usage_count'])
-        # Refresh from DB to get the actual value
-        self.refresh_from_db(fields=['usage_count'])
-    
     def get_default_color(self):
         """デフォルトカラーコードを取得"""
-        return '#6b7280'  # gray-600
+        return self.DEFAULT_COLOR
     
     def get_effective_color(self):
         """実際に表示に使用する色を取得（カスタム色 > デフォルト色）"""
@@ -118,7 +134,7 @@ class Tag(BaseModel):
     def get_related_entries(self, limit=5):
         """関連エントリーを取得（同一ユーザーのみ）"""
         return self.entry_set.select_related('notebook').filter(
-            notebook__user=self.user
+            user=self.user
         ).order_by('-created_at')[:limit]
     
     def save(self, *args, **kwargs):
@@ -127,13 +143,17 @@ class Tag(BaseModel):
             self.color = self.get_default_color()
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def normalize_name(name):
+        """タグ名を正規化（#がない場合は自動で追加）"""
+        return name if name.startswith('#') else '#' + name
+    
     @classmethod
     def get_or_create_for_user(cls, user, name, **kwargs):
         """ユーザー固有のタグを取得または作成"""
-        # #がない場合は自動で追加
-        if not name.startswith('#'):
-            name = '#' + name
+        name = cls.normalize_name(name)
         
+        # 使用回数はノートブック/エントリーへの付与時にシグナルで更新される
         tag, created = cls.objects.get_or_create(
             user=user,
             name=name,
@@ -144,8 +164,60 @@ class Tag(BaseModel):
             }
         )
         
-        if not created:
-            # 既存タグの使用回数をインクリメント
-            tag.increment_usage()
-        
-        return tag, created
\ No newline at end of file
+        return tag, created
+
+
+# トレンドスコアの半減期と基準時刻
+# スコアは基準時刻からの経過に応じた重み exp(λ(t - EPOCH)) の合計の自然対数として保存し、
+# 読み出し時に exp(score - λ(now - EPOCH)) で現在値に換算する。全タグが同じ係数で
+# 減衰するため保存値のまま並べ替えられ、対数で保持するため経過時間によらずオーバーフローしない。
+TREND_HALF_LIFE = timedelta(days=7)
+TREND_EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+TREND_DECAY_RATE = math.log(2) / TREND_HALF_LIFE.total_seconds()
+
+
+def get_trend_log_weight(at):
+    """指定時刻の使用1回あたりの重みの対数（基準時刻で正規化）"""
+    return TREND_DECAY_RATE * (at - TREND_EPOCH).total_seconds()
+
+
+def add_log_scores(a, b):
+    """対数のまま重みを合算（log(exp(a) + exp(b))、どちらかが None なら他方）"""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    high, low = max(a, b), min(a, b)
+    return high + math.log1p(math.exp(low - high))
+
+
+class TagTrendScore(models.Model):
+    """タグのトレンドスコア（指数減衰・ユーザー単位で上位N件を取得）"""
+    
+    user = models.ForeignKey(User, on_delete=models.CASCADE, verbose_name='ユーザー')
+    tag = models.OneToOneField(
+        Tag,
+        on_delete=models.CASCADE,
+        related_name='trend',
+        verbose_name='タグ'
+    )
+    # 重みの合計の自然対数（作成直後の加算前のみ None）
+    score = models.FloatField(null=True, default=None, verbose_name='スコア（基準時刻換算・対数）')
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='更新日時')
+    
+    class Meta:
+        verbose_name = 'タグトレンドスコア'
+        verbose_name_plural = 'タグトレンドスコア'
+        indexes = [
+            models.Index(fields=['user', '-score']),
+        ]
+    
+    def __str__(self):
+        return f"{self.tag.name}: {self.score}"
+    
+    def get_current_score(self, now=None):
+        """現在時点に換算したスコア（直近の使用回数に相当）"""
+        if self.score is None:
+            return 0.0
+        now = now or timezone.now()
+        return math.exp(self.score - get_trend_log_weight(now))
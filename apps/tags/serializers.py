@@ -0,0 +1,29 @@
+# ========================================
+# apps/tags/serializers.py - タグAPI用シリアライザー
+# ========================================
+
+from rest_framework import serializers
+from apps.common.api import SparseFieldsetSerializerMixin
+from apps.tags.models import Tag
+
+
+class TagSummarySerializer(serializers.ModelSerializer):
+    """ノートブック・エントリーに埋め込むタグ（id・名前・表示色のみ）"""
+    color = serializers.CharField(source='get_effective_color', read_only=True)
+
+    class Meta:
+        model = Tag
+        fields = ('id', 'name', 'color')
+
+
+class TagApiSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+    """タグ"""
+    color = serializers.CharField(source='get_effective_color', read_only=True)
+
+    class Meta:
+        model = Tag
+        fields = (
+            'id', 'name', 'description', 'color', 'usage_count', 'is_active',
+            'created_at', 'updated_at',
+        )
+        read_only_fields = fields
@@ -0,0 +1,231 @@
+# ========================================
+# apps/tags/services.py
+# ========================================
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from django.contrib.auth.models import User
+from django.db.models import Case, Count, F, FloatField, Q, Sum, Value, When
+from django.db.models.functions import Exp, Greatest, Least, Ln
+from django.template.loader import render_to_string
+from django.utils import timezone
+from apps.common import outbox
+from apps.common.cache import invalidate_user_cache
+from apps.common.serialization import url_pattern
+from apps.notes.models import Notebook, Entry
+from apps.tags.models import Tag, TagTrendScore, add_log_scores, get_trend_log_weight
+
+
+class TagTrendService:
+    """タグのトレンドスコア（TagTrendScore）の差分更新"""
+
+    @staticmethod
+    def record(user_id, tag_ids=None, notebook_id=None, entry_id=None):
+        """タグの使用を記録
+
+        tag_ids を直接指定するか、更新されたノートブック/エントリーを指定する
+        （付与されているタグは適用時にまとめて解決する）。
+        """
+        payload = {'at': timezone.now().isoformat()}
+        if tag_ids:
+            payload['tag_ids'] = sorted(tag_ids)
+        elif notebook_id:
+            payload['notebook_id'] = str(notebook_id)
+        elif entry_id:
+            payload['entry_id'] = str(entry_id)
+        else:
+            return
+        outbox.publish('tag.trend', user_id, payload)
+
+    @staticmethod
+    def apply(events):
+        """記録された使用をタグごとに合算し、1回のUPDATEで加算"""
+        notebook_ids = {payload['notebook_id'] for user_id, payload in events if 'notebook_id' in payload}
+        entry_ids = {payload['entry_id'] for user_id, payload in events if 'entry_id' in payload}
+
+        tags_by_owner = defaultdict(list)
+        if notebook_ids:
+            rows = Notebook.tags.through.objects.filter(notebook_id__in=notebook_ids)
+            for notebook_id, tag_id in rows.values_list('notebook_id', 'tag_id'):
+                tags_by_owner[str(notebook_id)].append(tag_id)
+        if entry_ids:
+            rows = Entry.tags.through.objects.filter(entry_id__in=entry_ids)
+            for entry_id, tag_id in rows.values_list('entry_id', 'tag_id'):
+                tags_by_owner[str(entry_id)].append(tag_id)
+
+        weights = {}
+        owners = {}
+        for user_id, payload in events:
+            weight = get_trend_log_weight(datetime.fromisoformat(payload['at']))
+            tag_ids = payload.get('tag_ids') or tags_by_owner.get(payload.get('notebook_id') or payload.get('entry_id'), [])
+            for tag_id in tag_ids:
+                weights[tag_id] = add_log_scores(weights.get(tag_id), weight)
+                owners[tag_id] = user_id
+
+        if not weights:
+            return
+
+        # 未作成の行を作成してから、全タグ分を1回のUPDATEで対数のまま加算
+        # （log(e^a + e^b) = max + log(1 + e^(min - max))）
+        TagTrendScore.objects.bulk_create(
+            [TagTrendScore(user_id=owners[tag_id], tag_id=tag_id) for tag_id in weights],
+            ignore_conflicts=True,
+        )
+        weight = Case(
+            *[When(tag_id=tag_id, then=Value(weight)) for tag_id, weight in weights.items()],
+            output_field=FloatField(),
+        )
+        high, low = Greatest(F('score'), weight), Least(F('score'), weight)
+        TagTrendScore.objects.filter(tag_id__in=weights.keys()).update(
+            score=Case(
+                When(score__isnull=True, then=weight),
+                default=high + Ln(Value(1.0) + Exp(low - high)),
+                output_field=FloatField(),
+            )
+        )
+
+        for user_id in set(owners.values()):
+            invalidate_user_cache(user_id)
+
+    @staticmethod
+    def rebuild(users=None, days=90):
+        """直近days日に更新されたノートブック/エントリーからスコアを再計算
+
+        Returns:
+            int: 作成したスコア行の数
+        """
+        if users is None:
+            users = User.objects.all()
+
+        cutoff = timezone.now() - timedelta(days=days)
+        weights = {}
+        owners = {}
+
+        notebook_rows = Notebook.tags.through.objects.filter(
+            notebook__user__in=users,
+            notebook__deleted_at__isnull=True,
+            notebook__updated_at__gte=cutoff,
+        ).values_list('tag_id', 'notebook__user_id', 'notebook__updated_at')
+        entry_rows = Entry.tags.through.objects.filter(
+            entry__user__in=users,
+            entry__deleted_at__isnull=True,
+            entry__updated_at__gte=cutoff,
+        ).values_list('tag_id', 'entry__user_id', 'entry__updated_at')
+
+        for rows in (notebook_rows, entry_rows):
+            for tag_id, user_id, updated_at in rows.iterator():
+                weights[tag_id] = add_log_scores(weights.get(tag_id), get_trend_log_weight(updated_at))
+                owners[tag_id] = user_id
+
+        TagTrendScore.objects.filter(user__in=users).delete()
+        TagTrendScore.objects.bulk_create(
+            [TagTrendScore(user_id=owners[tag_id], tag_id=tag_id, score=score) for tag_id, score in weights.items()],
+            batch_size=500,
+        )
+        for user_id in users.values_list('id', flat=True):
+            invalidate_user_cache(user_id)
+        return len(weights)
+
+
+class TagSerializer:
+    """タグ検索・人気タグAjax用の軽量シリアライザー
+
+    必要な列だけを values() で取得し、表示色はカスタム色がなければ既定色、
+    編集・削除URLは1回だけ reverse() したパターンから組み立てる。
+    """
+
+    FIELDS = ('pk', 'name', 'usage_count', 'color')
+    DETAIL_FIELDS = FIELDS + ('description', 'is_active')
+    # reverse() 用のプレースホルダー（<int:pk> に一致し、URL中の他の部分と重ならない値）
+    URL_PLACEHOLDER = '987654321'
+
+    @staticmethod
+    def rows(queryset, with_details=False, with_urls=False):
+        """タグをAjax応答用の辞書のリストに変換"""
+        fields = TagSerializer.DETAIL_FIELDS if with_details else TagSerializer.FIELDS
+        if with_urls:
+            edit_url = url_pattern('tags:edit', placeholder=TagSerializer.URL_PLACEHOLDER)
+            delete_url = url_pattern('tags:delete', placeholder=TagSerializer.URL_PLACEHOLDER)
+
+        results = []
+        for row in queryset.values(*fields):
+            result = {
+                'id': row['pk'],
+                'name': row['name'],
+                'usage_count': row['usage_count'],
+                'color': row['color'] or Tag.DEFAULT_COLOR,
+            }
+            if with_details:
+                result['description'] = row['description']
+                result['is_active'] = row['is_active']
+            if with_urls:
+                result['edit_url'] = edit_url(row['pk'])
+                result['delete_url'] = delete_url(row['pk'])
+            results.append(result)
+        return results
+
+    @staticmethod
+    def related_counts(user, tag_ids):
+        """タグごとのユーザーのノートブック数・エントリー数（中間テーブルの集計2クエリ）
+
+        Returns:
+            dict: タグID → (ノートブック数, エントリー数)
+        """
+        counts = defaultdict(lambda: [0, 0])
+        for index, (through, owner_field) in enumerate(
+            ((Notebook.tags.through, 'notebook'), (Entry.tags.through, 'entry'))
+        ):
+            rows = through.objects.filter(**{
+                'tag_id__in': tag_ids,
+                f'{owner_field}__user': user,
+                f'{owner_field}__deleted_at__isnull': True,
+            }).order_by().values('tag_id').annotate(count=Count('pk')).values_list('tag_id', 'count')
+            for tag_id, count in rows:
+                counts[tag_id][index] = count
+        return {tag_id: tuple(pair) for tag_id, pair in counts.items()}
+
+
+class TagListService:
+    """タグ一覧画面の統計と、Ajax操作後の部分更新用フラグメント
+
+    一括操作・状態切り替え・クイック編集の応答に、更新された行と統計を
+    サーバー側で描画したHTMLとして含め、クライアントはページを再読み込みせずに
+    該当部分だけを差し替える。
+    """
+
+    ROW_TEMPLATE = 'tags/partials/tag_row.html'
+    STATS_TEMPLATE = 'tags/partials/tag_stats.html'
+
+    @staticmethod
+    def get_stats(user):
+        """タグ数・有効数・使用中の数・総使用回数を1回の集計クエリで取得"""
+        stats = Tag.objects.get_for_user(user).aggregate(
+            total_tags=Count('pk'),
+            active_tags=Count('pk', filter=Q(is_active=True)),
+            used_tags=Count('pk', filter=Q(usage_count__gt=0)),
+            total_usage=Sum('usage_count'),
+        )
+        stats['total_usage'] = stats['total_usage'] or 0
+        return stats
+
+    @staticmethod
+    def render_update(request, tags=(), removed_ids=()):
+        """更新された行・削除された行のID・統計をAjax応答用の辞書で返す"""
+        stats = TagListService.get_stats(request.user)
+        return {
+            'rows': [
+                {
+                    'id': tag.pk,
+                    'html': render_to_string(TagListService.ROW_TEMPLATE, {'tag': tag}, request=request),
+                }
+                for tag in tags
+            ],
+            'removed_ids': list(removed_ids),
+            'stats': stats,
+            'stats_html': render_to_string(TagListService.STATS_TEMPLATE, {'stats': stats}, request=request),
+        }
+
+
+@outbox.handler('tag.trend')
+def apply_tag_trends(events):
+    TagTrendService.apply(events)
@@ -0,0 +1,162 @@
+# ========================================
+# apps/tags/signals.py - タグ使用回数の自動管理
+# ========================================
+
+from collections import defaultdict
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from apps.common import outbox
+from apps.common.cache import invalidate_tag_cache, invalidate_user_cache
+from apps.common.signals import pre_soft_delete
+from apps.tags.models import Tag
+from apps.tags.services import TagTrendService
+from apps.notes.models import Notebook, Entry
+
+
+def adjust_usage_counts(tag_ids, delta):
+    """指定タグの使用回数を1回のUPDATEで増減（0未満にはしない）
+
+    tag_ids にはIDのリストまたはサブクエリを指定できる。
+    """
+    if not delta:
+        return 0
+    return Tag.all_objects.filter(pk__in=tag_ids).update(
+        usage_count=Greatest(F('usage_count') + delta, Value(0))
+    )
+
+
+def release_usage_counts(through_rows):
+    """中間テーブルの行集合に含まれる件数分だけ各タグの使用回数を1回のUPDATEで減算"""
+    removed = through_rows.filter(tag=OuterRef('pk')).order_by().values('tag').annotate(
+        count=Count('pk')
+    ).values('count')
+    return Tag.all_objects.filter(pk__in=through_rows.values('tag_id')).update(
+        usage_count=Greatest(F('usage_count') - Coalesce(Subquery(removed), Value(0)), Value(0))
+    )
+
+
+@outbox.handler('tag.usage')
+def apply_tag_usage(events):
+    """タグごとに増減を合算し、増減値ごとに1回のUPDATEで反映"""
+    totals = defaultdict(int)
+    for user_id, payload in events:
+        for tag_id in payload['tag_ids']:
+            totals[tag_id] += payload['delta']
+
+    by_delta = defaultdict(list)
+    for tag_id, delta in totals.items():
+        by_delta[delta].append(tag_id)
+    for delta, tag_ids in by_delta.items():
+        adjust_usage_counts(tag_ids, delta)
+    for user_id in {user_id for user_id, payload in events}:
+        invalidate_user_cache(user_id)
+
+
+def _owner_field(through):
+    """中間テーブル上のノートブック/エントリー側のフィールド名"""
+    return 'notebook' if through is Notebook.tags.through else 'entry'
+
+
+@receiver(m2m_changed, sender=Notebook.tags.through)
+@receiver(m2m_changed, sender=Entry.tags.through)
+def update_tag_usage_on_m2m_change(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """タグの付け外しに合わせて使用回数を更新（変更セットごとに1クエリ）
+
+    論理削除済みのノートブック/エントリーのタグは論理削除時に減算済みのため数えない。
+    """
+    if not reverse and instance.is_deleted:
+        return
+
+    if action in ('post_add', 'post_remove'):
+        if not pk_set:
+            return
+        delta = 1 if action == 'post_add' else -1
+
+        if reverse:
+            # tag.notebook_set.add(...) など：タグ1件に対して削除されていない件数分を増減
+            user_id, tag_ids = instance.user_id, [instance.pk]
+            count = model.objects.filter(pk__in=pk_set).count()
+            if not count:
+                return
+            outbox.publish('tag.usage', user_id, {'tag_ids': tag_ids, 'delta': delta * count})
+        else:
+            user_id = instance.user_id
+            tag_ids = sorted(pk_set)
+            outbox.publish('tag.usage', user_id, {'tag_ids': tag_ids, 'delta': delta})
+
+        if action == 'post_add':
+            TagTrendService.record(user_id, tag_ids=tag_ids)
+
+    elif action == 'pre_clear':
+        # clear後は対象が取得できないため削除前に対象タグを解決し、
+        # 付け外しと同じ遅延経路で発行順に反映する
+        if reverse:
+            owner = _owner_field(sender)
+            count = sender.objects.filter(tag=instance, **{f'{owner}__deleted_at__isnull': True}).count()
+            if count:
+                outbox.publish('tag.usage', instance.user_id, {'tag_ids': [instance.pk], 'delta': -count})
+        else:
+            tag_ids = sorted(
+                sender.objects.filter(**{_owner_field(sender): instance}).values_list('tag_id', flat=True)
+            )
+            if tag_ids:
+                outbox.publish('tag.usage', instance.user_id, {'tag_ids': tag_ids, 'delta': -1})
+
+
+@receiver(post_save, sender=Notebook)
+@receiver(post_save, sender=Entry)
+def update_tag_trends_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """ノートブック/エントリー更新時に付与されているタグのトレンドスコアを加算
+
+    新規作成時はタグが付与されていないため、付与時（post_add）に加算される。
+    お気に入り切り替えなど updated_at を更新しない保存は対象外。
+    """
+    if created or (update_fields is not None and 'updated_at' not in update_fields):
+        return
+    if sender is Notebook:
+        TagTrendService.record(instance.user_id, notebook_id=instance.pk)
+    else:
+        TagTrendService.record(instance.user_id, entry_id=instance.pk)
+
+
+@receiver(pre_delete, sender=Notebook)
+@receiver(pre_delete, sender=Entry)
+def update_tag_usage_on_delete(sender, instance, **kwargs):
+    """ノートブック/エントリー削除時（中間テーブルはシグナルなしで削除される）"""
+    if instance.is_deleted:
+        # 論理削除時に反映済み
+        return
+    through = sender.tags.through
+    tag_ids = through.objects.filter(**{_owner_field(through): instance}).values('tag_id')
+    adjust_usage_counts(tag_ids, -1)
+
+
+@receiver(pre_soft_delete, sender=Notebook)
+@receiver(pre_soft_delete, sender=Entry)
+def update_tag_usage_on_soft_delete(sender, queryset, **kwargs):
+    """ノートブック/エントリー論理削除時（付与されていたタグをまとめて減算）"""
+    through = sender.tags.through
+    release_usage_counts(through.objects.filter(**{f'{_owner_field(through)}__in': queryset.values('pk')}))
+
+
+# ノートカード等のフラグメントキャッシュはタグ集合のバージョンをキーに含む
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def invalidate_tag_fragments_on_tag_change(sender, instance, **kwargs):
+    """タグの作成・変更・削除時"""
+    invalidate_tag_cache(instance.user_id)
+
+
+@receiver(pre_soft_delete, sender=Tag)
+def invalidate_tag_fragments_on_tag_soft_delete(sender, queryset, **kwargs):
+    for user_id in queryset.values_list('user', flat=True).distinct():
+        invalidate_tag_cache(user_id)
+
+
+@receiver(m2m_changed, sender=Notebook.tags.through)
+def invalidate_tag_fragments_on_notebook_tags_change(sender, instance, action, **kwargs):
+    """ノートブックのタグ付け外し時"""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_tag_cache(instance.user_id)
@@ -1,3 +1,165 @@
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from apps.notes.models import Notebook, Entry
+from apps.tags.models import TREND_HALF_LIFE, Tag, TagTrendScore, add_log_scores, get_trend_log_weight
+from apps.tags.services import TagTrendService
 
-# Create your tests here.
+
+class TagApiQueryBudgetTests(TestCase):
+    """タグAPIのクエリ数と疎なフィールドセット"""
+
+    # セッション・ユーザー・一覧
+    QUERIES = 3
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='tagger', password='password123')
+        other = User.objects.create_user(username='other', password='password123')
+        Tag.objects.create(user=other, name='#他人のタグ')
+        for i in range(25):
+            Tag.objects.create(user=self.user, name=f'#タグ{i:02d}', usage_count=i)
+        self.client.force_login(self.user)
+
+    def test_list_query_budget(self):
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse('tags_api:tag-list'))
+
+        data = response.json()
+        self.assertEqual(len(data['results']), 20)
+        self.assertEqual(data['results'][0]['name'], '#タグ00')
+        self.assertEqual(data['results'][0]['color'], Tag.DEFAULT_COLOR)
+
+        with self.assertNumQueries(self.QUERIES):
+            data = self.client.get(data['next']).json()
+        self.assertEqual(len(data['results']), 5)
+
+    def test_sparse_fields_and_ordering(self):
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(
+                reverse('tags_api:tag-list'), {'fields': 'name,usage_count', 'ordering': '-usage_count'}
+            )
+
+        first = response.json()['results'][0]
+        self.assertEqual(first, {'name': '#タグ24', 'usage_count': 24})
+
+    def test_detail_query_budget(self):
+        tag = Tag.objects.get(user=self.user, name='#タグ03')
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(reverse('tags_api:tag-detail', kwargs={'pk': tag.pk}))
+        self.assertEqual(response.json()['name'], '#タグ03')
+
+    def test_requires_login(self):
+        self.client.logout()
+        response = self.client.get(reverse('tags_api:tag-list'))
+        self.assertEqual(response.status_code, 403)
+
+
+class TagUsageCountTests(TestCase):
+    """タグの付け外し（m2m_changed）による使用回数の更新"""
+
+    def setUp(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(username='usage', password='password123')
+            self.tag_a = Tag.objects.create(user=self.user, name='#銘柄A')
+            self.tag_b = Tag.objects.create(user=self.user, name='#銘柄B')
+            self.notebook = Notebook.objects.create(user=self.user, title='使用回数ノート')
+            self.other_notebook = Notebook.objects.create(user=self.user, title='別ノート')
+            self.entry = Entry.objects.create(
+                notebook=self.notebook, entry_type='MEMO', title='メモ', content={'observation': '観察'}
+            )
+
+    def _apply(self, func, *args):
+        with self.captureOnCommitCallbacks(execute=True):
+            func(*args)
+
+    def _counts(self):
+        return tuple(Tag.all_objects.get(pk=tag.pk).usage_count for tag in (self.tag_a, self.tag_b))
+
+    def test_forward_add_remove_clear(self):
+        self._apply(self.notebook.tags.add, self.tag_a, self.tag_b)
+        self._apply(self.entry.tags.add, self.tag_a)
+        self.assertEqual(self._counts(), (2, 1))
+
+        self._apply(self.notebook.tags.remove, self.tag_b)
+        self.assertEqual(self._counts(), (2, 0))
+
+        self._apply(self.notebook.tags.clear)
+        self.assertEqual(self._counts(), (1, 0))
+
+    def test_reverse_add_remove_clear(self):
+        self._apply(self.tag_a.notebook_set.add, self.notebook, self.other_notebook)
+        self._apply(self.tag_a.entry_set.add, self.entry)
+        self.assertEqual(self._counts(), (3, 0))
+
+        self._apply(self.tag_a.notebook_set.remove, self.other_notebook)
+        self.assertEqual(self._counts(), (2, 0))
+
+        self._apply(self.tag_a.notebook_set.clear)
+        self.assertEqual(self._counts(), (1, 0))
+
+    def test_reverse_clear_skips_soft_deleted_owner(self):
+        self._apply(self.tag_a.notebook_set.add, self.notebook, self.other_notebook)
+        self._apply(self.entry.tags.add, self.tag_a)
+        self._apply(self.other_notebook.delete)
+        self.assertEqual(self._counts(), (2, 0))
+
+        # 論理削除時に減算済みの中間テーブル行は二重に減算しない
+        self._apply(self.tag_a.notebook_set.clear)
+        self.assertEqual(self._counts(), (1, 0))
+
+    def test_soft_deleted_owner_changes_are_not_counted(self):
+        self._apply(self.notebook.tags.add, self.tag_a, self.tag_b)
+        self._apply(self.other_notebook.tags.add, self.tag_a)
+        self._apply(self.notebook.delete)
+        self.assertEqual(self._counts(), (1, 0))
+
+        deleted = Notebook.all_objects.get(pk=self.notebook.pk)
+        self._apply(deleted.tags.clear)
+        self.assertEqual(self._counts(), (1, 0))
+
+
+class TagTrendScoreTests(TestCase):
+    """減衰付きトレンドスコア（対数で保持）"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='trend', password='password123')
+        self.tag = Tag.objects.create(user=self.user, name='#高配当', usage_count=1)
+        self.now = timezone.now()
+
+    def _use(self, tag, at, times=1):
+        TagTrendService.apply([(self.user.pk, {'at': at.isoformat(), 'tag_ids': [tag.pk]})] * times)
+
+    def _score(self, tag=None):
+        return TagTrendScore.objects.get(tag=tag or self.tag)
+
+    def test_score_halves_every_half_life(self):
+        self._use(self.tag, self.now, times=2)
+        self._use(self.tag, self.now)
+
+        score = self._score()
+        self.assertAlmostEqual(score.get_current_score(self.now), 3.0)
+        self.assertAlmostEqual(score.get_current_score(self.now + TREND_HALF_LIFE), 1.5)
+
+    def test_recent_use_ranks_above_older_heavier_use(self):
+        old = Tag.objects.create(user=self.user, name='#半導体', usage_count=3)
+        self._use(old, self.now - timedelta(days=30), times=3)
+        self._use(self.tag, self.now)
+
+        trending = Tag.objects.get_trending_tags(self.user)
+        self.assertEqual([tag.name for tag in trending[:2]], ['#高配当', '#半導体'])
+
+    def test_far_future_timestamps_do_not_overflow(self):
+        # 基準時刻から離れるほど重みの指数は大きくなるが、対数のまま加算するため溢れない
+        future = datetime(2300, 1, 1, tzinfo=dt_timezone.utc)
+        self.assertGreater(get_trend_log_weight(future), 1000)
+
+        self._use(self.tag, future)
+        self._use(self.tag, future)
+
+        score = self._score()
+        self.assertTrue(math.isfinite(score.score))
+        self.assertAlmostEqual(score.get_current_score(future), 2.0)
+        self.assertAlmostEqual(add_log_scores(score.score, score.score), score.score + math.log(2))
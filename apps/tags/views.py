@@ -18,6 +18,10 @@ from django.utils import timezone
 from datetime import timedelta
 from apps.tags.models import Tag
 from apps.notes.models import Notebook, Entry
+from apps.tags.services import TagListService, TagSerializer
+from apps.common.cache import invalidate_tag_cache, invalidate_user_cache
+from apps.common.serialization import json_response
+from apps.common.conditional import user_condition
 
 
 class TagListView(LoginRequiredMixin, ListView):
@@ -69,12 +73,7 @@ class TagListView(LoginRequiredMixin, ListView):
         
         # ユーザー固有の統計情報
         user_tags = Tag.objects.get_for_user(self.request.user)
-        context['stats'] = {
-            'total_tags': user_tags.count(),
-            'active_tags': user_tags.filter(is_active=True).count(),
-            'used_tags': user_tags.filter(usage_count__gt=0).count(),
-            'total_usage': user_tags.aggregate(total=Sum('usage_count'))['total'] or 0,
-        }
+        context['stats'] = TagListService.get_stats(self.request.user)
         
         # 検索・フィルター情報
         context['current_filters'] = {
@@ -125,7 +124,7 @@ class TagUpdateView(LoginRequiredMixin, UpdateView):
         tag = self.object
         context['usage_stats'] = {
             'notebooks': tag.notebook_set.filter(user=self.request.user).count(),
-            'entries': tag.entry_set.filter(notebook__user=self.request.user).count(),
+            'entries': tag.entry_set.filter(user=self.request.user).count(),
             'total_usage': tag.usage_count,
         }
         
@@ -136,8 +135,8 @@ class TagUpdateView(LoginRequiredMixin, UpdateView):
         
         # 関連エントリー（ユーザー固有、最新5件）
         context['related_entries'] = tag.entry_set.filter(
-            notebook__user=self.request.user
-        ).select_related('notebook').order_by('-created_at')[:5]
+            user=self.request.user
+        ).select_related('notebook').defer('content').order_by('-created_at')[:5]
         
         return context
 
@@ -175,7 +174,7 @@ class TagDeleteView(LoginRequiredMixin, DeleteView):
         tag = self.object
         context['usage_stats'] = {
             'notebooks': tag.notebook_set.filter(user=self.request.user).count(),
-            'entries': tag.entry_set.filter(notebook__user=self.request.user).count(),
+            'entries': tag.entry_set.filter(user=self.request.user).count(),
             'total_usage': tag.usage_count,
         }
         
@@ -224,7 +223,8 @@ def tag_quick_edit_ajax(request, tag_id):
                 'usage_count': tag.usage_count,
                 'is_active': tag.is_active,
                 'color': tag.color,
-            }
+            },
+            **TagListService.render_update(request, tags=[tag])
         })
         
     except Tag.DoesNotExist:
@@ -251,13 +251,15 @@ def tag_toggle_status_ajax(request, tag_id):
     try:
         tag = get_object_or_404(Tag, pk=tag_id, user=request.user)
         tag.is_active = not tag.is_active
-        tag.save(update_fields=['is_active'])
+        # 行のフラグメントキャッシュは updated_at をキーにしているため合わせて保存
+        tag.save(update_fields=['is_active', 'updated_at'])
         
         status = 'アクティブ' if tag.is_active else '無効'
         return JsonResponse({
             'success': True,
             'is_active': tag.is_active,
-            'message': f'タグ「{tag.name}」を{status}にしました'
+            'message': f'タグ「{tag.name}」を{status}にしました',
+            **TagListService.render_update(request, tags=[tag])
         })
         
     except Tag.DoesNotExist:
@@ -287,29 +289,35 @@ def tag_bulk_action_ajax(request):
                 'error': 'タグが選択されていません'
             }, status=400)
         
-        # ユーザー固有のタグのみ取得
-        tags = Tag.objects.filter(pk__in=tag_ids, user=request.user)
-        count = tags.count()
-        
-        if action == 'activate':
-            tags.update(is_active=True)
-            message = f'{count}個のタグをアクティブにしました'
-        elif action == 'deactivate':
-            tags.update(is_active=False)
-            message = f'{count}個のタグを無効にしました'
-        elif action == 'delete':
-            tags.delete()
-            message = f'{count}個のタグを削除しました'
-        else:
+        if action not in ('activate', 'deactivate', 'delete'):
             return JsonResponse({
                 'success': False,
                 'error': '無効なアクションです'
             }, status=400)
         
+        # ユーザー固有のタグのみ取得
+        ids = list(Tag.objects.filter(pk__in=tag_ids, user=request.user).values_list('pk', flat=True))
+        tags = Tag.objects.filter(pk__in=ids)
+        count = len(ids)
+        
+        if action == 'delete':
+            tags.delete()
+            message = f'{count}個のタグを削除しました'
+            update = TagListService.render_update(request, removed_ids=ids)
+        else:
+            is_active = action == 'activate'
+            # save() を経由しないため、行のキャッシュキー（updated_at）とタグ関連のキャッシュをまとめて更新
+            tags.update(is_active=is_active, updated_at=timezone.now())
+            invalidate_tag_cache(request.user.pk)
+            invalidate_user_cache(request.user.pk)
+            message = f'{count}個のタグを{"アクティブ" if is_active else "無効"}にしました'
+            update = TagListService.render_update(request, tags=tags)
+        
         return JsonResponse({
             'success': True,
             'message': message,
-            'affected_count': count
+            'affected_count': count,
+            **update
         })
         
     except json.JSONDecodeError:
@@ -325,6 +333,7 @@ def tag_bulk_action_ajax(request):
 
 
 @login_required
+@user_condition()
 def tag_search_ajax(request):
     """ユーザー固有タグ検索Ajax（リアルタイム検索用）"""
     query = request.GET.get('q', '').strip()
@@ -341,21 +350,9 @@ def tag_search_ajax(request):
             )
         
         tags = tags.order_by('-usage_count', 'name')[:limit]
+        results = TagSerializer.rows(tags, with_details=True, with_urls=True)
         
-        results = []
-        for tag in tags:
-            results.append({
-                'id': tag.pk,
-                'name': tag.name,
-                'description': tag.description,
-                'usage_count': tag.usage_count,
-                'is_active': tag.is_active,
-                'color': tag.get_effective_color(),
-                'edit_url': f'/tags/{tag.pk}/edit/',
-                'delete_url': f'/tags/{tag.pk}/delete/',
-            })
-        
-        return JsonResponse({
+        return json_response({
             'success': True,
             'results': results,
             'count': len(results),
@@ -390,8 +387,8 @@ def tag_usage_stats_ajax(request, tag_id):
         
         # 関連エントリー（ユーザー固有）
         entries = tag.entry_set.filter(
-            notebook__user=request.user
-        ).select_related('notebook')
+            user=request.user
+        ).select_related('notebook').defer('content')
         entry_data = [
             {
                 'id': str(entry.pk),
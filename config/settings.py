@@ -50,6 +50,7 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.common.middleware.CommitBufferMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -146,4 +147,15 @@ ACCOUNT_EMAIL_VERIFICATION = 'mandatory'
 # 認証設定
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
-LOGOUT_REDIRECT_URL = '/accounts/login/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/accounts/login/'
+
+# キャッシュ設定（全ワーカーで共有するキャッシュが必要。理由・関連設定は config/settings/base.py を参照）
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
@@ -46,6 +46,7 @@ MIDDLEWARE = [
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.common.middleware.CommitBufferMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -126,4 +127,40 @@ CORS_ALLOW_CREDENTIALS = True
 # 認証設定
 LOGIN_URL = '/accounts/login/'
 LOGIN_REDIRECT_URL = '/'
-LOGOUT_REDIRECT_URL = '/accounts/login/'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = '/accounts/login/'
+
+# アウトボックス設定（オプトイン）
+# 既定（False）では副作用はコミット後にプロセス内で適用される（プロセス停止時は失われ得るため
+# reconcile_profile_stats / rebuild_dashboard_stats で修復する）。
+# True にする場合は、書き込みと同一トランザクションでイベントを保存するため
+# DATABASES['default']['ATOMIC_REQUESTS'] = True を併用し、process_outbox --loop を常駐させること
+OUTBOX_ENABLED = False
+
+# キャッシュ設定
+# バージョン付きキャッシュ・ETag用のデータ世代（apps/common/cache.py）は全ワーカーで
+# 共有されている必要があるため、プロセスごとの LocMemCache は使用しない
+# （初回デプロイ時に createcachetable でテーブルを作成すること）
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    }
+}
+
+# ダッシュボードのキャッシュ保持秒数（書き込み時はユーザー単位のバージョン更新で無効化）
+DASHBOARD_CACHE_TIMEOUT = 300
+
+# エントリー詳細HTMLのキャッシュ保持秒数（キーに updated_at を含むため更新時は自動で切り替わる）
+ENTRY_DETAIL_CACHE_TIMEOUT = 60 * 60 * 24
+
+# ノート詳細の統計キャッシュ保持秒数（直近7日の件数を含むため短めにする）
+NOTEBOOK_SUMMARY_CACHE_TIMEOUT = 300
+
+# ノート一覧のサイドバー・検索統計のキャッシュ保持秒数（ユーザー単位のバージョン更新で無効化）
+NOTEBOOK_SIDEBAR_CACHE_TIMEOUT = 300
+
+# 一覧カードのフラグメントキャッシュ保持秒数（キーに更新日時等を含むため変更時は自動で切り替わる）
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
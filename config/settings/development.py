@@ -42,6 +42,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.common.middleware.CommitBufferMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -157,4 +158,21 @@ LOGGING = {
         'handlers': ['console'],
         'level': 'INFO',
     },
-}
\ No newline at end of file
+}
+
+# アウトボックス・キャッシュ保持秒数は base.py の設定を使用（理由は base.py を参照）
+from .base import (
+    OUTBOX_ENABLED,
+    DASHBOARD_CACHE_TIMEOUT,
+    ENTRY_DETAIL_CACHE_TIMEOUT,
+    NOTEBOOK_SUMMARY_CACHE_TIMEOUT,
+    NOTEBOOK_SIDEBAR_CACHE_TIMEOUT,
+    FRAGMENT_CACHE_TIMEOUT,
+)
+
+# キャッシュ設定（runserver の単一プロセス前提。複数ワーカーで動かす場合は base.py の共有キャッシュを使うこと）
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
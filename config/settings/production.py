@@ -43,6 +43,7 @@ MIDDLEWARE = [
     # allauth.account.middleware.AccountMiddleware を削除
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.common.middleware.CommitBufferMiddleware',
 ]
 
 # TEMPLATES設定を明示的に上書き
@@ -80,6 +81,17 @@ DATABASES = {
     }
 }
 
+# 本番環境用キャッシュ（全ワーカーで共有・バージョンキーは退避されにくいよう上限を広げる）
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'django_cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 50000,
+        },
+    }
+}
+
 # 詳細なログ設定
 LOGGING = {
     'version': 1,
@@ -16,8 +16,8 @@ urlpatterns = [
     
     # API エンドポイント
     path('api/', include('apps.dashboard.urls', namespace='api-dashboard')),
-    path('api/notes/', include('apps.notes.urls', namespace='api-notes')),
-    path('api/tags/', include('apps.tags.urls', namespace='api-tags')),
+    path('api/notes/', include('apps.notes.api_urls')),
+    path('api/tags/', include('apps.tags.api_urls')),
 ]
 
 # 開発環境での静的ファイル配信
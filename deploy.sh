@@ -15,6 +15,9 @@ pip install -r requirements.txt
 # マイグレーション
 python manage.py migrate
 
+# キャッシュテーブル作成（作成済みの場合は何もしない）
+python manage.py createcachetable
+
 # 静的ファイル収集
 python manage.py collectstatic --noinput
 
@@ -219,7 +219,8 @@ class TagManager {
             
             if (data.success) {
                 this.showNotification(data.message, 'success');
-                setTimeout(() => location.reload(), 1000);
+                this.applyTagUpdate(data);
+                this.clearSelection();
             } else {
                 this.showNotification(data.error, 'error');
             }
@@ -284,7 +285,7 @@ class TagManager {
             
             if (data.success) {
                 this.showNotification(data.message, 'success');
-                setTimeout(() => location.reload(), 1000);
+                this.applyTagUpdate(data);
             } else {
                 this.showNotification(data.error, 'error');
             }
@@ -296,6 +297,24 @@ class TagManager {
         }
     }
     
+    // 応答に含まれる行・統計のHTMLでページを部分更新（再読み込みしない）
+    applyTagUpdate(data) {
+        (data.rows || []).forEach(row => {
+            const item = document.querySelector(`.tag-item[data-tag-id="${row.id}"]`);
+            if (item) item.outerHTML = row.html;
+        });
+        (data.removed_ids || []).forEach(tagId => {
+            const item = document.querySelector(`.tag-item[data-tag-id="${tagId}"]`);
+            if (item) item.remove();
+        });
+        
+        const stats = document.getElementById('tag-stats');
+        if (stats && data.stats_html) {
+            stats.outerHTML = data.stats_html;
+        }
+        this.updateBulkActionsVisibility();
+    }
+    
     async viewTagUsage(tagId) {
         try {
             this.setLoading(true);
@@ -345,7 +364,7 @@ class TagManager {
         const formData = {
             name: document.getElementById('edit-tag-name').value,
             description: document.getElementById('edit-tag-description').value,
-            category: document.getElementById('edit-tag-category').value,
+            category: document.getElementById('edit-tag-category')?.value,
             is_active: document.getElementById('edit-tag-active').checked
         };
         
@@ -367,7 +386,7 @@ class TagManager {
             if (data.success) {
                 this.showNotification(data.message, 'success');
                 this.closeModal('quick-edit-modal');
-                setTimeout(() => location.reload(), 1000);
+                this.applyTagUpdate(data);
             } else {
                 this.showNotification(data.error, 'error');
             }